@@ -1,3 +1,5 @@
-from .solver import AStart
+from .solver import AStart, BoundedSearch, DistanceField, Replanner, vectorized
+from .pool import SolverPool
+from .hpa import HierarchicalSolver
 
-__all__ = ["AStart"]
+__all__ = ["AStart", "BoundedSearch", "DistanceField", "HierarchicalSolver", "Replanner", "SolverPool", "vectorized"]
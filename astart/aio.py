@@ -0,0 +1,163 @@
+"""asyncio front-end: await paths without blocking the event loop.
+
+Requests made in the same event loop iteration are coalesced into one
+`AStart.solve_many` call per parameter set, run on a bounded pool of worker
+threads (the native searches release the GIL). Identical requests in flight
+share one search. Graph updates made through the front-end are ordered with
+the searches.
+"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .solver import _OUTPUTS
+
+# Request latencies kept for the percentiles of `AsyncSolver.stats`.
+LATENCY_WINDOW = 4096
+
+class AsyncSolver:
+    """Serve ``await solve(start, goal)`` for one solver, from one event loop.
+
+    `workers` threads run the batches, each one a `solve_many` call of at most
+    `max_batch` queries on `threads` native threads (all cores by default).
+    Identical requests in flight get the same result object, so copy a path
+    before changing it.
+
+    Update the graph through `set_edge`, `add_edge`, `remove_edge` and
+    `set_walkable` here: searches requested before an update run on the old
+    graph, later ones wait for it. The solver's own update methods raise
+    RuntimeError while batches of a front-end are running.
+    """
+    def __init__(self, solver, workers=2, threads=None, max_batch=1024):
+        if workers < 1: raise ValueError("workers must be >= 1")
+        if max_batch < 1: raise ValueError("max_batch must be >= 1")
+        self.solver = solver
+        self.threads = threads
+        self.max_batch = max_batch
+        self.loop = None
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="astart")
+        # (k, adaptive, classic) -> requests of the current loop iteration, as (key, start, goal, output, future)
+        self._pending = {}
+        # (start_id, goal_id, output, k, adaptive, classic) -> future of the search in flight
+        self._in_flight = {}
+        # Batches running on the executor, and whether an update holds back new ones
+        self._running = set()
+        self._holding = False
+        self._update_lock = None
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._requests = self._deduplicated = self._searches = self._batches = 0
+
+    async def solve(self, start, goal, k=1000, adaptive=False, output='nodes', classic=False):
+        """The path of ``solver.solve(start, goal, k, adaptive, output)``, or of `solve_classic` with `classic`."""
+        if output not in _OUTPUTS: raise ValueError(f"output must be one of {_OUTPUTS}")
+        loop = asyncio.get_running_loop()
+        if self.loop is None: self.loop = loop
+        elif loop is not self.loop: raise RuntimeError("AsyncSolver is bound to another event loop")
+        t0 = time.perf_counter()
+        self._requests += 1
+        start_id, goal_id = self.solver._lookup(start), self.solver._lookup(goal)
+        if start_id is None or goal_id is None: return None
+        params = (k, bool(adaptive), bool(classic))
+        key = (start_id, goal_id, output) + params
+        future = self._in_flight.get(key)
+        if future is None:
+            future = self._in_flight[key] = loop.create_future()
+            if not self._pending and not self._holding: loop.call_soon(self._flush)
+            self._pending.setdefault(params, []).append((key, start, goal, output, future))
+        else:
+            self._deduplicated += 1
+        # Shielded: a cancelled caller must not cancel the search of the others waiting for it.
+        path = await asyncio.shield(future)
+        self._latencies.append(time.perf_counter() - t0)
+        return path
+
+    async def set_edge(self, u, v, weight=1.0):
+        """`AStart.set_edge`, after the searches requested before it."""
+        return await self._update(self.solver.set_edge, u, v, weight)
+
+    async def add_edge(self, u, v, weight=1.0):
+        """`AStart.add_edge`, after the searches requested before it."""
+        return await self._update(self.solver.add_edge, u, v, weight)
+
+    async def remove_edge(self, u, v):
+        """`AStart.remove_edge`, after the searches requested before it."""
+        return await self._update(self.solver.remove_edge, u, v)
+
+    async def set_walkable(self, cell, walkable=True):
+        """`AStart.set_walkable`, after the searches requested before it."""
+        return await self._update(self.solver.set_walkable, cell, walkable)
+
+    async def _update(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        if self.loop is None: self.loop = loop
+        elif loop is not self.loop: raise RuntimeError("AsyncSolver is bound to another event loop")
+        if self._update_lock is None: self._update_lock = asyncio.Lock()
+        async with self._update_lock:
+            # Earlier requests go out now; later ones stay pending until the graph is updated.
+            self._flush()
+            self._holding = True
+            try:
+                while self._running: await asyncio.wait(list(self._running))
+                return await loop.run_in_executor(self._executor, fn, *args)
+            finally:
+                self._holding = False
+                if self._pending: loop.call_soon(self._flush)
+
+    @property
+    def queue_depth(self):
+        """Searches requested and not finished yet: waiting for their batch, for a worker, or running."""
+        return len(self._in_flight)
+
+    def stats(self):
+        """Request, deduplication and batch counters, queue depth and latency percentiles (ms)."""
+        latencies = sorted(self._latencies)
+        def percentile(q):
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+        return {
+            'requests': self._requests,
+            'deduplicated': self._deduplicated,
+            'searches': self._searches,
+            'batches': self._batches,
+            'batch_size_mean': self._searches / self._batches if self._batches else 0.0,
+            'queue_depth': self.queue_depth,
+            'latency_ms_p50': percentile(0.5),
+            'latency_ms_p95': percentile(0.95),
+            'latency_ms_p99': percentile(0.99),
+        }
+
+    def close(self, wait=True):
+        """Stop the worker threads once their batches are done; `wait` blocks until then."""
+        self._executor.shutdown(wait=wait)
+
+    def _flush(self):
+        if self._holding: return
+        pending, self._pending = self._pending, {}
+        for (k, adaptive, classic), requests in pending.items():
+            for i in range(0, len(requests), self.max_batch):
+                batch = requests[i:i + self.max_batch]
+                self._batches += 1
+                self._searches += len(batch)
+                self.solver._async_batches += 1
+                work = self.loop.run_in_executor(self._executor, self._run, batch, k, adaptive, classic)
+                self._running.add(work)
+                work.add_done_callback(lambda work, batch=batch: self._finish(batch, work))
+
+    def _run(self, batch, k, adaptive, classic):
+        """Solve and format a batch, on a worker thread."""
+        solver = self.solver
+        paths, offsets = solver.solve_many([r[1] for r in batch], [r[2] for r in batch], k, adaptive, self.threads,
+                                           'ids', classic)
+        return [solver._format_path(paths[lo:hi], hi - lo, r[3]) if hi > lo else None
+                for r, lo, hi in zip(batch, offsets, offsets[1:])]
+
+    def _finish(self, batch, work):
+        self._running.discard(work)
+        self.solver._async_batches -= 1
+        error = None if work.cancelled() else work.exception()
+        for i, (key, _, _, _, future) in enumerate(batch):
+            del self._in_flight[key]
+            if future.done(): continue
+            if work.cancelled(): future.cancel()
+            elif error is not None: future.set_exception(error)
+            else: future.set_result(work.result()[i])
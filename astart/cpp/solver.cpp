@@ -1,181 +1,3692 @@
+// Python.h must come first: the library is a CPython extension module, whose types are
+// defined at the end of this file.
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
 #include <vector>
 #include <queue>
 #include <algorithm>
 #include <cmath>
 #include <unordered_map>
 #include <limits>
+#include <mutex>
+#include <shared_mutex>
+#include <atomic>
+#include <memory>
+#include <cstdint>
+#include <thread>
+#include <functional>
+#include <condition_variable>
+#include <deque>
+#include <chrono>
+#include <cstring>
+#include <type_traits>
+#include <charconv>
+#include <string>
 
 const float INF = std::numeric_limits<float>::infinity();
+const float SQRT2 = 1.41421356f;
+
+// Neighbour order used by grid mode: cardinals, then diagonals.
+const int GRID_DX[8] = {-1, 1, 0, 0, -1, -1, 1, 1};
+const int GRID_DY[8] = {0, 0, -1, 1, -1, 1, -1, 1};
+
+// Heuristic supplied by the caller (mode 4), called as h(context, node, goal) only
+// for the nodes a search evaluates.
+typedef float (*HeuristicCallback)(void* context, int node, int goal);
 
 struct Edge {
     int to;
     float weight;
 };
 
+using PII = std::pair<float, int>;
+
+inline void heap_push(std::vector<PII>& heap, PII item) {
+    heap.push_back(item);
+    std::push_heap(heap.begin(), heap.end(), std::greater<PII>());
+}
+
+inline PII heap_pop(std::vector<PII>& heap) {
+    std::pop_heap(heap.begin(), heap.end(), std::greater<PII>());
+    PII item = heap.back();
+    heap.pop_back();
+    return item;
+}
+
+// Open lists the searches are templated over. push(f, u) queues u with key f,
+// pop() returns the node with the smallest key and top() peeks at that entry.
+enum OpenList { OPEN_BINARY = 0, OPEN_QUATERNARY = 1, OPEN_RADIX = 2 };
+
+// Binary heap with lazy deletion: an improved node is pushed again and its
+// stale entries are skipped by the search when popped.
+struct BinaryHeap {
+    std::vector<PII> items;
+
+    void reset(int) { items.clear(); }
+    bool empty() const { return items.empty(); }
+    void push(float f, int u) { heap_push(items, {f, u}); }
+    int pop() { return heap_pop(items).second; }
+    PII top() const { return items.front(); }
+    size_t memory_bytes() const { return items.capacity() * sizeof(PII); }
+};
+
+// 4-ary heap indexed by node: pushing a queued node lowers its key in place
+// (decrease-key), so the heap holds each node at most once and is shallower.
+struct QuaternaryHeap {
+    std::vector<PII> items;
+    std::vector<int> pos;  // index of each node in items, -1 if not queued
+
+    void reset(int n) {
+        if ((int)pos.size() != n) pos.assign(n, -1);
+        else for (const auto& item : items) pos[item.second] = -1;
+        items.clear();
+    }
+
+    bool empty() const { return items.empty(); }
+
+    void push(float f, int u) {
+        int i = pos[u];
+        if (i < 0) {
+            i = (int)items.size();
+            items.push_back({f, u});
+        } else if (f >= items[i].first) {
+            return;
+        }
+        sift_up(i, {f, u});
+    }
+
+    int pop() {
+        int u = items[0].second;
+        pos[u] = -1;
+        PII last = items.back();
+        items.pop_back();
+        if (!items.empty()) sift_down(0, last);
+        return u;
+    }
+
+    PII top() const { return items[0]; }
+
+    size_t memory_bytes() const { return items.capacity() * sizeof(PII) + pos.capacity() * sizeof(int); }
+
+private:
+    void place(int i, PII item) {
+        items[i] = item;
+        pos[item.second] = i;
+    }
+
+    void sift_up(int i, PII item) {
+        while (i > 0) {
+            int parent = (i - 1) / 4;
+            if (!(item < items[parent])) break;
+            place(i, items[parent]);
+            i = parent;
+        }
+        place(i, item);
+    }
+
+    void sift_down(int i, PII item) {
+        int n = (int)items.size();
+        while (true) {
+            int first = 4 * i + 1;
+            if (first >= n) break;
+            int best = first;
+            for (int c = first + 1; c < std::min(first + 4, n); ++c) {
+                if (items[c] < items[best]) best = c;
+            }
+            if (!(items[best] < item)) break;
+            place(i, items[best]);
+            i = best;
+        }
+        place(i, item);
+    }
+};
+
+// Monotone radix heap over the bit patterns of non-negative float keys, which
+// order like the floats themselves. Entries sit in the bucket of the highest
+// bit where they differ from the last popped key, so each entry moves down at
+// most 32 times. Keys must not drop below the last popped one, which holds for
+// consistent heuristics (none, manhattan, octile, alt); smaller keys are
+// treated as equal to it.
+struct RadixHeap {
+    std::vector<std::pair<uint32_t, int>> buckets[33];
+    uint32_t last = 0;
+    size_t count = 0;
+
+    void reset(int) {
+        for (auto& bucket : buckets) bucket.clear();
+        last = 0;
+        count = 0;
+    }
+
+    bool empty() const { return count == 0; }
+
+    void push(float f, int u) {
+        uint32_t key = std::max(bits(f > 0 ? f : 0.0f), last);
+        buckets[bucket_of(key)].push_back({key, u});
+        ++count;
+    }
+
+    int pop() {
+        settle();
+        int u = buckets[0].back().second;
+        buckets[0].pop_back();
+        --count;
+        return u;
+    }
+
+    PII top() {
+        settle();
+        float f;
+        std::memcpy(&f, &last, sizeof(f));
+        return {f, buckets[0].back().second};
+    }
+
+    size_t memory_bytes() const {
+        size_t bytes = 0;
+        for (const auto& bucket : buckets) bytes += bucket.capacity() * sizeof(bucket[0]);
+        return bytes;
+    }
+
+private:
+    // Moves the entries with the smallest key into bucket 0, making it the new `last`.
+    void settle() {
+        if (!buckets[0].empty()) return;
+        int i = 1;
+        while (buckets[i].empty()) ++i;
+        auto& bucket = buckets[i];
+        last = std::min_element(bucket.begin(), bucket.end())->first;
+        for (const auto& entry : bucket) buckets[bucket_of(entry.first)].push_back(entry);
+        bucket.clear();
+    }
+
+    static uint32_t bits(float f) {
+        uint32_t b;
+        std::memcpy(&b, &f, sizeof(b));
+        return b;
+    }
+
+    int bucket_of(uint32_t key) const { return key == last ? 0 : 32 - __builtin_clz(key ^ last); }
+};
+
+// Optional per-query counters. Searches always count into a local copy (a few
+// register increments) and only publish it, with wall time, when asked to.
+struct SearchStats {
+    long long nodes_expanded = 0;
+    long long heap_pushes = 0;
+    long long heap_pops = 0;
+    long long stale_pops = 0;
+    long long heuristic_calls = 0;
+    long long heuristic_evals = 0;  // callback invocations, memo hits excluded
+    long long batch_steps = 0;
+    long long pivots_pushed = 0;
+    long long time_ns = 0;
+
+    void add(const SearchStats& o) {
+        nodes_expanded += o.nodes_expanded;
+        heap_pushes += o.heap_pushes;
+        heap_pops += o.heap_pops;
+        stale_pops += o.stale_pops;
+        heuristic_calls += o.heuristic_calls;
+        heuristic_evals += o.heuristic_evals;
+        batch_steps += o.batch_steps;
+        pivots_pushed += o.pivots_pushed;
+    }
+};
+
+class StatsRecorder {
+public:
+    SearchStats counts;
+
+    explicit StatsRecorder(SearchStats* out) : out(out) {
+        if (out) started = std::chrono::steady_clock::now();
+    }
+
+    ~StatsRecorder() {
+        if (!out) return;
+        counts.time_ns = std::chrono::duration_cast<std::chrono::nanoseconds>(
+            std::chrono::steady_clock::now() - started).count();
+        *out = counts;
+    }
+
+private:
+    SearchStats* out;
+    std::chrono::steady_clock::time_point started;
+};
+
+// Per-search scratch state, kept between queries. Node entries are only valid
+// when their stamp matches the current generation, so starting a new search
+// is O(1) instead of refilling O(N) arrays.
+struct SearchWorkspace {
+    struct NodeState {
+        float g;
+        int parent;
+        unsigned seen;    // generation in which g/parent were written
+        unsigned closed;  // generation in which the node was closed
+    };
+
+    std::vector<NodeState> nodes;
+    unsigned generation = 0;
+    BinaryHeap open;  // also the heap of the Dijkstra searches
+    QuaternaryHeap quaternary;
+    RadixHeap radix;
+    std::vector<int> frontier;
+    std::vector<int> next_frontier;
+    std::vector<int> next_pivots;
+    BinaryHeap lower;  // g + h order of the focal searches
+
+    // Callback heuristic values, valid while h_stamp matches h_generation. They
+    // survive across searches for the same (goal, callback epoch).
+    std::vector<float> h_memo;
+    std::vector<unsigned> h_stamp;
+    unsigned h_generation = 0;
+    int h_goal = -1;
+    unsigned h_epoch = 0;
+
+    void begin(int n) {
+        if ((int)nodes.size() != n) {
+            nodes.assign(n, NodeState{INF, -1, 0, 0});
+            generation = 0;
+        }
+        if (++generation == 0) {
+            // Stamp counter wrapped around: clear the stamps once and start over.
+            for (auto& s : nodes) s.seen = s.closed = 0;
+            generation = 1;
+        }
+        frontier.clear();
+        next_frontier.clear();
+        next_pivots.clear();
+    }
+
+    inline float g(int u) const { return nodes[u].seen == generation ? nodes[u].g : INF; }
+    inline int parent(int u) const { return nodes[u].seen == generation ? nodes[u].parent : -1; }
+    inline void relax(int u, float g_u, int p) { nodes[u] = NodeState{g_u, p, generation, nodes[u].closed}; }
+    inline bool is_closed(int u) const { return nodes[u].closed == generation; }
+    inline void close(int u) { nodes[u].closed = generation; }
+    inline void reopen(int u) { nodes[u].closed = 0; }
+
+    template <class Open>
+    Open& open_list() {
+        if constexpr (std::is_same<Open, QuaternaryHeap>::value) return quaternary;
+        else if constexpr (std::is_same<Open, RadixHeap>::value) return radix;
+        else return open;
+    }
+
+    size_t queue_bytes() const {
+        return open.memory_bytes() + quaternary.memory_bytes() + radix.memory_bytes() + lower.memory_bytes();
+    }
+
+    void bind_heuristic(int n, int goal, unsigned epoch) {
+        if ((int)h_stamp.size() != n) {
+            h_memo.assign(n, 0);
+            h_stamp.assign(n, 0);
+            h_generation = 0;
+        }
+        if (h_generation && goal == h_goal && epoch == h_epoch) return;
+        h_goal = goal;
+        h_epoch = epoch;
+        if (++h_generation == 0) {
+            std::fill(h_stamp.begin(), h_stamp.end(), 0);
+            h_generation = 1;
+        }
+    }
+};
+
+// Hands out one workspace per concurrent search; idle workspaces are kept for reuse.
+class WorkspacePool {
+public:
+    std::unique_ptr<SearchWorkspace> acquire() {
+        std::lock_guard<std::mutex> lock(mutex);
+        if (idle.empty()) return std::make_unique<SearchWorkspace>();
+        auto ws = std::move(idle.back());
+        idle.pop_back();
+        return ws;
+    }
+
+    void release(std::unique_ptr<SearchWorkspace> ws) {
+        std::lock_guard<std::mutex> lock(mutex);
+        idle.push_back(std::move(ws));
+    }
+
+    size_t size() {
+        std::lock_guard<std::mutex> lock(mutex);
+        return idle.size();
+    }
+
+    size_t memory_bytes() {
+        std::lock_guard<std::mutex> lock(mutex);
+        size_t bytes = 0;
+        for (const auto& ws : idle) {
+            bytes += sizeof(SearchWorkspace) + ws->nodes.capacity() * sizeof(SearchWorkspace::NodeState);
+            bytes += ws->queue_bytes();
+            bytes += (ws->frontier.capacity() + ws->next_frontier.capacity() + ws->next_pivots.capacity()) * sizeof(int);
+            bytes += ws->h_memo.capacity() * sizeof(float) + ws->h_stamp.capacity() * sizeof(unsigned);
+        }
+        return bytes;
+    }
+
+    void clear() {
+        std::lock_guard<std::mutex> lock(mutex);
+        idle.clear();
+    }
+
+private:
+    std::mutex mutex;
+    std::vector<std::unique_ptr<SearchWorkspace>> idle;
+};
+
+class WorkspaceLease {
+public:
+    WorkspaceLease(WorkspacePool& pool, int num_nodes) : pool(pool), ws(pool.acquire()) { ws->begin(num_nodes); }
+    ~WorkspaceLease() { pool.release(std::move(ws)); }
+    SearchWorkspace& operator*() { return *ws; }
+    SearchWorkspace* operator->() { return ws.get(); }
+
+private:
+    WorkspacePool& pool;
+    std::unique_ptr<SearchWorkspace> ws;
+};
+
+// Outcome of a budgeted search; the limit statuses leave the search resumable.
+enum SearchStatus { SEARCH_FOUND = 0, SEARCH_NO_PATH = 1, SEARCH_MAX_EXPANSIONS = 2, SEARCH_DEADLINE = 3 };
+
+// A solve / solve_classic query under an expansion or time budget. It owns its
+// workspace, so the g values, parents and open list survive between calls and
+// a search that ran out of budget continues where it stopped.
+struct BoundedSearch {
+    std::unique_ptr<SearchWorkspace> ws;
+    int start, goal, k, adaptive, heuristic_mode;
+    float* h_values;
+    bool classic;
+    int open_list = -1;      // queue the search was seeded with, -1 before seeding
+    unsigned version = 0;    // graph version the search was seeded on
+    int status = -1;         // SearchStatus of the last call, -1 while the search can go on
+    int best = -1;           // queued node with the lowest h, the end of the partial path
+    float best_h = INF;
+
+    // Limits of the current call, the deadline counted from its start; the clock is read
+    // after every CLOCK_STRIDE expansions and pops.
+    static const long long CLOCK_STRIDE = 64;
+    long long max_expansions = -1;
+    std::chrono::steady_clock::time_point deadline;
+    bool has_deadline = false;
+    long long next_clock = 0;
+
+    void set_limits(long long expansions, long long deadline_us) {
+        max_expansions = expansions;
+        has_deadline = deadline_us >= 0;
+        if (has_deadline) deadline = std::chrono::steady_clock::now() + std::chrono::microseconds(deadline_us);
+        next_clock = 0;
+    }
+
+    // True once a limit of the current call is reached, setting `status`.
+    bool exhausted(const SearchStats& st) {
+        if (max_expansions >= 0 && st.nodes_expanded >= max_expansions) {
+            status = SEARCH_MAX_EXPANSIONS;
+        } else if (has_deadline && st.nodes_expanded + st.heap_pops >= next_clock) {
+            next_clock = st.nodes_expanded + st.heap_pops + CLOCK_STRIDE;
+            if (std::chrono::steady_clock::now() >= deadline) status = SEARCH_DEADLINE;
+        }
+        return status == SEARCH_MAX_EXPANSIONS || status == SEARCH_DEADLINE;
+    }
+
+    inline void note(int u, float h_u) {
+        if (h_u <= best_h) {
+            best = u;
+            best_h = h_u;
+        }
+    }
+};
+
+// Persistent worker threads shared by all solvers. run() blocks until every
+// worker index has been processed; the calling thread takes worker 0. The first
+// exception thrown by a worker is rethrown by run() once all of them are done.
+class ThreadPool {
+public:
+    static ThreadPool& instance() {
+        static ThreadPool pool;
+        return pool;
+    }
+
+    void run(int workers, const std::function<void(int)>& fn) {
+        if (workers <= 1) {
+            fn(0);
+            return;
+        }
+        std::atomic<int> remaining(workers - 1);
+        std::mutex done_mutex;
+        std::condition_variable done;
+        std::exception_ptr error;
+        auto attempt = [&](int w) {
+            try {
+                fn(w);
+            } catch (...) {
+                std::lock_guard<std::mutex> done_lock(done_mutex);
+                if (!error) error = std::current_exception();
+            }
+        };
+        {
+            std::lock_guard<std::mutex> lock(mutex);
+            while ((int)threads.size() < workers - 1) threads.emplace_back([this] { worker_loop(); });
+            for (int w = 1; w < workers; ++w) {
+                tasks.push_back([&, w] {
+                    attempt(w);
+                    std::lock_guard<std::mutex> done_lock(done_mutex);
+                    if (--remaining == 0) done.notify_one();
+                });
+            }
+        }
+        wake.notify_all();
+        attempt(0);
+        std::unique_lock<std::mutex> done_lock(done_mutex);
+        done.wait(done_lock, [&] { return remaining == 0; });
+        if (error) std::rethrow_exception(error);
+    }
+
+    ~ThreadPool() {
+        {
+            std::lock_guard<std::mutex> lock(mutex);
+            stopping = true;
+        }
+        wake.notify_all();
+        for (auto& t : threads) t.join();
+    }
+
+private:
+    std::mutex mutex;
+    std::condition_variable wake;
+    std::deque<std::function<void()>> tasks;
+    std::vector<std::thread> threads;
+    bool stopping = false;
+
+    void worker_loop() {
+        for (;;) {
+            std::function<void()> task;
+            {
+                std::unique_lock<std::mutex> lock(mutex);
+                wake.wait(lock, [this] { return stopping || !tasks.empty(); });
+                if (stopping && tasks.empty()) return;
+                task = std::move(tasks.front());
+                tasks.pop_front();
+            }
+            task();
+        }
+    }
+};
+
+// Array that owns its elements or borrows read-only caller memory, such as a
+// memory-mapped saved solver. Replacing the contents makes it owning again, so
+// a borrowed graph that gets modified copies itself first.
+template <class T>
+class Storage {
+public:
+    Storage() = default;
+    Storage(size_t n, T value) : owned(n, value) { reset(); }
+    Storage(const Storage&) = delete;
+    Storage& operator=(const Storage&) = delete;
+
+    inline const T& operator[](size_t i) const { return ptr[i]; }
+    const T* data() const { return ptr; }
+    const T* begin() const { return ptr; }
+    const T* end() const { return ptr + len; }
+    size_t size() const { return len; }
+    bool empty() const { return len == 0; }
+    bool borrowed() const { return len && ptr != owned.data(); }
+    size_t capacity() const { return owned.capacity(); }
+
+    void swap(std::vector<T>& values) {
+        owned.swap(values);
+        reset();
+    }
+
+    void assign(const T* first, const T* last) {
+        owned.assign(first, last);
+        reset();
+    }
+
+    // Writable elements for in-place updates; borrowed contents are copied first.
+    T* mutable_data() {
+        if (borrowed()) assign(ptr, ptr + len);
+        return owned.data();
+    }
+
+    void borrow(const T* first, size_t n) {
+        std::vector<T>().swap(owned);
+        ptr = first;
+        len = n;
+    }
+
+    void clear() {
+        std::vector<T>().swap(owned);
+        reset();
+    }
+
+private:
+    std::vector<T> owned;
+    const T* ptr = nullptr;
+    size_t len = 0;
+
+    void reset() {
+        ptr = owned.data();
+        len = owned.size();
+    }
+};
+
+// Everything needed to recreate a solver without rebuilding it, as raw arrays
+// (see AStart.save / AStart.load). Unused arrays are null: grids have no CSR,
+// edge graphs no cells/moves, and only one of the component arrays is set.
+struct SolverImage {
+    int num_nodes;
+    int num_edges;  // CSR entries
+    int width;
+    int height;
+    int connectivity;
+    int corner_cutting;
+    int num_components;
+    int num_landmarks;
+    const int* offsets;                // num_nodes + 1
+    const int* targets;                // num_edges
+    const float* weights;              // num_edges
+    const uint8_t* cells;              // num_nodes
+    const uint8_t* moves;              // num_nodes
+    const uint16_t* narrow_components; // num_nodes
+    const int* wide_components;        // num_nodes
+    const int* landmarks;              // num_landmarks
+    const float* landmark_from;        // num_nodes * num_landmarks
+    const float* landmark_to;          // num_nodes * num_landmarks
+};
+
 class GraphSolver {
 public:
+    // Edges are stored in compressed sparse row form: the neighbours of u are
+    // targets[offsets[u] .. offsets[u + 1]). Edges added one at a time go to
+    // the per-node `adj` lists first and are packed in by finalize().
+    Storage<int> offsets;
+    Storage<int> targets;
+    Storage<float> weights;
     std::vector<std::vector<Edge>> adj;
     int num_nodes;
     int width;
+
+    // Grid mode: node u is cell (u % width, u / width) and neighbours are
+    // generated from the walkability bitmap instead of stored edges. `moves`
+    // caches, per cell, a bitmask of the legal moves in GRID_DX/GRID_DY order.
+    Storage<uint8_t> cells;
+    Storage<uint8_t> moves;
+    int height = 0;
+    int connectivity = 0;
+    bool corner_cutting = false;
+    int move_delta[8] = {0};
+
+    // Bumped by every edge change so callers can invalidate cached results.
+    std::atomic<unsigned> version{0};
+
+    // OpenList used by the A* searches (the Dijkstra searches always use a binary heap).
+    std::atomic<int> open_list{OPEN_BINARY};
     
-    GraphSolver(int n) : num_nodes(n), width(0) {
-        adj.resize(n);
+    GraphSolver(int n) : offsets(n + 1, 0), num_nodes(n), width(0) {}
+
+    GraphSolver(const uint8_t* walkable, int w, int h, int conn, bool cut)
+        : num_nodes(w * h), width(w), height(h), connectivity(conn == 4 ? 4 : 8), corner_cutting(cut) {
+        std::vector<uint8_t> bitmap(walkable, walkable + (size_t)w * h);
+        for (auto& c : bitmap) c = c ? 1 : 0;
+        cells.swap(bitmap);
+        init_move_deltas();
+        std::vector<uint8_t> legal(num_nodes);
+        for (int u = 0; u < num_nodes; ++u) legal[u] = legal_moves(u % width, u / width);
+        moves.swap(legal);
+        build_components();
+    }
+
+    // Recreates a saved solver. With `copy` the arrays are copied, otherwise they are
+    // borrowed and must outlive the solver (or until it is modified).
+    GraphSolver(const SolverImage& image, bool copy)
+        : num_nodes(image.num_nodes), width(image.width), height(image.height),
+          connectivity(image.connectivity), corner_cutting(image.corner_cutting != 0) {
+        auto load = [copy](auto& storage, const auto* values, size_t n) {
+            if (!values) return;
+            if (copy) storage.assign(values, values + n);
+            else storage.borrow(values, n);
+        };
+        size_t n = num_nodes, m = image.num_edges, tables = n * image.num_landmarks;
+        if (image.offsets) {
+            load(offsets, image.offsets, n + 1);
+        } else if (!is_grid()) {
+            std::vector<int> no_edges(n + 1, 0);
+            offsets.swap(no_edges);
+        }
+        load(targets, image.targets, m);
+        load(weights, image.weights, m);
+        load(cells, image.cells, n);
+        load(moves, image.moves, n);
+        if (is_grid()) init_move_deltas();
+        load(narrow_components, image.narrow_components, n);
+        load(wide_components, image.wide_components, n);
+        num_components = image.num_components;
+        load(landmarks, image.landmarks, image.num_landmarks);
+        load(landmark_from, image.landmark_from, tables);
+        load(landmark_to, image.landmark_to, tables);
+        num_landmarks = image.num_landmarks;
+    }
+
+    // Points `image` at this solver's arrays (valid until the graph is modified). The
+    // component labels must be exact, see refresh_components.
+    void export_image(SolverImage& image) {
+        finalize();
+        image = SolverImage{};
+        image.num_nodes = num_nodes;
+        image.num_edges = (int)targets.size();
+        image.width = width;
+        image.height = height;
+        image.connectivity = connectivity;
+        image.corner_cutting = corner_cutting;
+        image.num_components = num_components;
+        image.num_landmarks = num_landmarks;
+        auto data = [](const auto& storage) { return storage.empty() ? nullptr : storage.data(); };
+        image.offsets = is_grid() ? nullptr : data(offsets);
+        image.targets = data(targets);
+        image.weights = data(weights);
+        image.cells = data(cells);
+        image.moves = data(moves);
+        image.narrow_components = data(narrow_components);
+        image.wide_components = data(wide_components);
+        image.landmarks = data(landmarks);
+        image.landmark_from = data(landmark_from);
+        image.landmark_to = data(landmark_to);
+    }
+
+    bool is_borrowed() const {
+        return offsets.borrowed() || targets.borrowed() || cells.borrowed() || narrow_components.borrowed() ||
+               wide_components.borrowed() || landmark_from.borrowed();
+    }
+
+    void init_move_deltas() {
+        for (int d = 0; d < 8; ++d) move_delta[d] = GRID_DY[d] * width + GRID_DX[d];
     }
 
     void set_width(int w) { width = w; }
 
+    bool is_grid() const { return connectivity != 0; }
+
+    // Jump Point Search applies to 8-connected grids where diagonals need both side cells free.
+    bool supports_jps() const { return is_grid() && connectivity == 8 && !corner_cutting; }
+
+    inline bool walkable(int x, int y) const {
+        return x >= 0 && y >= 0 && x < width && y < height && cells[(size_t)y * width + x];
+    }
+
+    uint8_t legal_moves(int x, int y) const {
+        if (!walkable(x, y)) return 0;
+        uint8_t mask = 0;
+        for (int d = 0; d < 4; ++d) {
+            if (walkable(x + GRID_DX[d], y + GRID_DY[d])) mask |= 1 << d;
+        }
+        if (connectivity == 4) return mask;
+        for (int d = 4; d < 8; ++d) {
+            int nx = x + GRID_DX[d], ny = y + GRID_DY[d];
+            if (!walkable(nx, ny)) continue;
+            bool side_a = walkable(nx, y), side_b = walkable(x, ny);
+            // Without corner cutting both side cells must be free; with it, one is enough
+            // (squeezing between two diagonal obstacles is never allowed).
+            if (corner_cutting ? (side_a || side_b) : (side_a && side_b)) mask |= 1 << d;
+        }
+        return mask;
+    }
+
+    // Calls f(v, w) for every outgoing edge (u, v) with weight w.
+    template <class F>
+    inline void for_each_neighbor(int u, F&& f) const {
+        if (!is_grid()) {
+            for (int e = offsets[u]; e < offsets[u + 1]; ++e) f(targets[e], weights[e]);
+            return;
+        }
+        for (unsigned mask = moves[u]; mask; mask &= mask - 1) {
+            int d = __builtin_ctz(mask);
+            f(u + move_delta[d], d < 4 ? 1.0f : SQRT2);
+        }
+    }
+
     void add_edge(int u, int v, float w) {
-        if (u < adj.size() && v < adj.size()) {
+        if (is_grid()) return;
+        if (u >= 0 && v >= 0 && u < num_nodes && v < num_nodes) {
+            if (adj.empty()) adj.resize(num_nodes);
             adj[u].push_back({v, w});
+            log_change(u);
+            pending = true;
+            ++version;
         }
     }
 
-    inline float calculate_h(int u, int goal, int mode, float* h_array) {
-        if (mode == 0) return 0;
-        if (mode == 2 && h_array) return h_array[u];
-        
-        // Native Grid Logic
-        if (width <= 0) return 0;
-        int x1 = u % width;
-        int y1 = u / width;
-        int x2 = goal % width;
-        int y2 = goal / width;
-        float dx = std::abs(x1 - x2);
-        float dy = std::abs(y1 - y2);
+    void add_edges(const int* src, const int* dst, const float* w, int m) {
+        if (is_grid()) return;
+        std::lock_guard<std::mutex> lock(build_mutex);
+        pack(src, dst, w, m);
+        forget_changes();
+        ++version;
+    }
 
-        if (mode == 1) return dx + dy; // Manhattan
-        if (mode == 3) return (dx + dy) + (1.41421356f - 2.0f) * std::min(dx, dy); // Octile
-        return 0;
+    void set_csr(const int* indptr, const int* indices, const float* w) {
+        if (is_grid()) return;
+        std::lock_guard<std::mutex> lock(build_mutex);
+        std::vector<std::vector<Edge>>().swap(adj);
+        std::vector<int> new_offsets(num_nodes + 1, 0), new_targets;
+        std::vector<float> new_weights;
+        new_targets.reserve(indptr[num_nodes] - indptr[0]);
+        new_weights.reserve(indptr[num_nodes] - indptr[0]);
+        for (int u = 0; u < num_nodes; ++u) {
+            for (int e = indptr[u]; e < indptr[u + 1]; ++e) {
+                int v = indices[e];
+                if (v < 0 || v >= num_nodes) continue;
+                new_targets.push_back(v);
+                new_weights.push_back(w ? w[e] : 1.0f);
+            }
+            new_offsets[u + 1] = (int)new_targets.size();
+        }
+        offsets.swap(new_offsets);
+        targets.swap(new_targets);
+        weights.swap(new_weights);
+        pending = false;
+        forget_changes();
+        ++version;
+        build_components();
     }
 
-    int solve_classic(int start, int goal, int heuristic_mode, float* h_values, int* out_path, int max_len) {
-        if (start >= (int)adj.size() || goal >= (int)adj.size()) return 0;
+    // Packs the edges added with add_edge into the CSR arrays and releases the per-node lists.
+    void finalize() {
+        if (!pending) return;
+        std::lock_guard<std::mutex> lock(build_mutex);
+        if (pending) pack(nullptr, nullptr, nullptr, 0);
+    }
 
-        using PII = std::pair<float, int>;
-        std::priority_queue<PII, std::vector<PII>, std::greater<PII>> open_set;
-        
-        std::vector<float> g_score(adj.size(), INF);
-        std::vector<int> came_from(adj.size(), -1);
-        std::vector<bool> visited(adj.size(), false);
-        
-        g_score[start] = 0;
-        open_set.push({calculate_h(start, goal, heuristic_mode, h_values), start});
+    bool is_finalized() const { return !pending; }
 
-        while (!open_set.empty()) {
-            int u = open_set.top().second;
-            open_set.pop();
-            
-            if (visited[u]) continue;
-            visited[u] = true;
-            
-            if (u == goal) return reconstruct_path(came_from, u, out_path, max_len);
+    // In-place updates. Raising weights, removing edges and blocking cells only make
+    // paths longer: the component labels stay sound (see components_exact) and ALT
+    // bounds stay admissible and consistent, so both are kept. Lowering weights and
+    // unblocking cells join components at once and drop the landmark tables, which
+    // rebuild_landmarks recomputes for the same landmarks. Removed edges keep their
+    // slot with an infinite weight, so setting them again costs no repacking. Every
+    // node whose outgoing edges changed goes to the change log for the Replanners.
 
-            for (const auto& edge : adj[u]) {
-                int v = edge.to;
-                float tentative = g_score[u] + edge.weight;
-                if (tentative < g_score[v]) {
-                    g_score[v] = tentative;
-                    came_from[v] = u;
-                    open_set.push({tentative + calculate_h(v, goal, heuristic_mode, h_values), v});
-                }
+    // Sets the weight of every u -> v edge; returns how many there were (0 if none).
+    int update_edge(int u, int v, float w) {
+        if (is_grid() || u < 0 || v < 0 || u >= num_nodes || v >= num_nodes) return 0;
+        finalize();
+        std::lock_guard<std::mutex> lock(build_mutex);
+        int found = 0;
+        bool lowered = false, removed = false;
+        float* wts = weights.mutable_data();
+        for (int e = offsets[u]; e < offsets[u + 1]; ++e) {
+            if (targets[e] != v) continue;
+            lowered |= w < wts[e];
+            removed |= w == INF && wts[e] < INF;
+            wts[e] = w;
+            ++found;
+        }
+        if (!found) return 0;
+        if (!rev_offsets.empty()) {
+            for (int e = rev_offsets[v]; e < rev_offsets[v + 1]; ++e) {
+                if (rev_sources[e] == u) rev_weights[e] = w;
             }
         }
-        return 0;
+        std::vector<int>().swap(strong);
+        if (lowered) {
+            merge_components({u, v});
+            drop_landmarks();
+        }
+        if (removed) components_exact = false;
+        log_change(u);
+        ++version;
+        return found;
     }
 
-    int solve(int start, int goal, int k, int adaptive, int heuristic_mode, float* h_values, int* out_path, int max_len) {
-        if (start >= (int)adj.size() || goal >= (int)adj.size()) return 0;
-
-        using PII = std::pair<float, int>;
-        std::priority_queue<PII, std::vector<PII>, std::greater<PII>> open_set;
-        
-        std::vector<float> g_score(adj.size(), INF);
-        std::vector<int> came_from(adj.size(), -1);
-        std::vector<bool> visited_pivots(adj.size(), false);
-        
-        g_score[start] = 0;
-        float h_start = calculate_h(start, goal, heuristic_mode, h_values);
-        open_set.push({h_start, start});
-        
-        std::vector<int> frontier;
-        std::vector<int> next_frontier;
-        std::vector<int> next_pivots;
-        frontier.reserve(65536);
-        next_frontier.reserve(65536);
-        next_pivots.reserve(65536);
+    // Sets the u -> v weight in place, or adds the edge (packed in before the next search).
+    void set_edge(int u, int v, float w) {
+        if (!update_edge(u, v, w)) add_edge(u, v, w);
+    }
 
-        while (!open_set.empty()) {
-            auto [current_f, current_u] = open_set.top();
-            open_set.pop();
-            
-            if (visited_pivots[current_u]) continue;
-            visited_pivots[current_u] = true;
-            
-            if (current_u == goal) return reconstruct_path(came_from, current_u, out_path, max_len);
+    int remove_edge(int u, int v) { return update_edge(u, v, INF); }
 
-            frontier.clear();
-            frontier.push_back(current_u);
-            next_pivots.clear();
-            
-            for (int step = 0; step < k; ++step) {
-                next_frontier.clear();
-                for (int u : frontier) {
-                    float h_u = (adaptive) ? calculate_h(u, goal, heuristic_mode, h_values) : 0;
-                    for (const auto& edge : adj[u]) {
-                        int v = edge.to;
-                        float w = edge.weight;
-                        float tentative = g_score[u] + w;
-                        if (tentative < g_score[v]) {
-                            g_score[v] = tentative;
-                            came_from[v] = u;
-                            if (adaptive && calculate_h(v, goal, heuristic_mode, h_values) > h_u) {
-                                next_pivots.push_back(v);
-                            } else {
-                                next_frontier.push_back(v);
-                                if (v == goal) return reconstruct_path(came_from, goal, out_path, max_len);
-                            }
-                        }
-                    }
-                }
-                if (next_frontier.empty()) {
-                    for(int n : frontier) next_pivots.push_back(n);
-                    break;
-                }
-                std::swap(frontier, next_frontier);
-                if (step == k - 1) {
-                    for(int n : frontier) next_pivots.push_back(n);
-                }
-            }
-            for (int pivot : next_pivots) {
-                open_set.push({g_score[pivot] + calculate_h(pivot, goal, heuristic_mode, h_values), pivot});
+    // Blocks or unblocks grid cell u, updating the legal moves of the cells around it.
+    bool set_walkable(int u, bool free) {
+        if (!is_grid() || u < 0 || u >= num_nodes) return false;
+        std::lock_guard<std::mutex> lock(build_mutex);
+        if ((cells[u] != 0) == free) return true;
+        cells.mutable_data()[u] = free;
+        uint8_t* legal = moves.mutable_data();
+        int x = u % width, y = u / width;
+        for (int dy = -1; dy <= 1; ++dy) {
+            for (int dx = -1; dx <= 1; ++dx) {
+                if (x + dx < 0 || y + dy < 0 || x + dx >= width || y + dy >= height) continue;
+                int v = u + dy * width + dx;
+                legal[v] = legal_moves(x + dx, y + dy);
+                log_change(v);
             }
         }
-        return 0;
+        std::vector<int>().swap(strong);
+        if (free) {
+            std::vector<int> joined{u};
+            for_each_neighbor(u, [&](int v, float) { joined.push_back(v); });
+            merge_components(joined);
+            drop_landmarks();
+        } else {
+            set_component(u, -1);
+            components_exact = false;
+        }
+        ++version;
+        return true;
     }
 
-private:
-    int reconstruct_path(const std::vector<int>& came_from, int current, int* out_path, int max_len) {
-        std::vector<int> path;
-        while (current != -1) {
-            path.push_back(current);
-            current = (current < (int)came_from.size()) ? came_from[current] : -1;
-        }
-        std::reverse(path.begin(), path.end());
-        int len = std::min((int)path.size(), max_len);
-        for (int i = 0; i < len; ++i) out_path[i] = path[i];
-        return len;
+    // Nodes whose outgoing edges changed, oldest first; change_base counts the entries
+    // dropped from the front, so a reader that fell behind it must start over.
+    std::vector<int> change_log;
+    size_t change_base = 0;
+
+    void log_change(int u) {
+        if (change_log.size() >= std::max<size_t>(1024, num_nodes)) forget_changes();
+        change_log.push_back(u);
+    }
+
+    void forget_changes() {
+        change_base += change_log.size() + 1;
+        change_log.clear();
     }
-};
 
-extern "C" {
-    GraphSolver* Solver_new(int num_nodes) { return new GraphSolver(num_nodes); }
-    void Solver_delete(GraphSolver* solver) { delete solver; }
-    void Solver_set_width(GraphSolver* solver, int w) { solver->set_width(w); }
-    void Solver_add_edge(GraphSolver* solver, int u, int v, float w) { solver->add_edge(u, v, w); }
-    int Solver_solve_classic(GraphSolver* solver, int start, int goal, int heuristic_mode, float* h_values, int* out_path, int max_len) {
-        return solver->solve_classic(start, goal, heuristic_mode, h_values, out_path, max_len);
+    // Weakly connected component of every node (-1 for blocked grid cells). Nodes in
+    // different components can never reach each other, which lets searches reject such
+    // queries without exploring anything. Grid moves are symmetric, so on grids these
+    // are also the strongly connected components. Labels are stored in 16 bits when
+    // they fit, since most maps have few components.
+    Storage<uint16_t> narrow_components;
+    Storage<int> wide_components;
+    int num_components = 0;
+
+    inline int component(int u) const {
+        if (!wide_components.empty()) return wide_components[u];
+        return narrow_components[u] == UINT16_MAX ? -1 : narrow_components[u];
+    }
+
+    std::vector<int> component_labels() const {
+        if (!wide_components.empty()) return std::vector<int>(wide_components.begin(), wide_components.end());
+        std::vector<int> labels(num_nodes);
+        for (int u = 0; u < num_nodes; ++u) labels[u] = component(u);
+        return labels;
     }
-    int Solver_solve(GraphSolver* solver, int start, int goal, int k, int adaptive, int heuristic_mode, float* h_values, int* out_path, int max_len) {
-        return solver->solve(start, goal, k, adaptive, heuristic_mode, h_values, out_path, max_len);
+
+    void build_components() {
+        // Derived structures built on demand from the old edges are stale now.
+        std::vector<int>().swap(rev_offsets);
+        std::vector<int>().swap(rev_sources);
+        std::vector<float>().swap(rev_weights);
+        landmarks.clear();
+        landmark_from.clear();
+        landmark_to.clear();
+        num_landmarks = 0;
+        label_components();
+    }
+
+    // Labels the weakly connected components; removed edges (infinite weight) connect nothing.
+    void label_components() {
+        std::vector<int>().swap(strong);
+        components_exact = true;
+        std::vector<int> parent(num_nodes);
+        for (int u = 0; u < num_nodes; ++u) parent[u] = u;
+        auto find = [&parent](int u) {
+            while (parent[u] != u) u = parent[u] = parent[parent[u]];
+            return u;
+        };
+        for (int u = 0; u < num_nodes; ++u) {
+            for_each_neighbor(u, [&](int v, float w) {
+                if (w == INF) return;
+                int a = find(u), b = find(v);
+                if (a != b) parent[std::max(a, b)] = std::min(a, b);
+            });
+        }
+        // Roots are the smallest index of their set, so they are labelled before their members.
+        std::vector<int> labels(num_nodes, -1);
+        num_components = 0;
+        for (int u = 0; u < num_nodes; ++u) {
+            if (is_grid() && !cells[u]) continue;
+            int root = find(u);
+            if (labels[root] < 0) labels[root] = num_components++;
+            labels[u] = labels[root];
+        }
+        std::vector<int>().swap(parent);
+        if (num_components < UINT16_MAX) {
+            std::vector<uint16_t> narrow(num_nodes);
+            for (int u = 0; u < num_nodes; ++u) narrow[u] = labels[u] < 0 ? UINT16_MAX : labels[u];
+            narrow_components.swap(narrow);
+            wide_components.clear();
+        } else {
+            wide_components.swap(labels);
+            narrow_components.clear();
+        }
+    }
+
+    // After in-place removals the labels are a coarser partition than the components:
+    // nodes with different labels are still disconnected, so searches may keep using
+    // them, but label queries relabel first. Relabelling replaces the arrays searches
+    // read, so it needs the graph to itself (see read_components).
+    bool components_exact = true;
+
+    void refresh_components() {
+        std::lock_guard<std::mutex> lock(build_mutex);
+        if (!components_exact) label_components();
+    }
+
+    void set_component(int u, int label) {
+        if (!wide_components.empty()) wide_components.mutable_data()[u] = label;
+        else narrow_components.mutable_data()[u] = label < 0 ? UINT16_MAX : label;
+    }
+
+    // Joins the components of `nodes` (an edge or a cell became passable), keeping labels
+    // dense. A node without a component (an unblocked cell) gets the joined label, or a new one.
+    void merge_components(const std::vector<int>& nodes) {
+        std::vector<int> labels;
+        for (int u : nodes) {
+            int label = component(u);
+            if (label >= 0 && std::find(labels.begin(), labels.end(), label) == labels.end()) labels.push_back(label);
+        }
+        if (labels.empty()) {
+            if (num_components + 1 >= UINT16_MAX && wide_components.empty()) {
+                label_components();
+                return;
+            }
+            labels.push_back(num_components++);
+        }
+        int target = *std::min_element(labels.begin(), labels.end());
+        for (int u : nodes) set_component(u, target);
+        if (labels.size() == 1) return;
+        std::vector<int> remap(num_components);
+        int next = 0;
+        for (int label = 0; label < num_components; ++label) {
+            bool joined = label != target && std::find(labels.begin(), labels.end(), label) != labels.end();
+            remap[label] = joined ? -1 : next++;
+        }
+        for (int label : labels) remap[label] = remap[target];
+        num_components = next;
+        for (int u = 0; u < num_nodes; ++u) {
+            int label = component(u);
+            if (label >= 0 && remap[label] != label) set_component(u, remap[label]);
+        }
+    }
+
+    inline bool connected(int u, int v) const {
+        if (!wide_components.empty()) return wide_components[u] == wide_components[v];
+        return narrow_components.empty() || narrow_components[u] == narrow_components[v];
+    }
+
+    // Strongly connected components (Tarjan), computed on first use.
+    const std::vector<int>& strong_components() {
+        std::lock_guard<std::mutex> lock(build_mutex);
+        if (!strong.empty() || num_nodes == 0) return strong;
+        if (is_grid()) {
+            strong = component_labels();
+            return strong;
+        }
+        std::vector<int> index(num_nodes, -1), low(num_nodes, 0), labels(num_nodes, -1);
+        std::vector<int> stack, call_stack, edge_pos(num_nodes, 0);
+        std::vector<char> on_stack(num_nodes, 0);
+        int counter = 0, label = 0;
+        for (int root = 0; root < num_nodes; ++root) {
+            if (index[root] >= 0) continue;
+            call_stack.push_back(root);
+            while (!call_stack.empty()) {
+                int u = call_stack.back();
+                if (index[u] < 0) {
+                    index[u] = low[u] = counter++;
+                    edge_pos[u] = offsets[u];
+                    stack.push_back(u);
+                    on_stack[u] = 1;
+                }
+                if (edge_pos[u] < offsets[u + 1]) {
+                    int e = edge_pos[u]++;
+                    if (weights[e] == INF) continue;
+                    int v = targets[e];
+                    if (index[v] < 0) call_stack.push_back(v);
+                    else if (on_stack[v]) low[u] = std::min(low[u], index[v]);
+                    continue;
+                }
+                call_stack.pop_back();
+                if (!call_stack.empty()) low[call_stack.back()] = std::min(low[call_stack.back()], low[u]);
+                if (low[u] == index[u]) {
+                    int v;
+                    do {
+                        v = stack.back();
+                        stack.pop_back();
+                        on_stack[v] = 0;
+                        labels[v] = label;
+                    } while (v != u);
+                    ++label;
+                }
+            }
+        }
+        strong.swap(labels);
+        return strong;
+    }
+
+    // Reversed edges in CSR form, built on first use by backward searches: the
+    // edges into v come from rev_sources[rev_offsets[v] .. rev_offsets[v + 1]).
+    // Grid moves are symmetric, so grids search their forward neighbours instead.
+    std::vector<int> rev_offsets;
+    std::vector<int> rev_sources;
+    std::vector<float> rev_weights;
+
+    void build_reverse() {
+        finalize();
+        std::lock_guard<std::mutex> lock(build_mutex);
+        if (is_grid() || !rev_offsets.empty()) return;
+        std::vector<int> counts(num_nodes + 1, 0);
+        for (int e = 0; e < offsets[num_nodes]; ++e) counts[targets[e] + 1]++;
+        for (int v = 0; v < num_nodes; ++v) counts[v + 1] += counts[v];
+        std::vector<int> sources(offsets[num_nodes]);
+        std::vector<float> rweights(offsets[num_nodes]);
+        std::vector<int> cursor(counts.begin(), counts.end() - 1);
+        for (int u = 0; u < num_nodes; ++u) {
+            for (int e = offsets[u]; e < offsets[u + 1]; ++e) {
+                int slot = cursor[targets[e]]++;
+                sources[slot] = u;
+                rweights[slot] = weights[e];
+            }
+        }
+        rev_sources.swap(sources);
+        rev_weights.swap(rweights);
+        rev_offsets.swap(counts);
+    }
+
+    // Calls f(u, w) for every incoming edge (u, v) with weight w; needs build_reverse().
+    template <class F>
+    inline void for_each_predecessor(int v, F&& f) const {
+        if (is_grid()) {
+            for_each_neighbor(v, f);
+            return;
+        }
+        for (int e = rev_offsets[v]; e < rev_offsets[v + 1]; ++e) f(rev_sources[e], rev_weights[e]);
+    }
+
+    // Dijkstra from `source` along the edges, or against them with `reverse` (which
+    // needs build_reverse()). dist[u] becomes the cost between source and u (INF if
+    // unreachable) and, if given, next[u] the neighbour u was reached through.
+    void shortest_paths(int source, bool reverse, float* dist, int* next, std::vector<PII>& heap, SearchStats& st) {
+        std::fill(dist, dist + num_nodes, INF);
+        if (next) std::fill(next, next + num_nodes, -1);
+        if (!valid_endpoints(source, source)) return;
+        heap.clear();
+        dist[source] = 0;
+        heap_push(heap, {0.0f, source});
+        ++st.heap_pushes;
+        PII top;
+        auto relax = [&](int u, float w) {
+            float d = top.first + w;
+            if (d < dist[u]) {
+                dist[u] = d;
+                if (next) next[u] = top.second;
+                heap_push(heap, {d, u});
+                ++st.heap_pushes;
+            }
+        };
+        while (!heap.empty()) {
+            top = heap_pop(heap);
+            ++st.heap_pops;
+            if (top.first > dist[top.second]) {
+                ++st.stale_pops;
+                continue;
+            }
+            ++st.nodes_expanded;
+            if (reverse) for_each_predecessor(top.second, relax);
+            else for_each_neighbor(top.second, relax);
+        }
+    }
+
+    // One Dijkstra search over the reversed edges: dist[u] is the cost from u to
+    // `goal` (INF if unreachable) and next_hop[u] the next node on a shortest path
+    // from u (-1 at the goal and at unreachable nodes).
+    bool distance_field(int goal, float* dist, int* next_hop, SearchStats* stats) {
+        StatsRecorder rec(stats);
+        build_reverse();
+        WorkspaceLease lease(workspaces, num_nodes);
+        shortest_paths(goal, true, dist, next_hop, lease->open.items, rec.counts);
+        return valid_endpoints(goal, goal);
+    }
+
+    // ALT heuristic tables for `num_landmarks` landmarks, stored node-major so one
+    // evaluation reads two short rows: landmark_from[u * L + i] = d(landmark i, u)
+    // and landmark_to[u * L + i] = d(u, landmark i).
+    Storage<int> landmarks;
+    Storage<float> landmark_from;
+    Storage<float> landmark_to;
+    int num_landmarks = 0;
+
+    // Picks `count` landmarks with the farthest strategy (each new landmark is the
+    // node farthest from those chosen so far, preferring components none of them
+    // reach), unless `chosen` lists them, and computes their distance tables. The
+    // searches run on up to `threads` workers.
+    int build_landmarks(int count, const int* chosen, int threads) {
+        finalize();
+        build_reverse();
+        if (threads <= 0) threads = (int)std::max(1u, std::thread::hardware_concurrency());
+        std::vector<int> picked;
+        std::vector<std::vector<float>> from, to;
+        if (chosen) {
+            for (int i = 0; i < count; ++i) {
+                if (valid_endpoints(chosen[i], chosen[i])) picked.push_back(chosen[i]);
+            }
+            from.resize(picked.size());
+        } else {
+            select_landmarks(count, picked, from);
+        }
+        int L = (int)picked.size();
+        to.resize(L);
+        // Forward tables of chosen landmarks, then all backward tables, in parallel.
+        std::vector<std::pair<int, bool>> jobs;
+        for (int i = 0; i < L; ++i) {
+            if (from[i].empty()) jobs.push_back({i, false});
+            jobs.push_back({i, true});
+        }
+        std::atomic<int> next_job(0);
+        ThreadPool::instance().run(std::max(1, std::min(threads, (int)jobs.size())), [&](int) {
+            std::vector<PII> heap;
+            SearchStats st;
+            for (int j = next_job++; j < (int)jobs.size(); j = next_job++) {
+                auto& table = jobs[j].second ? to[jobs[j].first] : from[jobs[j].first];
+                table.resize(num_nodes);
+                shortest_paths(picked[jobs[j].first], jobs[j].second, table.data(), nullptr, heap, st);
+            }
+        });
+
+        std::vector<float> packed_from((size_t)num_nodes * L), packed_to((size_t)num_nodes * L);
+        for (int i = 0; i < L; ++i) {
+            for (int u = 0; u < num_nodes; ++u) {
+                packed_from[(size_t)u * L + i] = from[i][u];
+                packed_to[(size_t)u * L + i] = to[i][u];
+            }
+        }
+        set_landmarks(picked.data(), L, packed_from.data(), packed_to.data());
+        return L;
+    }
+
+    // Drops the tables after an in-place update; `landmarks` keeps the ids (with
+    // num_landmarks at 0) until rebuild_landmarks recomputes them.
+    void drop_landmarks() {
+        if (!num_landmarks) return;
+        landmark_from.clear();
+        landmark_to.clear();
+        num_landmarks = 0;
+    }
+
+    // Recomputes the tables dropped by an update for the same landmarks; 0 if there were none.
+    int rebuild_landmarks(int threads) {
+        if (num_landmarks || landmarks.empty()) return 0;
+        std::vector<int> ids(landmarks.begin(), landmarks.end());
+        return build_landmarks((int)ids.size(), ids.data(), threads);
+    }
+
+    void set_landmarks(const int* ids, int count, const float* from, const float* to) {
+        std::lock_guard<std::mutex> lock(build_mutex);
+        landmarks.assign(ids, ids + count);
+        landmark_from.assign(from, from + (size_t)num_nodes * count);
+        landmark_to.assign(to, to + (size_t)num_nodes * count);
+        num_landmarks = count;
+    }
+
+    // Triangle-inequality lower bound on d(u, goal), 0 without landmarks.
+    inline float landmark_h(int u, int goal) const {
+        int L = num_landmarks;
+        const float* from_u = &landmark_from[(size_t)u * L];
+        const float* from_g = &landmark_from[(size_t)goal * L];
+        const float* to_u = &landmark_to[(size_t)u * L];
+        const float* to_g = &landmark_to[(size_t)goal * L];
+        float best = 0;
+        for (int i = 0; i < L; ++i) {
+            if (to_u[i] < INF && to_g[i] < INF) best = std::max(best, to_u[i] - to_g[i]);
+            if (from_u[i] < INF && from_g[i] < INF) best = std::max(best, from_g[i] - from_u[i]);
+        }
+        return best;
+    }
+
+    int num_edges() const {
+        if (is_grid()) {
+            int m = 0;
+            for (int u = 0; u < num_nodes; ++u) for_each_neighbor(u, [&m](int, float) { ++m; });
+            return m;
+        }
+        int m = offsets[num_nodes];
+        for (const auto& list : adj) m += (int)list.size();
+        return m;
+    }
+
+    size_t memory_bytes() const {
+        size_t bytes = sizeof(*this);
+        bytes += offsets.capacity() * sizeof(int) + targets.capacity() * sizeof(int) + weights.capacity() * sizeof(float);
+        bytes += adj.capacity() * sizeof(std::vector<Edge>);
+        for (const auto& list : adj) bytes += list.capacity() * sizeof(Edge);
+        bytes += cells.capacity() + moves.capacity();
+        bytes += narrow_components.capacity() * sizeof(uint16_t);
+        bytes += (wide_components.capacity() + strong.capacity()) * sizeof(int);
+        bytes += (rev_offsets.capacity() + rev_sources.capacity()) * sizeof(int) + rev_weights.capacity() * sizeof(float);
+        bytes += landmarks.capacity() * sizeof(int) + (landmark_from.capacity() + landmark_to.capacity()) * sizeof(float);
+        bytes += change_log.capacity() * sizeof(int);
+        return bytes;
+    }
+
+    inline float calculate_h(int u, int goal, int mode, float* h_array) {
+        if (mode == 0) return 0;
+        if (mode == 2 && h_array) return h_array[u];
+        if (mode == 5) return num_landmarks ? landmark_h(u, goal) : 0;
+        
+        // Native Grid Logic
+        if (width <= 0) return 0;
+        int x1 = u % width;
+        int y1 = u / width;
+        int x2 = goal % width;
+        int y2 = goal / width;
+        float dx = std::abs(x1 - x2);
+        float dy = std::abs(y1 - y2);
+
+        if (mode == 1) return dx + dy; // Manhattan
+        if (mode == 3) return (dx + dy) + (SQRT2 - 2.0f) * std::min(dx, dy); // Octile
+        return 0;
+    }
+
+    // Replaces the mode 4 callback; memoized values of the previous one are dropped.
+    void set_heuristic(HeuristicCallback callback, void* context) {
+        h_callback = callback;
+        h_context = context;
+        ++h_epoch;
+    }
+
+    // A budgeted solve (classic) or solve_classic query; nothing is searched before resume_search.
+    BoundedSearch* begin_search(int start, int goal, int k, int adaptive, int classic, int heuristic_mode,
+                                float* h_values) {
+        auto* search = new BoundedSearch();
+        search->start = start;
+        search->goal = goal;
+        search->k = k;
+        search->adaptive = adaptive;
+        search->classic = classic != 0;
+        search->heuristic_mode = heuristic_mode;
+        search->h_values = h_values;
+        return search;
+    }
+
+    void end_search(BoundedSearch* search) {
+        if (search->ws) workspaces.release(std::move(search->ws));
+        delete search;
+    }
+
+    // Runs `search` until it ends or a limit (negative: none) of this call is reached, and
+    // returns its SearchStatus. `path` gets the path, or on a limit the path to the queued
+    // node with the lowest h. A search seeded on another graph version starts over.
+    int resume_search(BoundedSearch& search, long long max_expansions, long long deadline_us, std::vector<int>& path,
+                      SearchStats* stats) {
+        switch (search.open_list < 0 ? (int)open_list : search.open_list) {
+            case OPEN_QUATERNARY: return resume_search<QuaternaryHeap>(search, max_expansions, deadline_us, path, stats);
+            case OPEN_RADIX: return resume_search<RadixHeap>(search, max_expansions, deadline_us, path, stats);
+            default: return resume_search<BinaryHeap>(search, max_expansions, deadline_us, path, stats);
+        }
+    }
+
+    // Runs n independent queries over the shared read-only graph on `threads` workers and
+    // packs the paths back to back: query i owns [out_offsets[i], out_offsets[i + 1]),
+    // an empty range meaning no path. Batch search is used unless `classic` is set.
+    // With `stats` set, the counters of all queries are summed into it (time_ns is wall time).
+    std::vector<int>* solve_many(const int* starts, const int* goals, int n, int k, int adaptive,
+                                 int heuristic_mode, float* h_values, int classic, int threads, int* out_offsets,
+                                 SearchStats* stats) {
+        StatsRecorder rec(stats);
+        std::mutex stats_mutex;
+        finalize();
+        if (threads <= 0) threads = (int)std::max(1u, std::thread::hardware_concurrency());
+        int workers = std::max(1, std::min(threads, n));
+
+        std::vector<std::vector<int>> worker_paths(workers);
+        std::vector<std::pair<int, size_t>> spans(n);  // (worker, begin) for each query
+        std::vector<int> lengths(n, 0);
+        std::atomic<int> next_query(0);
+        ThreadPool::instance().run(workers, [&](int w) {
+            std::vector<int> path;
+            auto& packed = worker_paths[w];
+            SearchStats query_stats, worker_stats;
+            SearchStats* query_stats_ptr = stats ? &query_stats : nullptr;
+            for (int i = next_query++; i < n; i = next_query++) {
+                bool found = classic
+                    ? search_classic(starts[i], goals[i], heuristic_mode, h_values, path, query_stats_ptr)
+                    : search_batch(starts[i], goals[i], k, adaptive, heuristic_mode, h_values, path, query_stats_ptr);
+                if (stats) worker_stats.add(query_stats);
+                spans[i] = {w, packed.size()};
+                if (!found) continue;
+                lengths[i] = (int)path.size();
+                packed.insert(packed.end(), path.begin(), path.end());
+            }
+            if (stats) {
+                std::lock_guard<std::mutex> lock(stats_mutex);
+                rec.counts.add(worker_stats);
+            }
+        });
+
+        out_offsets[0] = 0;
+        for (int i = 0; i < n; ++i) out_offsets[i + 1] = out_offsets[i] + lengths[i];
+        auto* result = new std::vector<int>(out_offsets[n]);
+        for (int i = 0; i < n; ++i) {
+            const auto& packed = worker_paths[spans[i].first];
+            std::copy(packed.begin() + spans[i].second, packed.begin() + spans[i].second + lengths[i],
+                      result->begin() + out_offsets[i]);
+        }
+        return result;
+    }
+
+    bool search_classic(int start, int goal, int heuristic_mode, float* h_values, std::vector<int>& path,
+                        SearchStats* stats = nullptr) {
+        switch (open_list) {
+            case OPEN_QUATERNARY: return search_classic<QuaternaryHeap>(start, goal, heuristic_mode, h_values, path, stats);
+            case OPEN_RADIX: return search_classic<RadixHeap>(start, goal, heuristic_mode, h_values, path, stats);
+            default: return search_classic<BinaryHeap>(start, goal, heuristic_mode, h_values, path, stats);
+        }
+    }
+
+    bool search_batch(int start, int goal, int k, int adaptive, int heuristic_mode, float* h_values,
+                      std::vector<int>& path, SearchStats* stats = nullptr) {
+        switch (open_list) {
+            case OPEN_QUATERNARY:
+                return search_batch<QuaternaryHeap>(start, goal, k, adaptive, heuristic_mode, h_values, path, stats);
+            case OPEN_RADIX:
+                return search_batch<RadixHeap>(start, goal, k, adaptive, heuristic_mode, h_values, path, stats);
+            default:
+                return search_batch<BinaryHeap>(start, goal, k, adaptive, heuristic_mode, h_values, path, stats);
+        }
+    }
+
+    bool search_jps(int start, int goal, bool waypoints, std::vector<int>& path, SearchStats* stats = nullptr) {
+        switch (open_list) {
+            case OPEN_QUATERNARY: return search_jps<QuaternaryHeap>(start, goal, waypoints, path, stats);
+            case OPEN_RADIX: return search_jps<RadixHeap>(start, goal, waypoints, path, stats);
+            default: return search_jps<BinaryHeap>(start, goal, waypoints, path, stats);
+        }
+    }
+
+    bool search_between(const int* sources, const float* source_costs, int n_sources, const int* targets,
+                        const float* target_costs, int n_targets, int h_goal, int heuristic_mode, float* h_values,
+                        std::vector<int>& path, SearchStats* stats = nullptr) {
+        switch (open_list) {
+            case OPEN_QUATERNARY:
+                return search_between<QuaternaryHeap>(sources, source_costs, n_sources, targets, target_costs, n_targets,
+                                                      h_goal, heuristic_mode, h_values, path, stats);
+            case OPEN_RADIX:
+                return search_between<RadixHeap>(sources, source_costs, n_sources, targets, target_costs, n_targets,
+                                                 h_goal, heuristic_mode, h_values, path, stats);
+            default:
+                return search_between<BinaryHeap>(sources, source_costs, n_sources, targets, target_costs, n_targets,
+                                                  h_goal, heuristic_mode, h_values, path, stats);
+        }
+    }
+
+    bool search_bounded(int start, int goal, int k, int adaptive, float weight, bool focal, int heuristic_mode,
+                        float* h_values, std::vector<int>& path, SearchStats* stats = nullptr) {
+        switch (open_list) {
+            case OPEN_QUATERNARY:
+                return search_bounded<QuaternaryHeap>(start, goal, k, adaptive, weight, focal, heuristic_mode, h_values,
+                                                      path, stats);
+            case OPEN_RADIX:
+                return search_bounded<RadixHeap>(start, goal, k, adaptive, weight, focal, heuristic_mode, h_values,
+                                                 path, stats);
+            default:
+                return search_bounded<BinaryHeap>(start, goal, k, adaptive, weight, focal, heuristic_mode, h_values,
+                                                  path, stats);
+        }
+    }
+
+    bool search_bidirectional(int start, int goal, int k, int heuristic_mode, float* h_values, std::vector<int>& path,
+                              SearchStats* stats = nullptr) {
+        switch (open_list) {
+            case OPEN_QUATERNARY:
+                return search_bidirectional<QuaternaryHeap>(start, goal, k, heuristic_mode, h_values, path, stats);
+            case OPEN_RADIX:
+                return search_bidirectional<RadixHeap>(start, goal, k, heuristic_mode, h_values, path, stats);
+            default:
+                return search_bidirectional<BinaryHeap>(start, goal, k, heuristic_mode, h_values, path, stats);
+        }
+    }
+
+    template <class Open>
+    bool search_classic(int start, int goal, int heuristic_mode, float* h_values, std::vector<int>& path,
+                        SearchStats* stats) {
+        StatsRecorder rec(stats);
+        SearchStats& st = rec.counts;
+        path.clear();
+        if (!valid_endpoints(start, goal)) return false;
+        finalize();
+        if (!connected(start, goal)) return false;
+
+        WorkspaceLease lease(workspaces, num_nodes);
+        seed_search<Open>(*lease, start, goal, heuristic_mode, h_values, st);
+        return expand_classic<Open>(*lease, goal, heuristic_mode, h_values, path, st, nullptr) == SEARCH_FOUND;
+    }
+
+    // Resets `ws` to a search from `start`: only the start is open.
+    template <class Open>
+    float seed_search(SearchWorkspace& ws, int start, int goal, int& heuristic_mode, float* h_values, SearchStats& st) {
+        Open& open_set = ws.open_list<Open>();
+        open_set.reset(num_nodes);
+        if (heuristic_mode == 4) bind_heuristic(ws, goal, heuristic_mode);
+        ++st.heuristic_calls;
+        float h_start = heuristic_mode == 4 ? callback_h(ws, start, goal, st)
+                                            : calculate_h(start, goal, heuristic_mode, h_values);
+        ws.relax(start, 0, -1);
+        open_set.push(h_start, start);
+        ++st.heap_pushes;
+        return h_start;
+    }
+
+    // The A* loop of search_classic. With `bounded`, stops before a pop once its budget is
+    // spent and tracks the queued node closest to the goal.
+    template <class Open>
+    int expand_classic(SearchWorkspace& ws, int goal, int heuristic_mode, float* h_values, std::vector<int>& path,
+                       SearchStats& st, BoundedSearch* bounded) {
+        Open& open_set = ws.open_list<Open>();
+        auto h = [&](int u) {
+            ++st.heuristic_calls;
+            if (heuristic_mode == 4) return callback_h(ws, u, goal, st);
+            return calculate_h(u, goal, heuristic_mode, h_values);
+        };
+
+        while (!open_set.empty()) {
+            if (bounded && bounded->exhausted(st)) return bounded->status;
+            int u = open_set.pop();
+            ++st.heap_pops;
+            
+            if (ws.is_closed(u)) {
+                ++st.stale_pops;
+                continue;
+            }
+            ws.close(u);
+            
+            if (u == goal) {
+                reconstruct_path(ws, u, path);
+                return SEARCH_FOUND;
+            }
+
+            ++st.nodes_expanded;
+            float g_u = ws.g(u);
+            for_each_neighbor(u, [&](int v, float w) {
+                float tentative = g_u + w;
+                if (tentative < ws.g(v)) {
+                    ws.relax(v, tentative, u);
+                    float h_v = h(v);
+                    open_set.push(tentative + h_v, v);
+                    ++st.heap_pushes;
+                    if (bounded) bounded->note(v, h_v);
+                }
+            });
+        }
+        return SEARCH_NO_PATH;
+    }
+
+    template <class Open>
+    bool search_batch(int start, int goal, int k, int adaptive, int heuristic_mode, float* h_values,
+                      std::vector<int>& path, SearchStats* stats) {
+        StatsRecorder rec(stats);
+        SearchStats& st = rec.counts;
+        path.clear();
+        if (!valid_endpoints(start, goal)) return false;
+        finalize();
+        if (!connected(start, goal)) return false;
+
+        WorkspaceLease lease(workspaces, num_nodes);
+        seed_search<Open>(*lease, start, goal, heuristic_mode, h_values, st);
+        return expand_batch<Open>(*lease, goal, k, adaptive, heuristic_mode, h_values, path, st, nullptr) == SEARCH_FOUND;
+    }
+
+    // The loop of search_batch. With `bounded`, a batch whose budget runs out ends early,
+    // its frontier queued as pivots, so the search can resume from the open list alone.
+    template <class Open>
+    int expand_batch(SearchWorkspace& ws, int goal, int k, int adaptive, int heuristic_mode, float* h_values,
+                     std::vector<int>& path, SearchStats& st, BoundedSearch* bounded) {
+        Open& open_set = ws.open_list<Open>();
+        auto& frontier = ws.frontier;
+        auto& next_frontier = ws.next_frontier;
+        auto& next_pivots = ws.next_pivots;
+        auto h = [&](int u) {
+            ++st.heuristic_calls;
+            if (heuristic_mode == 4) return callback_h(ws, u, goal, st);
+            return calculate_h(u, goal, heuristic_mode, h_values);
+        };
+
+        while (!open_set.empty()) {
+            if (bounded && bounded->exhausted(st)) return bounded->status;
+            int current_u = open_set.pop();
+            ++st.heap_pops;
+            
+            if (ws.is_closed(current_u)) {
+                ++st.stale_pops;
+                continue;
+            }
+            ws.close(current_u);
+            
+            if (current_u == goal) {
+                reconstruct_path(ws, current_u, path);
+                return SEARCH_FOUND;
+            }
+
+            frontier.clear();
+            frontier.push_back(current_u);
+            next_pivots.clear();
+            
+            for (int step = 0; step < k; ++step) {
+                if (step && bounded && bounded->exhausted(st)) {
+                    for (int n : frontier) next_pivots.push_back(n);
+                    break;
+                }
+                ++st.batch_steps;
+                next_frontier.clear();
+                for (int u : frontier) {
+                    ++st.nodes_expanded;
+                    float h_u = (adaptive) ? h(u) : 0;
+                    float g_u = ws.g(u);
+                    for_each_neighbor(u, [&](int v, float w) {
+                        float tentative = g_u + w;
+                        if (tentative < ws.g(v)) {
+                            ws.relax(v, tentative, u);
+                            if (adaptive && h(v) > h_u) {
+                                next_pivots.push_back(v);
+                            } else if (v == goal) {
+                                // Only accept the goal once it is popped from the heap, a later
+                                // batch step may still reach it more cheaply.
+                                next_pivots.push_back(v);
+                            } else {
+                                next_frontier.push_back(v);
+                            }
+                        }
+                    });
+                }
+                if (next_frontier.empty()) {
+                    for(int n : frontier) next_pivots.push_back(n);
+                    break;
+                }
+                std::swap(frontier, next_frontier);
+                if (step == k - 1) {
+                    for(int n : frontier) next_pivots.push_back(n);
+                }
+            }
+            for (int pivot : next_pivots) {
+                float h_pivot = h(pivot);
+                open_set.push(ws.g(pivot) + h_pivot, pivot);
+                if (bounded) bounded->note(pivot, h_pivot);
+            }
+            st.heap_pushes += next_pivots.size();
+            st.pivots_pushed += next_pivots.size();
+        }
+        return SEARCH_NO_PATH;
+    }
+
+    // Bounded-suboptimal search: the path costs at most `weight` times the optimal one when
+    // the heuristic is admissible. Where the bound needs it, closed nodes reached more
+    // cheaply are reopened, which keeps a node of an optimal path queued with its optimal g
+    // until the search ends.
+    template <class Open>
+    bool search_bounded(int start, int goal, int k, int adaptive, float weight, bool focal, int heuristic_mode,
+                        float* h_values, std::vector<int>& path, SearchStats* stats) {
+        StatsRecorder rec(stats);
+        SearchStats& st = rec.counts;
+        path.clear();
+        if (!valid_endpoints(start, goal)) return false;
+        finalize();
+        if (!connected(start, goal)) return false;
+
+        WorkspaceLease lease(workspaces, num_nodes);
+        float h_start = seed_search<Open>(*lease, start, goal, heuristic_mode, h_values, st);
+        if (focal) return expand_focal<Open>(*lease, start, h_start, goal, k, weight, heuristic_mode, h_values, path, st);
+        return expand_weighted<Open>(*lease, goal, k, adaptive, weight, heuristic_mode, h_values, path, st);
+    }
+
+    // Weighted A*: the batch loop of expand_batch with pivots ordered by g + weight * h.
+    template <class Open>
+    bool expand_weighted(SearchWorkspace& ws, int goal, int k, int adaptive, float weight, int heuristic_mode,
+                         float* h_values, std::vector<int>& path, SearchStats& st) {
+        Open& open_set = ws.open_list<Open>();
+        auto& frontier = ws.frontier;
+        auto& next_frontier = ws.next_frontier;
+        auto& next_pivots = ws.next_pivots;
+        auto h = [&](int u) {
+            ++st.heuristic_calls;
+            if (heuristic_mode == 4) return callback_h(ws, u, goal, st);
+            return calculate_h(u, goal, heuristic_mode, h_values);
+        };
+        // The built-in heuristics are consistent, for which weighted A* keeps its bound without
+        // reopening; h_values and callbacks may be admissible only.
+        bool reopen = heuristic_mode == 2 || heuristic_mode == 4;
+
+        while (!open_set.empty()) {
+            int current_u = open_set.pop();
+            ++st.heap_pops;
+
+            if (ws.is_closed(current_u)) {
+                ++st.stale_pops;
+                continue;
+            }
+            ws.close(current_u);
+
+            if (current_u == goal) {
+                reconstruct_path(ws, current_u, path);
+                return true;
+            }
+
+            frontier.clear();
+            frontier.push_back(current_u);
+            next_pivots.clear();
+
+            for (int step = 0; step < k; ++step) {
+                ++st.batch_steps;
+                next_frontier.clear();
+                for (int u : frontier) {
+                    ++st.nodes_expanded;
+                    float h_u = (adaptive) ? h(u) : 0;
+                    float g_u = ws.g(u);
+                    for_each_neighbor(u, [&](int v, float w) {
+                        float tentative = g_u + w;
+                        if (tentative < ws.g(v)) {
+                            if (reopen && ws.is_closed(v)) ws.reopen(v);
+                            ws.relax(v, tentative, u);
+                            if ((adaptive && h(v) > h_u) || v == goal) {
+                                next_pivots.push_back(v);
+                            } else {
+                                next_frontier.push_back(v);
+                            }
+                        }
+                    });
+                }
+                if (next_frontier.empty()) {
+                    for (int n : frontier) next_pivots.push_back(n);
+                    break;
+                }
+                std::swap(frontier, next_frontier);
+                if (step == k - 1) {
+                    for (int n : frontier) next_pivots.push_back(n);
+                }
+            }
+            for (int pivot : next_pivots) open_set.push(ws.g(pivot) + weight * h(pivot), pivot);
+            st.heap_pushes += next_pivots.size();
+            st.pivots_pushed += next_pivots.size();
+        }
+        return false;
+    }
+
+    // Focal search (Pearl & Kim's A*_eps) with batch dives. Nodes whose g + h is within
+    // `weight` times the smallest queued one, a lower bound on the optimal cost, form the
+    // focal list, ordered by g + weight * h (ordering it by h alone dives greedily into nodes
+    // that are reopened over and over). As g + weight * h <= weight * (g + h), the node with
+    // the smallest g + weight * h is always in the focal list, so the open list serves as
+    // the focal list and a second heap in g + h order tracks the bound. Each node taken from
+    // it starts a dive of up to k expansions, each into the best child within the bound, the
+    // siblings being queued. The goal is accepted as soon as it is reached within the bound.
+    template <class Open>
+    bool expand_focal(SearchWorkspace& ws, int start, float h_start, int goal, int k, float weight,
+                      int heuristic_mode, float* h_values, std::vector<int>& path, SearchStats& st) {
+        Open& open_set = ws.open_list<Open>();
+        BinaryHeap& lower = ws.lower;
+        lower.reset(num_nodes);
+        auto h = [&](int u) {
+            ++st.heuristic_calls;
+            if (heuristic_mode == 4) return callback_h(ws, u, goal, st);
+            return calculate_h(u, goal, heuristic_mode, h_values);
+        };
+        auto queue = [&](int v, float h_v) {
+            open_set.push(ws.g(v) + weight * h_v, v);
+            lower.push(ws.g(v) + h_v, v);
+            st.heap_pushes += 2;
+        };
+        lower.push(h_start, start);
+        ++st.heap_pushes;
+        float lower_bound = 0;
+
+        while (!open_set.empty()) {
+            int u = open_set.pop();
+            ++st.heap_pops;
+            if (ws.is_closed(u)) {
+                ++st.stale_pops;
+                continue;
+            }
+            if (u == goal) {
+                ws.close(u);
+                reconstruct_path(ws, u, path);
+                return true;
+            }
+            // Never empties: u itself is still queued there.
+            while (!lower.empty() && ws.is_closed(lower.top().second)) {
+                lower.pop();
+                ++st.heap_pops;
+                ++st.stale_pops;
+            }
+            if (!lower.empty()) lower_bound = std::max(lower_bound, lower.top().first);
+            float bound = weight * lower_bound;
+
+            float dive_h = 0;
+            for (int step = 0; step < k && u >= 0; ++step) {
+                ++st.batch_steps;
+                ++st.nodes_expanded;
+                ws.close(u);
+                float g_u = ws.g(u);
+                int dive = -1;
+                float dive_key = INF;
+                bool reached = false;
+                for_each_neighbor(u, [&](int v, float w) {
+                    float tentative = g_u + w;
+                    if (tentative >= ws.g(v)) return;
+                    if (ws.is_closed(v)) ws.reopen(v);
+                    ws.relax(v, tentative, u);
+                    if (v == goal && tentative <= bound) {
+                        reached = true;
+                        return;
+                    }
+                    float h_v = h(v);
+                    if (v != goal && tentative + h_v <= bound && tentative + weight * h_v < dive_key) {
+                        if (dive >= 0) queue(dive, dive_h);
+                        dive = v;
+                        dive_h = h_v;
+                        dive_key = tentative + weight * h_v;
+                    } else {
+                        queue(v, h_v);
+                    }
+                });
+                if (reached) {
+                    reconstruct_path(ws, goal, path);
+                    return true;
+                }
+                u = dive;
+            }
+            if (u >= 0) queue(u, dive_h);
+        }
+        return false;
+    }
+
+    template <class Open>
+    int resume_search(BoundedSearch& search, long long max_expansions, long long deadline_us, std::vector<int>& path,
+                      SearchStats* stats) {
+        StatsRecorder rec(stats);
+        SearchStats& st = rec.counts;
+        path.clear();
+        search.set_limits(max_expansions, deadline_us);
+        finalize();
+        if (search.open_list < 0 || search.version != version) {
+            search.open_list = open_list;
+            search.version = version;
+            search.status = SEARCH_NO_PATH;
+            if (!valid_endpoints(search.start, search.goal) || !connected(search.start, search.goal)) return SEARCH_NO_PATH;
+            if (!search.ws) search.ws = workspaces.acquire();
+            search.ws->begin(num_nodes);
+            search.best = search.start;
+            search.best_h = seed_search<Open>(*search.ws, search.start, search.goal, search.heuristic_mode,
+                                              search.h_values, st);
+            search.status = -1;
+        }
+        if (search.status == SEARCH_FOUND) reconstruct_path(*search.ws, search.goal, path);
+        if (search.status == SEARCH_FOUND || search.status == SEARCH_NO_PATH) return search.status;
+
+        search.status = -1;
+        SearchWorkspace& ws = *search.ws;
+        int status = search.classic
+            ? expand_classic<Open>(ws, search.goal, search.heuristic_mode, search.h_values, path, st, &search)
+            : expand_batch<Open>(ws, search.goal, search.k, search.adaptive, search.heuristic_mode, search.h_values,
+                                 path, st, &search);
+        search.status = status;
+        if (status == SEARCH_MAX_EXPANSIONS || status == SEARCH_DEADLINE) reconstruct_path(ws, search.best, path);
+        return status;
+    }
+
+    // Jump Point Search (Harabor & Grastien) with the octile heuristic, for 8-connected grids
+    // without corner cutting. Only jump points enter the open list: from each one, the search
+    // scans straight and diagonal lines in the directions that the parent direction cannot
+    // reach as cheaply by another route, and stops where a line needs a decision. `path` gets
+    // the jump points when `waypoints` is set (consecutive ones lie on a straight or diagonal
+    // line), every cell otherwise.
+    template <class Open>
+    bool search_jps(int start, int goal, bool waypoints, std::vector<int>& path, SearchStats* stats) {
+        StatsRecorder rec(stats);
+        SearchStats& st = rec.counts;
+        path.clear();
+        if (!supports_jps() || !valid_endpoints(start, goal)) return false;
+        if (!connected(start, goal)) return false;
+
+        WorkspaceLease lease(workspaces, num_nodes);
+        SearchWorkspace& ws = *lease;
+        Open& open_set = ws.open_list<Open>();
+        open_set.reset(num_nodes);
+        auto h = [&](int u) {
+            ++st.heuristic_calls;
+            return calculate_h(u, goal, 3, nullptr);
+        };
+
+        ws.relax(start, 0, -1);
+        open_set.push(h(start), start);
+        ++st.heap_pushes;
+        while (!open_set.empty()) {
+            int u = open_set.pop();
+            ++st.heap_pops;
+            if (ws.is_closed(u)) {
+                ++st.stale_pops;
+                continue;
+            }
+            ws.close(u);
+            if (u == goal) {
+                reconstruct_path(ws, u, path);
+                if (!waypoints) fill_segments(path);
+                return true;
+            }
+
+            ++st.nodes_expanded;
+            int x = u % width, y = u / width;
+            float g_u = ws.g(u);
+            for_each_jump_direction(u, ws.parent(u), [&](int dx, int dy) {
+                int v = jump(x + dx, y + dy, dx, dy, goal);
+                if (v < 0) return;
+                float tentative = g_u + calculate_h(u, v, 3, nullptr);
+                if (tentative < ws.g(v)) {
+                    ws.relax(v, tentative, u);
+                    open_set.push(tentative + h(v), v);
+                    ++st.heap_pushes;
+                }
+            });
+        }
+        return false;
+    }
+
+    // A* from several sources, each starting at its own cost, to the cheapest of several
+    // targets, each adding its own cost at the end. The heuristic estimates the cost to
+    // `h_goal` and must bound source -> target -> (target cost) paths from below, as for a
+    // goal the targets lead to. The path runs from the chosen source to the chosen target.
+    template <class Open>
+    bool search_between(const int* sources, const float* source_costs, int n_sources, const int* targets,
+                        const float* target_costs, int n_targets, int h_goal, int heuristic_mode, float* h_values,
+                        std::vector<int>& path, SearchStats* stats) {
+        StatsRecorder rec(stats);
+        SearchStats& st = rec.counts;
+        path.clear();
+        if (h_goal < 0 || h_goal >= num_nodes) return false;
+        finalize();
+
+        WorkspaceLease lease(workspaces, num_nodes);
+        SearchWorkspace& ws = *lease;
+        Open& open_set = ws.open_list<Open>();
+        open_set.reset(num_nodes);
+        if (heuristic_mode == 4) bind_heuristic(ws, h_goal, heuristic_mode);
+        auto h = [&](int u) {
+            ++st.heuristic_calls;
+            if (heuristic_mode == 4) return callback_h(ws, u, h_goal, st);
+            return calculate_h(u, h_goal, heuristic_mode, h_values);
+        };
+        auto target_cost = [&](int u) {
+            float cost = INF;
+            for (int i = 0; i < n_targets; ++i) {
+                if (targets[i] == u) cost = std::min(cost, target_costs[i]);
+            }
+            return cost;
+        };
+
+        for (int i = 0; i < n_sources; ++i) {
+            int u = sources[i];
+            if (u < 0 || u >= num_nodes || !(source_costs[i] < ws.g(u))) continue;
+            ws.relax(u, source_costs[i], -1);
+            open_set.push(source_costs[i] + h(u), u);
+            ++st.heap_pushes;
+        }
+        float best = INF;
+        int end = -1;
+        while (!open_set.empty()) {
+            float f = open_set.top().first;
+            if (f >= best) break;
+            int u = open_set.pop();
+            ++st.heap_pops;
+            if (ws.is_closed(u)) {
+                ++st.stale_pops;
+                continue;
+            }
+            ws.close(u);
+            float through = ws.g(u) + target_cost(u);
+            if (through < best) {
+                best = through;
+                end = u;
+            }
+
+            ++st.nodes_expanded;
+            float g_u = ws.g(u);
+            for_each_neighbor(u, [&](int v, float w) {
+                float tentative = g_u + w;
+                if (tentative < ws.g(v)) {
+                    ws.relax(v, tentative, u);
+                    open_set.push(tentative + h(v), v);
+                    ++st.heap_pushes;
+                }
+            });
+        }
+        return end >= 0 && reconstruct_path(ws, end, path);
+    }
+
+    // Grid searches confined to the cells of box [x0, x1) x [y0, y1), for hierarchical layers
+    // built on top of the grid. box_distances fills out[i * n_targets + j] with the cost from
+    // sources[i] to targets[j] (INF if unreachable inside the box).
+    void box_distances(const int* box, const int* sources, int n_sources, const int* targets, int n_targets, float* out,
+                       SearchStats* stats) {
+        StatsRecorder rec(stats);
+        std::fill(out, out + (size_t)n_sources * n_targets, INF);
+        if (!is_grid()) return;
+        WorkspaceLease lease(workspaces, num_nodes);
+        for (int i = 0; i < n_sources; ++i) {
+            if (i) lease->begin(num_nodes);
+            if (!box_search(*lease, box, sources[i], targets, n_targets, rec.counts)) continue;
+            for (int j = 0; j < n_targets; ++j) out[(size_t)i * n_targets + j] = lease->g(targets[j]);
+        }
+    }
+
+    bool box_path(const int* box, int start, int goal, std::vector<int>& path, SearchStats* stats) {
+        StatsRecorder rec(stats);
+        path.clear();
+        if (!is_grid()) return false;
+        WorkspaceLease lease(workspaces, num_nodes);
+        if (!box_search(*lease, box, start, &goal, 1, rec.counts) || !lease->is_closed(goal)) return false;
+        return reconstruct_path(*lease, goal, path);
+    }
+
+    // Batch A* from both ends at once: the forward search runs towards the goal along the
+    // edges, the backward one towards the start against them, each a batch search of its
+    // own. Both use the average potential p(v) = (h(v, goal) - h(start, v)) / 2, which is
+    // consistent in both directions when h is: the forward side keys nodes by
+    // g + p(v) - p(start) and the backward side by g - p(v) + p(goal), both non-negative.
+    // Every relaxation of a node the other side has reached offers a candidate path (cost
+    // `best` through `meet`), and the search stops once the two heap tops add up to
+    // `best` + p(goal) - p(start): with k=1 this is exact bidirectional A* (bidirectional
+    // Dijkstra without a heuristic). Nodes the other side has closed are not expanded again,
+    // and nodes whose key alone reaches that bound are not queued. h(start, v) is 0 for
+    // goal-specific heuristics (h arrays, callbacks).
+    template <class Open>
+    bool search_bidirectional(int start, int goal, int k, int heuristic_mode, float* h_values,
+                              std::vector<int>& path, SearchStats* stats) {
+        StatsRecorder rec(stats);
+        SearchStats& st = rec.counts;
+        path.clear();
+        if (!valid_endpoints(start, goal)) return false;
+        finalize();
+        if (!connected(start, goal)) return false;
+        if (start == goal) {
+            path.push_back(start);
+            return true;
+        }
+        build_reverse();
+
+        WorkspaceLease forward_lease(workspaces, num_nodes), backward_lease(workspaces, num_nodes);
+        SearchWorkspace& fw = *forward_lease;
+        SearchWorkspace& bw = *backward_lease;
+        if (heuristic_mode == 4) bind_heuristic(fw, goal, heuristic_mode);
+        int backward_mode = (heuristic_mode == 2 || heuristic_mode == 4) ? 0 : heuristic_mode;
+        auto potential = [&](int u) {
+            ++st.heuristic_calls;
+            float to_goal = heuristic_mode == 4 ? callback_h(fw, u, goal, st) : calculate_h(u, goal, heuristic_mode, h_values);
+            return 0.5f * (to_goal - calculate_h(start, u, backward_mode, nullptr));
+        };
+        float p_start = potential(start), p_goal = potential(goal), shift = p_goal - p_start;
+
+        float best = INF;
+        int meet = -1;
+        // One batch step of a side, whose keys are g + sign * p(v) + offset.
+        auto expand = [&](SearchWorkspace& ws, const SearchWorkspace& other, bool reverse, float sign, float offset) {
+            Open& open_set = ws.open_list<Open>();
+            int pivot = open_set.pop();
+            ++st.heap_pops;
+            ws.close(pivot);
+            auto& frontier = ws.frontier;
+            auto& next_frontier = ws.next_frontier;
+            frontier.assign(1, pivot);
+            for (int step = 0; step < k && !frontier.empty(); ++step) {
+                ++st.batch_steps;
+                next_frontier.clear();
+                for (int u : frontier) {
+                    ++st.nodes_expanded;
+                    float g_u = ws.g(u);
+                    auto relax = [&](int v, float w) {
+                        float tentative = g_u + w;
+                        if (tentative >= ws.g(v)) return;
+                        ws.relax(v, tentative, u);
+                        float through = tentative + other.g(v);
+                        if (through < best) {
+                            best = through;
+                            meet = v;
+                        }
+                        if (!other.is_closed(v)) next_frontier.push_back(v);
+                    };
+                    if (reverse) for_each_predecessor(u, relax);
+                    else for_each_neighbor(u, relax);
+                }
+                std::swap(frontier, next_frontier);
+            }
+            for (int v : frontier) {
+                float key = ws.g(v) + sign * potential(v) + offset;
+                if (key >= best + shift) continue;
+                open_set.push(key, v);
+                ++st.heap_pushes;
+                ++st.pivots_pushed;
+            }
+        };
+        // Smallest key of a side's open list after dropping entries of closed nodes, INF if empty.
+        auto top_key = [&](SearchWorkspace& ws) {
+            Open& open_set = ws.open_list<Open>();
+            while (!open_set.empty() && ws.is_closed(open_set.top().second)) {
+                open_set.pop();
+                ++st.heap_pops;
+                ++st.stale_pops;
+            }
+            return open_set.empty() ? INF : open_set.top().first;
+        };
+
+        fw.open_list<Open>().reset(num_nodes);
+        bw.open_list<Open>().reset(num_nodes);
+        fw.relax(start, 0, -1);
+        bw.relax(goal, 0, -1);
+        fw.open_list<Open>().push(0, start);
+        bw.open_list<Open>().push(0, goal);
+        st.heap_pushes += 2;
+
+        while (true) {
+            float forward_top = top_key(fw), backward_top = top_key(bw);
+            if (forward_top + backward_top >= best + shift) break;
+            if (forward_top <= backward_top) expand(fw, bw, false, 1.0f, -p_start);
+            else expand(bw, fw, true, -1.0f, p_goal);
+        }
+        if (meet < 0) return false;
+        for (int u = meet; u != -1; u = fw.parent(u)) path.push_back(u);
+        std::reverse(path.begin(), path.end());
+        for (int u = bw.parent(meet); u != -1; u = bw.parent(u)) path.push_back(u);
+        return true;
+    }
+
+    int workspace_count() { return workspaces.size(); }
+
+    size_t workspace_bytes() { return workspaces.memory_bytes(); }
+
+    void release_workspaces() { workspaces.clear(); }
+
+private:
+    std::mutex build_mutex;
+    std::vector<int> strong;
+
+    bool valid_endpoints(int start, int goal) const {
+        if (start < 0 || goal < 0 || start >= num_nodes || goal >= num_nodes) return false;
+        return !is_grid() || (cells[start] && cells[goal]);
+    }
+
+    std::atomic<bool> pending{false};
+
+    // Calls f(dx, dy) for the directions worth scanning from jump point u reached from
+    // `parent` (all legal moves at the start). A diagonal step needs both side cells free.
+    template <class F>
+    void for_each_jump_direction(int u, int parent, F&& f) const {
+        if (parent < 0) {
+            for (unsigned mask = moves[u]; mask; mask &= mask - 1) {
+                int d = __builtin_ctz(mask);
+                f(GRID_DX[d], GRID_DY[d]);
+            }
+            return;
+        }
+        int x = u % width, y = u / width;
+        int dx = (x > parent % width) - (x < parent % width);
+        int dy = (y > parent / width) - (y < parent / width);
+        if (dx && dy) {
+            bool along_x = walkable(x + dx, y), along_y = walkable(x, y + dy);
+            if (along_y) f(0, dy);
+            if (along_x) f(dx, 0);
+            if (along_x && along_y) f(dx, dy);
+        } else if (dx) {
+            bool ahead = walkable(x + dx, y), down = walkable(x, y + 1), up = walkable(x, y - 1);
+            if (ahead) f(dx, 0);
+            if (ahead && down) f(dx, 1);
+            if (ahead && up) f(dx, -1);
+            if (down) f(0, 1);
+            if (up) f(0, -1);
+        } else {
+            bool ahead = walkable(x, y + dy), right = walkable(x + 1, y), left = walkable(x - 1, y);
+            if (ahead) f(0, dy);
+            if (ahead && right) f(1, dy);
+            if (ahead && left) f(-1, dy);
+            if (right) f(1, 0);
+            if (left) f(-1, 0);
+        }
+    }
+
+    // First jump point on the straight line from cell (x, y) along (dx, dy), or -1: the goal,
+    // or a cell beside the end of a wall that runs parallel to the line.
+    int jump_straight(int x, int y, int dx, int dy, int goal) const {
+        for (; walkable(x, y); x += dx, y += dy) {
+            int u = y * width + x;
+            if (u == goal) return u;
+            if (dx) {
+                if ((walkable(x, y - 1) && !walkable(x - dx, y - 1)) || (walkable(x, y + 1) && !walkable(x - dx, y + 1))) return u;
+            } else {
+                if ((walkable(x - 1, y) && !walkable(x - 1, y - dy)) || (walkable(x + 1, y) && !walkable(x + 1, y - dy))) return u;
+            }
+        }
+        return -1;
+    }
+
+    // First jump point from cell (x, y) along (dx, dy), or -1. A diagonal line stops at the
+    // cells from which one of its two straight components reaches a jump point.
+    int jump(int x, int y, int dx, int dy, int goal) const {
+        if (!dx || !dy) return jump_straight(x, y, dx, dy, goal);
+        for (; walkable(x, y); x += dx, y += dy) {
+            int u = y * width + x;
+            if (u == goal) return u;
+            if (jump_straight(x + dx, y, dx, 0, goal) >= 0 || jump_straight(x, y + dy, 0, dy, goal) >= 0) return u;
+            if (!walkable(x + dx, y) || !walkable(x, y + dy)) break;
+        }
+        return -1;
+    }
+
+    // Expands consecutive jump points, which lie on a straight or diagonal line, to every cell.
+    void fill_segments(std::vector<int>& path) const {
+        std::vector<int> cells_on_path;
+        for (size_t i = 0; i + 1 < path.size(); ++i) {
+            int x = path[i] % width, y = path[i] / width;
+            int tx = path[i + 1] % width, ty = path[i + 1] / width;
+            int dx = (tx > x) - (tx < x), dy = (ty > y) - (ty < y);
+            for (; x != tx || y != ty; x += dx, y += dy) cells_on_path.push_back(y * width + x);
+        }
+        if (!path.empty()) cells_on_path.push_back(path.back());
+        path.swap(cells_on_path);
+    }
+
+    inline bool in_box(int u, const int* box) const {
+        int x = u % width, y = u / width;
+        return x >= box[0] && y >= box[1] && x < box[2] && y < box[3];
+    }
+
+    // Dijkstra from `source` over the walkable cells inside `box`, stopping once every target
+    // is settled; with a single target it is A* towards it (octile). False if the source is
+    // not a walkable cell of the box.
+    bool box_search(SearchWorkspace& ws, const int* box, int source, const int* targets, int n_targets, SearchStats& st) {
+        if (source < 0 || source >= num_nodes || !cells[source] || !in_box(source, box)) return false;
+        auto& heap = ws.open.items;
+        heap.clear();
+        int goal = n_targets == 1 ? targets[0] : -1;
+        auto h = [&](int u) { return goal >= 0 ? calculate_h(u, goal, 3, nullptr) : 0.0f; };
+        ws.relax(source, 0, -1);
+        heap_push(heap, {h(source), source});
+        ++st.heap_pushes;
+        int remaining = n_targets;
+        while (!heap.empty() && remaining > 0) {
+            int u = heap_pop(heap).second;
+            ++st.heap_pops;
+            if (ws.is_closed(u)) {
+                ++st.stale_pops;
+                continue;
+            }
+            ws.close(u);
+            remaining -= (int)std::count(targets, targets + n_targets, u);
+            ++st.nodes_expanded;
+            float g_u = ws.g(u);
+            for_each_neighbor(u, [&](int v, float w) {
+                if (!in_box(v, box) || g_u + w >= ws.g(v)) return;
+                ws.relax(v, g_u + w, u);
+                heap_push(heap, {g_u + w + h(v), v});
+                ++st.heap_pushes;
+            });
+        }
+        return true;
+    }
+
+    void select_landmarks(int count, std::vector<int>& picked, std::vector<std::vector<float>>& from) {
+        // Singleton components (isolated nodes, blocked cells) never make useful landmarks.
+        std::vector<int> component_size(num_nodes, 0);
+        for (int u = 0; u < num_nodes; ++u) {
+            if (component(u) >= 0) component_size[component(u)]++;
+        }
+        auto candidate = [&](int u) { return component(u) >= 0 && component_size[component(u)] > 1; };
+        std::vector<float> nearest(num_nodes, INF);
+        std::vector<PII> heap;
+        SearchStats st;
+        int first = 0;
+        while (first < num_nodes && !candidate(first)) ++first;
+        if (first == num_nodes) return;
+        // Seed with the node farthest from an arbitrary one, not the arbitrary node itself.
+        shortest_paths(first, false, nearest.data(), nullptr, heap, st);
+        int next = first;
+        for (int u = 0; u < num_nodes; ++u) {
+            if (nearest[u] < INF && nearest[u] > nearest[next]) next = u;
+        }
+        std::fill(nearest.begin(), nearest.end(), INF);
+        while ((int)picked.size() < count) {
+            picked.push_back(next);
+            from.emplace_back(num_nodes);
+            shortest_paths(next, false, from.back().data(), nullptr, heap, st);
+            nearest[next] = 0;
+            const auto& dist = from.back();
+            for (int u = 0; u < num_nodes; ++u) nearest[u] = std::min(nearest[u], dist[u]);
+            next = -1;
+            for (int u = 0; u < num_nodes; ++u) {
+                if (candidate(u) && nearest[u] > 0 && (next < 0 || nearest[u] > nearest[next])) next = u;
+            }
+            if (next < 0) break;
+        }
+    }
+
+    HeuristicCallback h_callback = nullptr;
+    void* h_context = nullptr;
+    std::atomic<unsigned> h_epoch{0};
+
+    void bind_heuristic(SearchWorkspace& ws, int goal, int& heuristic_mode) {
+        if (!h_callback) heuristic_mode = 0;
+        else ws.bind_heuristic(num_nodes, goal, h_epoch);
+    }
+
+    inline float callback_h(SearchWorkspace& ws, int u, int goal, SearchStats& st) {
+        if (ws.h_stamp[u] == ws.h_generation) return ws.h_memo[u];
+        ++st.heuristic_evals;
+        float value = h_callback(h_context, u, goal);
+        ws.h_memo[u] = value;
+        ws.h_stamp[u] = ws.h_generation;
+        return value;
+    }
+
+    // Rebuilds the CSR arrays from the current CSR edges, the per-node lists and (src, dst, w).
+    void pack(const int* src, const int* dst, const float* w, int m) {
+        auto valid = [this](int u, int v) { return u >= 0 && v >= 0 && u < num_nodes && v < num_nodes; };
+        std::vector<int> new_offsets(num_nodes + 1, 0);
+        for (int u = 0; u < num_nodes; ++u) {
+            new_offsets[u + 1] = offsets[u + 1] - offsets[u] + (adj.empty() ? 0 : (int)adj[u].size());
+        }
+        for (int i = 0; i < m; ++i) {
+            if (valid(src[i], dst[i])) new_offsets[src[i] + 1]++;
+        }
+        for (int u = 0; u < num_nodes; ++u) new_offsets[u + 1] += new_offsets[u];
+
+        std::vector<int> new_targets(new_offsets[num_nodes]);
+        std::vector<float> new_weights(new_offsets[num_nodes]);
+        std::vector<int> cursor(new_offsets.begin(), new_offsets.end() - 1);
+        for (int u = 0; u < num_nodes; ++u) {
+            for (int e = offsets[u]; e < offsets[u + 1]; ++e) {
+                new_targets[cursor[u]] = targets[e];
+                new_weights[cursor[u]++] = weights[e];
+            }
+            if (adj.empty()) continue;
+            for (const auto& edge : adj[u]) {
+                new_targets[cursor[u]] = edge.to;
+                new_weights[cursor[u]++] = edge.weight;
+            }
+        }
+        for (int i = 0; i < m; ++i) {
+            int u = src[i];
+            if (!valid(u, dst[i])) continue;
+            new_targets[cursor[u]] = dst[i];
+            new_weights[cursor[u]++] = w ? w[i] : 1.0f;
+        }
+        offsets.swap(new_offsets);
+        targets.swap(new_targets);
+        weights.swap(new_weights);
+        std::vector<std::vector<Edge>>().swap(adj);
+        pending = false;
+        build_components();
+    }
+
+    WorkspacePool workspaces;
+
+    bool reconstruct_path(const SearchWorkspace& ws, int current, std::vector<int>& path) {
+        path.clear();
+        while (current != -1) {
+            path.push_back(current);
+            current = ws.parent(current);
+        }
+        std::reverse(path.begin(), path.end());
+        return true;
+    }
+};
+
+// D* Lite (Koenig & Likhachev, optimized version): shortest paths from a moving start
+// to a fixed goal. The search runs backwards from the goal, so after the graph changes
+// only the nodes whose distance to the goal changed are expanded again. Changes are
+// read from the solver's change log; a replanner that fell behind the log starts over.
+// Only the symmetric 'manhattan' and 'octile' heuristics are used (h(start, u) is needed).
+class Replanner {
+public:
+    Replanner(GraphSolver* solver, int start, int goal, int heuristic_mode)
+        : solver(solver), start(start), last(start), goal(goal),
+          heuristic_mode(heuristic_mode == 1 || heuristic_mode == 3 ? heuristic_mode : 0) {
+        reset();
+    }
+
+    void move(int node) { start = node; }
+
+    // Repairs the search for the changes since the last call and writes the path from
+    // the current start to the goal; false if there is none.
+    bool plan(std::vector<int>& path, SearchStats* stats) {
+        StatsRecorder rec(stats);
+        path.clear();
+        int n = solver->num_nodes;
+        if (start < 0 || start >= n || goal < 0 || goal >= n) return false;
+        solver->finalize();
+        solver->build_reverse();
+        if (start != last) {
+            km += h(last, start);
+            last = start;
+        }
+        sync(rec.counts);
+        if (solver->is_grid() && (!solver->cells[start] || !solver->cells[goal])) return false;
+        if (!solver->connected(start, goal)) return false;
+        compute(rec.counts);
+        if (g[start] == INF) return false;
+        // Follow the cheapest successors; g is exact along the path once computed.
+        for (int u = start; u != goal;) {
+            path.push_back(u);
+            int next = -1;
+            float best = INF;
+            solver->for_each_neighbor(u, [&](int v, float w) {
+                if (w + g[v] < best) {
+                    best = w + g[v];
+                    next = v;
+                }
+            });
+            if (next < 0 || (int)path.size() > n) {
+                path.clear();
+                return false;
+            }
+            u = next;
+        }
+        path.push_back(goal);
+        return true;
+    }
+
+private:
+    struct Key {
+        float primary, secondary;
+        bool operator<(const Key& o) const {
+            return primary < o.primary || (primary == o.primary && secondary < o.secondary);
+        }
+    };
+    struct Entry {
+        Key key;
+        int node;
+        bool operator>(const Entry& o) const { return o.key < key; }
+    };
+
+    GraphSolver* solver;
+    int start, last, goal, heuristic_mode;
+    float km = 0;
+    size_t seen = 0;
+    std::vector<float> g, rhs;
+    // Lazy deletion: an entry is live while its node is queued with the same key.
+    std::vector<Entry> heap;
+    std::vector<Key> queued_key;
+    std::vector<uint8_t> queued;
+
+    // a < b, with primary keys equal up to rounding ordered by their secondary keys:
+    // nodes on optimal paths tie with the start on the primary key, and expanding the
+    // ones that round above it keeps the g values along the extracted path exact.
+    static bool before(const Key& a, const Key& b) {
+        float tolerance = b.primary < INF ? 1e-5f * std::max(1.0f, b.primary) : 0.0f;
+        if (a.primary < b.primary - tolerance) return true;
+        if (a.primary > b.primary + tolerance) return false;
+        return a.secondary < b.secondary;
+    }
+
+    float h(int a, int b) { return heuristic_mode ? solver->calculate_h(a, b, heuristic_mode, nullptr) : 0.0f; }
+
+    Key key(int u) {
+        float m = std::min(g[u], rhs[u]);
+        return {m + h(start, u) + km, m};
+    }
+
+    void reset() {
+        int n = solver->num_nodes;
+        g.assign(n, INF);
+        rhs.assign(n, INF);
+        queued.assign(n, 0);
+        queued_key.assign(n, Key{INF, INF});
+        heap.clear();
+        km = 0;
+        last = start;
+        seen = solver->change_base + solver->change_log.size();
+        if (goal >= 0 && goal < n) {
+            rhs[goal] = 0;
+            push(goal);
+        }
+    }
+
+    void push(int u) {
+        Key k = key(u);
+        queued[u] = 1;
+        queued_key[u] = k;
+        heap.push_back({k, u});
+        std::push_heap(heap.begin(), heap.end(), std::greater<Entry>());
+    }
+
+    bool live_top() {
+        while (!heap.empty()) {
+            const Entry& top = heap.front();
+            if (queued[top.node] && !(top.key < queued_key[top.node]) && !(queued_key[top.node] < top.key)) return true;
+            std::pop_heap(heap.begin(), heap.end(), std::greater<Entry>());
+            heap.pop_back();
+        }
+        return false;
+    }
+
+    void update_vertex(int u) {
+        if (g[u] != rhs[u]) push(u);
+        else queued[u] = 0;
+    }
+
+    float best_successor(int u) {
+        float best = INF;
+        solver->for_each_neighbor(u, [&](int v, float w) { best = std::min(best, w + g[v]); });
+        return best;
+    }
+
+    void sync(SearchStats& st) {
+        size_t end = solver->change_base + solver->change_log.size();
+        if (seen == end) return;
+        if (seen < solver->change_base) {
+            reset();
+            return;
+        }
+        for (size_t i = seen - solver->change_base; i < solver->change_log.size(); ++i) {
+            int u = solver->change_log[i];
+            if (u != goal) rhs[u] = best_successor(u);
+            update_vertex(u);
+        }
+        seen = end;
+        ++st.batch_steps;
+    }
+
+    void compute(SearchStats& st) {
+        while (live_top()) {
+            Entry top = heap.front();
+            if (!before(top.key, key(start)) && rhs[start] == g[start]) break;
+            std::pop_heap(heap.begin(), heap.end(), std::greater<Entry>());
+            heap.pop_back();
+            ++st.heap_pops;
+            int u = top.node;
+            Key fresh = key(u);
+            if (top.key < fresh) {
+                push(u);
+                ++st.heap_pushes;
+                continue;
+            }
+            ++st.nodes_expanded;
+            if (g[u] > rhs[u]) {
+                g[u] = rhs[u];
+                queued[u] = 0;
+                solver->for_each_predecessor(u, [&](int s, float w) {
+                    if (s != goal) rhs[s] = std::min(rhs[s], w + g[u]);
+                    update_vertex(s);
+                });
+            } else {
+                float old = g[u];
+                g[u] = INF;
+                auto repair = [&](int s, float w) {
+                    if (s != goal && rhs[s] == w + old) rhs[s] = best_successor(s);
+                    update_vertex(s);
+                };
+                solver->for_each_predecessor(u, repair);
+                repair(u, INF);
+            }
+        }
+    }
+};
+
+// Readers for the MovingAI benchmark formats (https://movingai.com/benchmarks/formats.html).
+class TextCursor {
+public:
+    TextCursor(const char* data, long long len) : p(data), end(data + len) {}
+
+    bool done() const { return p == end; }
+
+    // Next line without its line break (and a trailing '\r').
+    std::pair<const char*, const char*> line() {
+        const char* start = p;
+        while (p != end && *p != '\n') ++p;
+        const char* stop = p;
+        if (p != end) ++p;
+        if (stop != start && stop[-1] == '\r') --stop;
+        return {start, stop};
+    }
+
+    // Next whitespace-separated token of [first, last), advancing `first`.
+    static std::pair<const char*, const char*> token(const char*& first, const char* last) {
+        while (first != last && (*first == ' ' || *first == '\t')) ++first;
+        const char* start = first;
+        while (first != last && *first != ' ' && *first != '\t') ++first;
+        return {start, first};
+    }
+
+    template <class T>
+    static bool number(const char*& first, const char* last, T& value) {
+        auto tok = token(first, last);
+        return tok.first != tok.second && std::from_chars(tok.first, tok.second, value).ec == std::errc();
+    }
+
+private:
+    const char* p;
+    const char* end;
+};
+
+// Parses a .map grid. With `cells` null only the header is read; otherwise `cells` receives
+// width * height walkability bytes. '.', 'G' and 'S' are walkable; '@', 'O', 'T' (trees) and
+// 'W' (water) are not, as in the published optimal lengths. Returns 0, -1 for a bad header
+// or -2 for missing or short rows.
+static int parse_movingai_map(const char* data, long long len, int* width, int* height, uint8_t* cells) {
+    TextCursor text(data, len);
+    int w = -1, h = -1;
+    for (;;) {
+        if (text.done()) return -1;
+        auto [first, last] = text.line();
+        auto key = TextCursor::token(first, last);
+        std::string name(key.first, key.second);
+        if (name == "map") break;
+        if (name == "width" && !TextCursor::number(first, last, w)) return -1;
+        if (name == "height" && !TextCursor::number(first, last, h)) return -1;
+    }
+    if (w < 0 || h < 0) return -1;
+    *width = w;
+    *height = h;
+    if (!cells) return 0;
+    for (int y = 0; y < h; ++y) {
+        if (text.done()) return -2;
+        auto [first, last] = text.line();
+        if (last - first < w) return -2;
+        for (int x = 0; x < w; ++x) {
+            char c = first[x];
+            cells[(size_t)y * w + x] = c == '.' || c == 'G' || c == 'S';
+        }
+    }
+    return 0;
+}
+
+// Parses the scenarios of a .scen file into `fields` (bucket, map width, map height, start x,
+// start y, goal x, goal y per scenario) and `optimal` (optimal path lengths). Returns the
+// number of scenarios, or -(line number) of the first malformed line.
+static int parse_movingai_scenarios(const char* data, long long len, int* fields, double* optimal, int capacity) {
+    TextCursor text(data, len);
+    int count = 0;
+    for (int line = 1; !text.done(); ++line) {
+        auto [first, last] = text.line();
+        const char* probe = first;
+        auto head = TextCursor::token(probe, last);
+        if (head.first == head.second || std::string(head.first, head.second) == "version") continue;
+        if (count == capacity) return -line;
+        int* f = fields + 7 * (size_t)count;
+        bool ok = TextCursor::number(first, last, f[0]);
+        TextCursor::token(first, last);  // map name
+        for (int i = 1; ok && i < 7; ++i) ok = TextCursor::number(first, last, f[i]);
+        if (!ok || !TextCursor::number(first, last, optimal[count])) return -line;
+        ++count;
+    }
+    return count;
+}
+
+// ---------------------------------------------------------------------------------------
+// CPython extension module: the whole Python interface of the native solver.
+//
+// Graph creates and owns a GraphSolver (empty, over a grid bitmap or from a saved image)
+// and exposes its construction, updates and searches as methods; searches run with the
+// GIL released. Arrays come in through the buffer protocol (edge lists, heuristic values,
+// id lists, the stats struct) and paths go out as Path objects, read-only int buffers
+// that own the ids, so neither direction copies. Search and Replanner objects hold the
+// state of budgeted and incremental searches, and a reference to their Graph.
+
+struct PathObject {
+    PyObject_HEAD
+    std::vector<int>* ids;
+    Py_ssize_t shape;
+};
+
+static PyTypeObject PathType = {PyVarObject_HEAD_INIT(nullptr, 0)};
+
+static PyObject* new_path(std::vector<int>* ids) {
+    auto* self = PyObject_New(PathObject, &PathType);
+    if (!self) {
+        delete ids;
+        return nullptr;
+    }
+    self->ids = ids;
+    self->shape = (Py_ssize_t)ids->size();
+    return (PyObject*)self;
+}
+
+static void Path_dealloc(PathObject* self) {
+    delete self->ids;
+    PyObject_Free(self);
+}
+
+static Py_ssize_t Path_length(PathObject* self) { return self->shape; }
+
+static int Path_getbuffer(PathObject* self, Py_buffer* view, int flags) {
+    static int empty = 0;
+    if (flags & PyBUF_WRITABLE) {
+        PyErr_SetString(PyExc_BufferError, "paths are read-only");
+        view->obj = nullptr;
+        return -1;
+    }
+    view->obj = (PyObject*)self;
+    Py_INCREF(self);
+    view->buf = self->shape ? self->ids->data() : &empty;
+    view->len = self->shape * (Py_ssize_t)sizeof(int);
+    view->readonly = 1;
+    view->itemsize = sizeof(int);
+    view->format = (flags & PyBUF_FORMAT) ? (char*)"i" : nullptr;
+    view->ndim = 1;
+    view->shape = (flags & PyBUF_ND) ? &self->shape : nullptr;
+    view->strides = (flags & PyBUF_STRIDES) ? &view->itemsize : nullptr;
+    view->suboffsets = nullptr;
+    view->internal = nullptr;
+    return 0;
+}
+
+static PySequenceMethods Path_as_sequence = {(lenfunc)Path_length};
+static PyBufferProcs Path_as_buffer = {(getbufferproc)Path_getbuffer, nullptr};
+
+// A contiguous buffer argument, released with the object; None leaves it empty.
+class BufferArg {
+public:
+    Py_buffer view{};
+    bool held = false;
+
+    ~BufferArg() {
+        if (held) PyBuffer_Release(&view);
+    }
+
+    // Gets `obj` with at least `items` elements of `itemsize` bytes; false with an exception set.
+    bool get(PyObject* obj, Py_ssize_t items, Py_ssize_t itemsize, bool writable, const char* name) {
+        if (obj == Py_None) return true;
+        if (PyObject_GetBuffer(obj, &view, PyBUF_C_CONTIGUOUS | (writable ? PyBUF_WRITABLE : 0)) < 0) return false;
+        held = true;
+        if (view.len < items * itemsize) {
+            PyErr_Format(PyExc_ValueError, "%s holds %zd bytes, %zd needed", name, view.len, items * itemsize);
+            return false;
+        }
+        return true;
+    }
+
+    // As get, but None is refused.
+    bool require(PyObject* obj, Py_ssize_t items, Py_ssize_t itemsize, bool writable, const char* name) {
+        if (obj != Py_None) return get(obj, items, itemsize, writable, name);
+        PyErr_Format(PyExc_TypeError, "%s must be a buffer, not None", name);
+        return false;
+    }
+
+    Py_ssize_t count(Py_ssize_t itemsize) const { return held ? view.len / itemsize : 0; }
+
+    template <class T>
+    T* data() const { return held ? (T*)view.buf : nullptr; }
+};
+
+
+struct GraphObject {
+    PyObject_HEAD
+    GraphSolver* solver;
+    std::shared_mutex* access;  // see read_graph / update_graph
+    PyObject* heuristic;  // callable of heuristic mode 4, see Graph_set_heuristic
+    PyObject* owner;      // keeps the arrays of a borrowed image alive, see Graph_from_image
+};
+
+static PyTypeObject GraphType = {PyVarObject_HEAD_INIT(nullptr, 0)};
+
+// Largest node count of a Graph: offsets has num_nodes + 1 entries and node ids are ints.
+static const int MAX_NODES = INT_MAX - 2;
+
+static bool check_num_nodes(Py_ssize_t num_nodes) {
+    if (num_nodes > MAX_NODES) {
+        PyErr_Format(PyExc_ValueError, "a graph has at most %d nodes, not %zd", MAX_NODES, num_nodes);
+        return false;
+    }
+    return true;
+}
+
+// Every method, getter and constructor of the extension types is entered through
+// guarded<F>, which turns a C++ exception escaping F into the Python error: MemoryError
+// for bad_alloc, ValueError otherwise (length_error of an oversized vector and the like).
+template <auto F>
+struct Guarded;
+
+template <class R, class... Args, R (*F)(Args...)>
+struct Guarded<F> {
+    static R call(Args... args) {
+        try {
+            return F(args...);
+        } catch (const std::bad_alloc&) {
+            PyErr_NoMemory();
+        } catch (const std::exception& e) {
+            PyErr_SetString(PyExc_ValueError, e.what());
+        }
+        if constexpr (std::is_pointer_v<R>) return nullptr;
+        else return -1;
+    }
+};
+
+template <auto F>
+constexpr auto guarded = &Guarded<F>::call;
+
+// Runs f with the GIL released. An exception thrown by f is rethrown once the GIL is held
+// again, so that guarded<F> can report it.
+template <class F>
+static void without_gil(F f) {
+    std::exception_ptr error;
+    Py_BEGIN_ALLOW_THREADS
+    try {
+        f();
+    } catch (...) {
+        error = std::current_exception();
+    }
+    Py_END_ALLOW_THREADS
+    if (error) std::rethrow_exception(error);
+}
+
+static PyObject* wrap_solver(PyTypeObject* type, GraphSolver* solver) {
+    std::unique_ptr<GraphSolver> owned(solver);
+    auto* access = new std::shared_mutex();
+    auto* self = (GraphObject*)type->tp_alloc(type, 0);
+    if (!self) {
+        delete access;
+        return nullptr;
+    }
+    self->solver = owned.release();
+    self->access = access;
+    return (PyObject*)self;
+}
+
+// Every call that reads the graph runs in read_graph, holding the lock shared, and every
+// update in update_graph, holding it exclusively: an update waits for the searches in
+// flight (other threads, solve_many batches) and no search sees half of one. Both run
+// with the GIL released, also while waiting, since a search holding the lock takes the
+// GIL back for each mode 4 heuristic call.
+template <class F>
+static void read_graph(GraphObject* graph, F f) {
+    std::shared_mutex* access = graph->access;
+    without_gil([&] {
+        std::shared_lock<std::shared_mutex> lock(*access);
+        f();
+    });
+}
+
+template <class F>
+static void update_graph(GraphObject* graph, F f) {
+    std::shared_mutex* access = graph->access;
+    without_gil([&] {
+        std::unique_lock<std::shared_mutex> lock(*access);
+        f();
+    });
+}
+
+// Runs f over exact component labels. Relabelling after removals replaces the arrays that
+// searches read through connected(), so that happens, and f then runs, under the exclusive lock.
+template <class F>
+static void read_components(GraphObject* graph, F f) {
+    GraphSolver* solver = graph->solver;
+    bool exact = false;
+    read_graph(graph, [&] {
+        exact = solver->is_finalized() && solver->components_exact;
+        if (exact) f();
+    });
+    if (exact) return;
+    update_graph(graph, [&] {
+        solver->finalize();
+        solver->refresh_components();
+        f();
+    });
+}
+
+static PyObject* Graph_new(PyTypeObject* type, PyObject* args, PyObject* kwargs) {
+    static const char* keywords[] = {"num_nodes", "width", nullptr};
+    int num_nodes, width = 0;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "i|i", (char**)keywords, &num_nodes, &width)) return nullptr;
+    if (num_nodes < 0) {
+        PyErr_SetString(PyExc_ValueError, "num_nodes must be >= 0");
+        return nullptr;
+    }
+    if (!check_num_nodes(num_nodes)) return nullptr;
+    auto solver = std::make_unique<GraphSolver>(num_nodes);
+    solver->set_width(width);
+    return wrap_solver(type, solver.release());
+}
+
+static PyObject* Graph_grid(PyTypeObject* type, PyObject* args) {
+    PyObject* cells;
+    int width, height, connectivity, corner_cutting;
+    if (!PyArg_ParseTuple(args, "Oiiip", &cells, &width, &height, &connectivity, &corner_cutting)) return nullptr;
+    if (width < 0 || height < 0) {
+        PyErr_SetString(PyExc_ValueError, "width and height must be >= 0");
+        return nullptr;
+    }
+    if (!check_num_nodes((Py_ssize_t)width * height)) return nullptr;
+    BufferArg c;
+    if (!c.require(cells, (Py_ssize_t)width * height, 1, false, "cells")) return nullptr;
+    GraphSolver* solver = nullptr;
+    without_gil([&] { solver = new GraphSolver(c.data<uint8_t>(), width, height, connectivity, corner_cutting != 0); });
+    return wrap_solver(type, solver);
+}
+
+// Arrays of a SolverImage, in declaration order.
+static const char* const IMAGE_ARRAYS[] = {
+    "offsets", "targets", "weights", "cells", "moves", "narrow_components", "wide_components",
+    "landmarks", "landmark_from", "landmark_to"
+};
+static const int IMAGE_ARRAY_COUNT = sizeof(IMAGE_ARRAYS) / sizeof(IMAGE_ARRAYS[0]);
+
+// Points `data` at the field of array i of `image` and sets its element size and count.
+static void image_array(SolverImage& image, int i, const void**& data, size_t& itemsize, size_t& count) {
+    size_t n = image.num_nodes, m = image.num_edges, tables = n * image.num_landmarks;
+    auto set = [&](auto& field, size_t items) {
+        data = (const void**)&field;
+        itemsize = sizeof(*field);
+        count = items;
+    };
+    switch (i) {
+        case 0: set(image.offsets, n + 1); break;
+        case 1: set(image.targets, m); break;
+        case 2: set(image.weights, m); break;
+        case 3: set(image.cells, n); break;
+        case 4: set(image.moves, n); break;
+        case 5: set(image.narrow_components, n); break;
+        case 6: set(image.wide_components, n); break;
+        case 7: set(image.landmarks, (size_t)image.num_landmarks); break;
+        case 8: set(image.landmark_from, tables); break;
+        default: set(image.landmark_to, tables); break;
+    }
+}
+
+// Graph.from_image(fields, arrays, owner): the solver saved by export(). With `owner` None the
+// arrays are copied; otherwise they are borrowed and `owner`, which holds their memory, is kept.
+static PyObject* Graph_from_image(PyTypeObject* type, PyObject* args) {
+    SolverImage image{};
+    PyObject *arrays, *owner;
+    if (!PyArg_ParseTuple(args, "(iiiiiiii)O!O", &image.num_nodes, &image.num_edges, &image.width, &image.height,
+                          &image.connectivity, &image.corner_cutting, &image.num_components, &image.num_landmarks,
+                          &PyTuple_Type, &arrays, &owner)) return nullptr;
+    if (image.num_nodes < 0 || image.num_edges < 0 || image.num_landmarks < 0 ||
+        PyTuple_GET_SIZE(arrays) != IMAGE_ARRAY_COUNT) {
+        PyErr_SetString(PyExc_ValueError, "malformed solver image");
+        return nullptr;
+    }
+    if (!check_num_nodes(image.num_nodes)) return nullptr;
+    BufferArg views[IMAGE_ARRAY_COUNT];
+    for (int i = 0; i < IMAGE_ARRAY_COUNT; ++i) {
+        const void** data;
+        size_t itemsize, count;
+        image_array(image, i, data, itemsize, count);
+        if (!views[i].get(PyTuple_GET_ITEM(arrays, i), count, itemsize, false, IMAGE_ARRAYS[i])) return nullptr;
+        *data = views[i].data<void>();
+    }
+    auto* self = (GraphObject*)wrap_solver(type, new GraphSolver(image, owner == Py_None));
+    if (self && owner != Py_None) {
+        Py_INCREF(owner);
+        self->owner = owner;
+    }
+    return (PyObject*)self;
+}
+
+static PyObject* Graph_export(GraphObject* self, PyObject*) {
+    SolverImage image;
+    // The arrays are copied out under the lock: an update may reallocate them.
+    std::vector<std::string> copies(IMAGE_ARRAY_COUNT);
+    std::vector<bool> present(IMAGE_ARRAY_COUNT);
+    GraphSolver* solver = self->solver;
+    read_components(self, [&] {
+        solver->export_image(image);
+        for (int i = 0; i < IMAGE_ARRAY_COUNT; ++i) {
+            const void** data;
+            size_t itemsize, count;
+            image_array(image, i, data, itemsize, count);
+            present[i] = *data != nullptr;
+            if (*data) copies[i].assign((const char*)*data, itemsize * count);
+        }
+    });
+    PyObject* arrays = PyTuple_New(IMAGE_ARRAY_COUNT);
+    if (!arrays) return nullptr;
+    for (int i = 0; i < IMAGE_ARRAY_COUNT; ++i) {
+        PyObject* item = Py_None;
+        if (present[i]) item = PyBytes_FromStringAndSize(copies[i].data(), (Py_ssize_t)copies[i].size());
+        else Py_INCREF(item);
+        if (!item) {
+            Py_DECREF(arrays);
+            return nullptr;
+        }
+        PyTuple_SET_ITEM(arrays, i, item);
+    }
+    return Py_BuildValue("(iiiiiiii)N", image.num_nodes, image.num_edges, image.width, image.height,
+                         image.connectivity, image.corner_cutting, image.num_components, image.num_landmarks, arrays);
+}
+
+static int Graph_traverse(GraphObject* self, visitproc visit, void* arg) {
+    Py_VISIT(self->heuristic);
+    return 0;
+}
+
+static int Graph_clear(GraphObject* self) {
+    Py_CLEAR(self->heuristic);
+    return 0;
+}
+
+static void Graph_dealloc(GraphObject* self) {
+    PyObject_GC_UnTrack(self);
+    Graph_clear(self);
+    delete self->solver;
+    delete self->access;
+    Py_XDECREF(self->owner);
+    Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+// Runs `search` over `graph` into a new Path, see read_graph.
+template <class F>
+static PyObject* run_search(GraphObject* graph, F search) {
+    auto ids = std::make_unique<std::vector<int>>();
+    read_graph(graph, [&] { search(*ids); });
+    return new_path(ids.release());
+}
+
+static bool heuristic_and_stats(GraphObject* self, PyObject* h_values, PyObject* stats, BufferArg& h, BufferArg& st) {
+    return h.get(h_values, self->solver->num_nodes, sizeof(float), false, "h_values") &&
+           st.get(stats, 1, sizeof(SearchStats), true, "stats");
+}
+
+static PyObject* Graph_add_edge(GraphObject* self, PyObject* args) {
+    int u, v;
+    float w;
+    if (!PyArg_ParseTuple(args, "iif", &u, &v, &w)) return nullptr;
+    GraphSolver* solver = self->solver;
+    update_graph(self, [&] { solver->add_edge(u, v, w); });
+    Py_RETURN_NONE;
+}
+
+static PyObject* Graph_add_edges(GraphObject* self, PyObject* args) {
+    PyObject *src, *dst, *weights;
+    if (!PyArg_ParseTuple(args, "OOO", &src, &dst, &weights)) return nullptr;
+    BufferArg s, d, w;
+    if (!s.require(src, 0, sizeof(int), false, "src")) return nullptr;
+    Py_ssize_t m = s.count(sizeof(int));
+    if (!d.require(dst, m, sizeof(int), false, "dst") || !w.get(weights, m, sizeof(float), false, "weights"))
+        return nullptr;
+    GraphSolver* solver = self->solver;
+    update_graph(self, [&] { solver->add_edges(s.data<int>(), d.data<int>(), w.data<float>(), (int)m); });
+    Py_RETURN_NONE;
+}
+
+static PyObject* Graph_set_csr(GraphObject* self, PyObject* args) {
+    PyObject *indptr, *indices, *weights;
+    if (!PyArg_ParseTuple(args, "OOO", &indptr, &indices, &weights)) return nullptr;
+    GraphSolver* solver = self->solver;
+    BufferArg p, i, w;
+    if (!p.require(indptr, solver->num_nodes + 1, sizeof(int), false, "indptr")) return nullptr;
+    const int* ptr = p.data<int>();
+    int n = solver->num_nodes, m = ptr[n];
+    if (ptr[0] != 0) {
+        PyErr_SetString(PyExc_ValueError, "indptr must start at 0");
+        return nullptr;
+    }
+    for (int u = 0; u < n; ++u) {
+        if (ptr[u + 1] < ptr[u]) {
+            PyErr_SetString(PyExc_ValueError, "indptr must be non-decreasing");
+            return nullptr;
+        }
+    }
+    if (!i.require(indices, m, sizeof(int), false, "indices") || !w.get(weights, m, sizeof(float), false, "weights"))
+        return nullptr;
+    if (i.count(sizeof(int)) != m) {
+        PyErr_SetString(PyExc_ValueError, "indptr must end at len(indices)");
+        return nullptr;
+    }
+    const int* ids = i.data<int>();
+    for (int e = 0; e < m; ++e) {
+        if (ids[e] < 0 || ids[e] >= n) {
+            PyErr_Format(PyExc_ValueError, "indices[%d] = %d is not a node id in [0, %d)", e, ids[e], n);
+            return nullptr;
+        }
+    }
+    update_graph(self, [&] { solver->set_csr(p.data<int>(), i.data<int>(), w.data<float>()); });
+    Py_RETURN_NONE;
+}
+
+static PyObject* Graph_finalize(GraphObject* self, PyObject*) {
+    GraphSolver* solver = self->solver;
+    // Packing is a lazy build like the ones of the searches, synchronized inside the solver.
+    read_graph(self, [&] { solver->finalize(); });
+    Py_RETURN_NONE;
+}
+
+static PyObject* Graph_set_edge(GraphObject* self, PyObject* args) {
+    int u, v;
+    float w;
+    if (!PyArg_ParseTuple(args, "iif", &u, &v, &w)) return nullptr;
+    GraphSolver* solver = self->solver;
+    update_graph(self, [&] { solver->set_edge(u, v, w); });
+    Py_RETURN_NONE;
+}
+
+static PyObject* Graph_remove_edge(GraphObject* self, PyObject* args) {
+    int u, v;
+    if (!PyArg_ParseTuple(args, "ii", &u, &v)) return nullptr;
+    GraphSolver* solver = self->solver;
+    int removed = 0;
+    update_graph(self, [&] { removed = solver->remove_edge(u, v); });
+    return PyLong_FromLong(removed);
+}
+
+static PyObject* Graph_set_walkable(GraphObject* self, PyObject* args) {
+    int u, walkable;
+    if (!PyArg_ParseTuple(args, "ip", &u, &walkable)) return nullptr;
+    GraphSolver* solver = self->solver;
+    bool changed = false;
+    update_graph(self, [&] { changed = solver->set_walkable(u, walkable != 0); });
+    return PyBool_FromLong(changed);
+}
+
+static PyObject* Graph_component_labels(GraphObject* self, PyObject* args) {
+    int strong;
+    PyObject* out;
+    if (!PyArg_ParseTuple(args, "pO", &strong, &out)) return nullptr;
+    GraphSolver* solver = self->solver;
+    BufferArg labels;
+    if (!labels.require(out, solver->num_nodes, sizeof(int), true, "out")) return nullptr;
+    int* dst = labels.data<int>();
+    read_components(self, [&] {
+        if (strong) {
+            const auto& strong_labels = solver->strong_components();
+            std::copy(strong_labels.begin(), strong_labels.end(), dst);
+        } else {
+            for (int u = 0; u < solver->num_nodes; ++u) dst[u] = solver->component(u);
+        }
+    });
+    Py_RETURN_NONE;
+}
+
+static PyObject* Graph_release_workspaces(GraphObject* self, PyObject*) {
+    self->solver->release_workspaces();
+    Py_RETURN_NONE;
+}
+
+static PyObject* Graph_distance_field(GraphObject* self, PyObject* args) {
+    int goal;
+    PyObject *dist, *next_hop, *stats;
+    if (!PyArg_ParseTuple(args, "iOOO", &goal, &dist, &next_hop, &stats)) return nullptr;
+    GraphSolver* solver = self->solver;
+    BufferArg d, next, st;
+    if (!d.require(dist, solver->num_nodes, sizeof(float), true, "dist") ||
+        !next.get(next_hop, solver->num_nodes, sizeof(int), true, "next_hop") ||
+        !st.get(stats, 1, sizeof(SearchStats), true, "stats")) return nullptr;
+    bool reachable = false;
+    read_graph(self, [&] {
+        reachable = solver->distance_field(goal, d.data<float>(), next.data<int>(), st.data<SearchStats>());
+    });
+    return PyBool_FromLong(reachable);
+}
+
+static PyObject* Graph_build_landmarks(GraphObject* self, PyObject* args) {
+    int count, threads;
+    PyObject* chosen;
+    if (!PyArg_ParseTuple(args, "iOi", &count, &chosen, &threads)) return nullptr;
+    if (count < 0) {
+        PyErr_SetString(PyExc_ValueError, "count must be >= 0");
+        return nullptr;
+    }
+    BufferArg ids;
+    if (!ids.get(chosen, count, sizeof(int), false, "landmarks")) return nullptr;
+    GraphSolver* solver = self->solver;
+    int built = 0;
+    update_graph(self, [&] { built = solver->build_landmarks(count, ids.data<int>(), threads); });
+    return PyLong_FromLong(built);
+}
+
+static PyObject* Graph_rebuild_landmarks(GraphObject* self, PyObject* args) {
+    int threads;
+    if (!PyArg_ParseTuple(args, "i", &threads)) return nullptr;
+    GraphSolver* solver = self->solver;
+    int built = 0;
+    update_graph(self, [&] { built = solver->rebuild_landmarks(threads); });
+    return PyLong_FromLong(built);
+}
+
+static PyObject* Graph_landmark_tables(GraphObject* self, PyObject* args) {
+    PyObject *ids, *dist_from, *dist_to;
+    if (!PyArg_ParseTuple(args, "OOO", &ids, &dist_from, &dist_to)) return nullptr;
+    GraphSolver* solver = self->solver;
+    Py_ssize_t count = solver->num_landmarks, tables = (Py_ssize_t)solver->num_nodes * count;
+    BufferArg i, from, to;
+    if (!i.get(ids, count, sizeof(int), true, "ids") || !from.get(dist_from, tables, sizeof(float), true, "dist_from") ||
+        !to.get(dist_to, tables, sizeof(float), true, "dist_to")) return nullptr;
+    bool changed = false;
+    read_graph(self, [&] {
+        // The buffers were sized for `count`: copy nothing if an update replaced the landmarks since.
+        changed = solver->num_landmarks != count;
+        if (changed) return;
+        if (i.held) std::copy(solver->landmarks.begin(), solver->landmarks.begin() + count, i.data<int>());
+        if (from.held) std::copy(solver->landmark_from.begin(), solver->landmark_from.end(), from.data<float>());
+        if (to.held) std::copy(solver->landmark_to.begin(), solver->landmark_to.end(), to.data<float>());
+    });
+    if (changed) {
+        PyErr_SetString(PyExc_RuntimeError, "the landmarks changed while they were read");
+        return nullptr;
+    }
+    Py_RETURN_NONE;
+}
+
+static PyObject* Graph_set_landmarks(GraphObject* self, PyObject* args) {
+    PyObject *ids, *dist_from, *dist_to;
+    if (!PyArg_ParseTuple(args, "OOO", &ids, &dist_from, &dist_to)) return nullptr;
+    GraphSolver* solver = self->solver;
+    BufferArg i, from, to;
+    if (!i.require(ids, 0, sizeof(int), false, "ids")) return nullptr;
+    Py_ssize_t count = i.count(sizeof(int)), tables = (Py_ssize_t)solver->num_nodes * count;
+    if (!from.require(dist_from, tables, sizeof(float), false, "dist_from") ||
+        !to.require(dist_to, tables, sizeof(float), false, "dist_to")) return nullptr;
+    update_graph(self, [&] {
+        solver->finalize();
+        solver->set_landmarks(i.data<int>(), (int)count, from.data<float>(), to.data<float>());
+    });
+    Py_RETURN_NONE;
+}
+
+// Calls the mode 4 heuristic from a search, taking the GIL for the call. The callables of
+// AStart catch their own exceptions (see AStart._bind_heuristic); any other counts as 0.
+static float call_heuristic(void* context, int u, int goal) {
+    auto* self = (GraphObject*)context;
+    PyGILState_STATE gil = PyGILState_Ensure();
+    float value = 0;
+    if (self->heuristic) {
+        PyObject* result = PyObject_CallFunction(self->heuristic, "ii", u, goal);
+        if (result) {
+            value = (float)PyFloat_AsDouble(result);
+            Py_DECREF(result);
+        }
+        if (PyErr_Occurred()) {
+            PyErr_WriteUnraisable(self->heuristic);
+            value = 0;
+        }
+    }
+    PyGILState_Release(gil);
+    return value;
+}
+
+static PyObject* Graph_set_heuristic(GraphObject* self, PyObject* callback) {
+    if (callback != Py_None && !PyCallable_Check(callback)) {
+        PyErr_SetString(PyExc_TypeError, "the heuristic must be callable or None");
+        return nullptr;
+    }
+    GraphSolver* solver = self->solver;
+    HeuristicCallback h = callback == Py_None ? nullptr : call_heuristic;
+    update_graph(self, [&] { solver->set_heuristic(h, self); });
+    // Swapped with the GIL held, which call_heuristic takes before reading it.
+    PyObject* old = self->heuristic;
+    self->heuristic = callback == Py_None ? nullptr : callback;
+    Py_XINCREF(self->heuristic);
+    Py_XDECREF(old);
+    Py_RETURN_NONE;
+}
+
+static PyObject* Graph_solve(GraphObject* self, PyObject* args) {
+    int start, goal, k, adaptive, mode;
+    PyObject *h_values, *stats;
+    if (!PyArg_ParseTuple(args, "iiiiiOO", &start, &goal, &k, &adaptive, &mode, &h_values, &stats)) return nullptr;
+    BufferArg h, st;
+    if (!heuristic_and_stats(self, h_values, stats, h, st)) return nullptr;
+    GraphSolver* solver = self->solver;
+    return run_search(self, [&](std::vector<int>& path) {
+        solver->search_batch(start, goal, k, adaptive, mode, h.data<float>(), path, st.data<SearchStats>());
+    });
+}
+
+static PyObject* Graph_solve_bounded(GraphObject* self, PyObject* args) {
+    int start, goal, k, adaptive, focal, mode;
+    float weight;
+    PyObject *h_values, *stats;
+    if (!PyArg_ParseTuple(args, "iiiifpiOO", &start, &goal, &k, &adaptive, &weight, &focal, &mode, &h_values, &stats))
+        return nullptr;
+    BufferArg h, st;
+    if (!heuristic_and_stats(self, h_values, stats, h, st)) return nullptr;
+    GraphSolver* solver = self->solver;
+    return run_search(self, [&](std::vector<int>& path) {
+        solver->search_bounded(start, goal, k, adaptive, weight, focal != 0, mode, h.data<float>(), path,
+                               st.data<SearchStats>());
+    });
+}
+
+static PyObject* Graph_solve_classic(GraphObject* self, PyObject* args) {
+    int start, goal, mode;
+    PyObject *h_values, *stats;
+    if (!PyArg_ParseTuple(args, "iiiOO", &start, &goal, &mode, &h_values, &stats)) return nullptr;
+    BufferArg h, st;
+    if (!heuristic_and_stats(self, h_values, stats, h, st)) return nullptr;
+    GraphSolver* solver = self->solver;
+    return run_search(self, [&](std::vector<int>& path) {
+        solver->search_classic(start, goal, mode, h.data<float>(), path, st.data<SearchStats>());
+    });
+}
+
+static PyObject* Graph_solve_bidirectional(GraphObject* self, PyObject* args) {
+    int start, goal, k, mode;
+    PyObject *h_values, *stats;
+    if (!PyArg_ParseTuple(args, "iiiiOO", &start, &goal, &k, &mode, &h_values, &stats)) return nullptr;
+    BufferArg h, st;
+    if (!heuristic_and_stats(self, h_values, stats, h, st)) return nullptr;
+    GraphSolver* solver = self->solver;
+    return run_search(self, [&](std::vector<int>& path) {
+        solver->search_bidirectional(start, goal, k, mode, h.data<float>(), path, st.data<SearchStats>());
+    });
+}
+
+static PyObject* Graph_solve_jps(GraphObject* self, PyObject* args) {
+    int start, goal, waypoints;
+    PyObject* stats;
+    if (!PyArg_ParseTuple(args, "iiiO", &start, &goal, &waypoints, &stats)) return nullptr;
+    BufferArg st;
+    if (!st.get(stats, 1, sizeof(SearchStats), true, "stats")) return nullptr;
+    GraphSolver* solver = self->solver;
+    return run_search(self, [&](std::vector<int>& path) {
+        solver->search_jps(start, goal, waypoints != 0, path, st.data<SearchStats>());
+    });
+}
+
+static PyObject* Graph_solve_between(GraphObject* self, PyObject* args) {
+    PyObject *sources, *source_costs, *targets, *target_costs, *h_values, *stats;
+    int h_goal, mode;
+    if (!PyArg_ParseTuple(args, "OOOOiiOO", &sources, &source_costs, &targets, &target_costs, &h_goal, &mode,
+                          &h_values, &stats)) return nullptr;
+    BufferArg s, s_cost, t, t_cost, h, st;
+    if (!s.require(sources, 0, sizeof(int), false, "sources") || !t.require(targets, 0, sizeof(int), false, "targets"))
+        return nullptr;
+    int n_sources = (int)s.count(sizeof(int)), n_targets = (int)t.count(sizeof(int));
+    if (!s_cost.require(source_costs, n_sources, sizeof(float), false, "source_costs") ||
+        !t_cost.require(target_costs, n_targets, sizeof(float), false, "target_costs") ||
+        !heuristic_and_stats(self, h_values, stats, h, st)) return nullptr;
+    GraphSolver* solver = self->solver;
+    return run_search(self, [&](std::vector<int>& path) {
+        solver->search_between(s.data<int>(), s_cost.data<float>(), n_sources, t.data<int>(), t_cost.data<float>(),
+                               n_targets, h_goal, mode, h.data<float>(), path, st.data<SearchStats>());
+    });
+}
+
+static PyObject* Graph_box_distances(GraphObject* self, PyObject* args) {
+    PyObject *box, *sources, *targets, *out, *stats;
+    if (!PyArg_ParseTuple(args, "OOOOO", &box, &sources, &targets, &out, &stats)) return nullptr;
+    BufferArg b, s, t, o, st;
+    if (!b.require(box, 4, sizeof(int), false, "box") || !s.require(sources, 0, sizeof(int), false, "sources") ||
+        !t.require(targets, 0, sizeof(int), false, "targets")) return nullptr;
+    int n_sources = (int)s.count(sizeof(int)), n_targets = (int)t.count(sizeof(int));
+    if (!o.require(out, (Py_ssize_t)n_sources * n_targets, sizeof(float), true, "out") ||
+        !st.get(stats, 1, sizeof(SearchStats), true, "stats")) return nullptr;
+    GraphSolver* solver = self->solver;
+    read_graph(self, [&] {
+        solver->box_distances(b.data<int>(), s.data<int>(), n_sources, t.data<int>(), n_targets, o.data<float>(),
+                              st.data<SearchStats>());
+    });
+    Py_RETURN_NONE;
+}
+
+static PyObject* Graph_box_path(GraphObject* self, PyObject* args) {
+    PyObject *box, *stats;
+    int start, goal;
+    if (!PyArg_ParseTuple(args, "OiiO", &box, &start, &goal, &stats)) return nullptr;
+    BufferArg b, st;
+    if (!b.require(box, 4, sizeof(int), false, "box") || !st.get(stats, 1, sizeof(SearchStats), true, "stats"))
+        return nullptr;
+    GraphSolver* solver = self->solver;
+    return run_search(self, [&](std::vector<int>& path) {
+        solver->box_path(b.data<int>(), start, goal, path, st.data<SearchStats>());
+    });
+}
+
+static PyObject* Graph_solve_many(GraphObject* self, PyObject* args) {
+    PyObject *starts, *goals, *h_values, *offsets, *stats;
+    int k, adaptive, mode, classic, threads;
+    if (!PyArg_ParseTuple(args, "OOiiiOiiOO", &starts, &goals, &k, &adaptive, &mode, &h_values, &classic, &threads,
+                          &offsets, &stats)) return nullptr;
+    BufferArg s, g, h, out, st;
+    if (!s.get(starts, 0, sizeof(int), false, "starts") || !g.get(goals, 0, sizeof(int), false, "goals")) return nullptr;
+    Py_ssize_t n = s.view.len / (Py_ssize_t)sizeof(int);
+    if (g.view.len != s.view.len) {
+        PyErr_SetString(PyExc_ValueError, "starts and goals must have the same length");
+        return nullptr;
+    }
+    if (!out.get(offsets, n + 1, sizeof(int), true, "offsets") || !heuristic_and_stats(self, h_values, stats, h, st))
+        return nullptr;
+    GraphSolver* solver = self->solver;
+    std::vector<int>* paths = nullptr;
+    // One shared hold for the whole batch; the worker threads take no lock of their own.
+    read_graph(self, [&] {
+        paths = solver->solve_many(s.data<int>(), g.data<int>(), (int)n, k, adaptive, mode, h.data<float>(), classic,
+                                   threads, out.data<int>(), st.data<SearchStats>());
+    });
+    return new_path(paths);
+}
+
+// A budgeted search of a Graph, see GraphSolver::resume_search.
+struct SearchObject {
+    PyObject_HEAD
+    GraphObject* graph;
+    BoundedSearch* search;
+    BufferArg* h_values;  // held for the lifetime of the search
+};
+
+static PyTypeObject SearchType = {PyVarObject_HEAD_INIT(nullptr, 0)};
+
+static PyObject* Graph_begin_search(GraphObject* self, PyObject* args) {
+    int start, goal, k, adaptive, classic, mode;
+    PyObject* h_values;
+    if (!PyArg_ParseTuple(args, "iiiipiO", &start, &goal, &k, &adaptive, &classic, &mode, &h_values)) return nullptr;
+    auto h = std::make_unique<BufferArg>();
+    if (!h->get(h_values, self->solver->num_nodes, sizeof(float), false, "h_values")) return nullptr;
+    GraphSolver* solver = self->solver;
+    BoundedSearch* handle = nullptr;
+    read_graph(self, [&] { handle = solver->begin_search(start, goal, k, adaptive, classic, mode, h->data<float>()); });
+    auto* search = PyObject_New(SearchObject, &SearchType);
+    if (!search) {
+        solver->end_search(handle);
+        return nullptr;
+    }
+    Py_INCREF(self);
+    search->graph = self;
+    search->search = handle;
+    search->h_values = h.release();
+    return (PyObject*)search;
+}
+
+static void Search_dealloc(SearchObject* self) {
+    self->graph->solver->end_search(self->search);
+    delete self->h_values;
+    Py_DECREF(self->graph);
+    PyObject_Free(self);
+}
+
+static PyObject* Search_resume(SearchObject* self, PyObject* args) {
+    long long max_expansions, deadline_us;
+    PyObject* stats;
+    if (!PyArg_ParseTuple(args, "LLO", &max_expansions, &deadline_us, &stats)) return nullptr;
+    BufferArg st;
+    if (!st.get(stats, 1, sizeof(SearchStats), true, "stats")) return nullptr;
+    GraphSolver* solver = self->graph->solver;
+    BoundedSearch* search = self->search;
+    auto ids = std::make_unique<std::vector<int>>();
+    int status = 0;
+    read_graph(self->graph, [&] {
+        status = solver->resume_search(*search, max_expansions, deadline_us, *ids, st.data<SearchStats>());
+    });
+    PyObject* path = new_path(ids.release());
+    return path ? Py_BuildValue("iN", status, path) : nullptr;
+}
+
+static PyMethodDef Search_methods[] = {
+    {"resume", (PyCFunction)guarded<Search_resume>, METH_VARARGS,
+     "resume(max_expansions, deadline_us, stats) -> (status, Path); negative limits mean none."},
+    {nullptr, nullptr, 0, nullptr}
+};
+
+// A D* Lite replanner over a Graph, see Replanner.
+struct ReplannerObject {
+    PyObject_HEAD
+    GraphObject* graph;
+    Replanner* replanner;
+};
+
+static PyTypeObject ReplannerType = {PyVarObject_HEAD_INIT(nullptr, 0)};
+
+static PyObject* Graph_replanner(GraphObject* self, PyObject* args) {
+    int start, goal, mode;
+    if (!PyArg_ParseTuple(args, "iii", &start, &goal, &mode)) return nullptr;
+    GraphSolver* solver = self->solver;
+    std::unique_ptr<Replanner> handle;
+    read_graph(self, [&] { handle = std::make_unique<Replanner>(solver, start, goal, mode); });
+    auto* replanner = PyObject_New(ReplannerObject, &ReplannerType);
+    if (!replanner) return nullptr;
+    Py_INCREF(self);
+    replanner->graph = self;
+    replanner->replanner = handle.release();
+    return (PyObject*)replanner;
+}
+
+static void Replanner_dealloc(ReplannerObject* self) {
+    delete self->replanner;
+    Py_DECREF(self->graph);
+    PyObject_Free(self);
+}
+
+static PyObject* Replanner_move(ReplannerObject* self, PyObject* args) {
+    int start;
+    if (!PyArg_ParseTuple(args, "i", &start)) return nullptr;
+    Replanner* replanner = self->replanner;
+    read_graph(self->graph, [&] { replanner->move(start); });
+    Py_RETURN_NONE;
+}
+
+static PyObject* Replanner_plan(ReplannerObject* self, PyObject* stats) {
+    BufferArg st;
+    if (!st.get(stats, 1, sizeof(SearchStats), true, "stats")) return nullptr;
+    Replanner* replanner = self->replanner;
+    return run_search(self->graph, [&](std::vector<int>& path) { replanner->plan(path, st.data<SearchStats>()); });
+}
+
+static PyMethodDef Replanner_methods[] = {
+    {"move", (PyCFunction)guarded<Replanner_move>, METH_VARARGS, "move(start): the next plan starts from node `start`."},
+    {"plan", (PyCFunction)guarded<Replanner_plan>, METH_O,
+     "plan(stats) -> Path from the start to the goal, empty if there is none; repairs the search first."},
+    {nullptr, nullptr, 0, nullptr}
+};
+
+static PyObject* Graph_version(GraphObject* self, void*) { return PyLong_FromUnsignedLong(self->solver->version); }
+
+static PyObject* Graph_num_edges(GraphObject* self, void*) {
+    GraphSolver* solver = self->solver;
+    int edges = 0;
+    read_graph(self, [&] { edges = solver->num_edges(); });
+    return PyLong_FromLong(edges);
+}
+
+static PyObject* Graph_memory_bytes(GraphObject* self, void*) {
+    GraphSolver* solver = self->solver;
+    size_t bytes = 0;
+    read_graph(self, [&] { bytes = solver->memory_bytes(); });
+    return PyLong_FromSize_t(bytes);
+}
+
+static PyObject* Graph_finalized(GraphObject* self, void*) { return PyBool_FromLong(self->solver->is_finalized()); }
+static PyObject* Graph_borrowed(GraphObject* self, void*) { return PyBool_FromLong(self->solver->is_borrowed()); }
+static PyObject* Graph_supports_jps(GraphObject* self, void*) { return PyBool_FromLong(self->solver->supports_jps()); }
+static PyObject* Graph_num_landmarks(GraphObject* self, void*) { return PyLong_FromLong(self->solver->num_landmarks); }
+static PyObject* Graph_workspace_count(GraphObject* self, void*) { return PyLong_FromLong(self->solver->workspace_count()); }
+static PyObject* Graph_workspace_bytes(GraphObject* self, void*) {
+    return PyLong_FromSize_t(self->solver->workspace_bytes());
+}
+
+static PyObject* Graph_num_components(GraphObject* self, void*) {
+    GraphSolver* solver = self->solver;
+    int count = 0;
+    read_components(self, [&] { count = solver->num_components; });
+    return PyLong_FromLong(count);
+}
+
+static PyObject* Graph_get_open_list(GraphObject* self, void*) { return PyLong_FromLong(self->solver->open_list); }
+
+static int Graph_set_open_list(GraphObject* self, PyObject* value, void*) {
+    long kind = value ? PyLong_AsLong(value) : -1;
+    if (kind == -1 && PyErr_Occurred()) return -1;
+    if (kind < OPEN_BINARY || kind > OPEN_RADIX) {
+        PyErr_SetString(PyExc_ValueError, "unknown open list");
+        return -1;
+    }
+    self->solver->open_list = (int)kind;
+    return 0;
+}
+
+static PyMethodDef Graph_methods[] = {
+    {"grid", (PyCFunction)guarded<Graph_grid>, METH_VARARGS | METH_CLASS,
+     "grid(cells, width, height, connectivity, corner_cutting) -> Graph over a row-major walkability bitmap."},
+    {"from_image", (PyCFunction)guarded<Graph_from_image>, METH_VARARGS | METH_CLASS,
+     "from_image(fields, arrays, owner) -> Graph saved by export(); the arrays are borrowed while `owner` (kept) "
+     "is not None, copied otherwise."},
+    {"export", (PyCFunction)guarded<Graph_export>, METH_NOARGS,
+     "export() -> (fields, arrays): the image counts and its arrays as bytes (None if unused)."},
+    {"add_edge", (PyCFunction)guarded<Graph_add_edge>, METH_VARARGS,
+     "add_edge(u, v, weight): adds an edge, packed in before the next search."},
+    {"add_edges", (PyCFunction)guarded<Graph_add_edges>, METH_VARARGS,
+     "add_edges(src, dst, weights): adds the edges of parallel int / float buffers (weights None: 1)."},
+    {"set_csr", (PyCFunction)guarded<Graph_set_csr>, METH_VARARGS,
+     "set_csr(indptr, indices, weights): replaces the edges with a CSR matrix (weights None: 1)."},
+    {"finalize", (PyCFunction)guarded<Graph_finalize>, METH_NOARGS, "finalize(): packs the edges added one at a time."},
+    {"set_edge", (PyCFunction)guarded<Graph_set_edge>, METH_VARARGS,
+     "set_edge(u, v, weight): sets the u -> v weight in place, adding the edge if it is missing."},
+    {"remove_edge", (PyCFunction)guarded<Graph_remove_edge>, METH_VARARGS,
+     "remove_edge(u, v) -> number of u -> v edges removed."},
+    {"set_walkable", (PyCFunction)guarded<Graph_set_walkable>, METH_VARARGS,
+     "set_walkable(cell, walkable) -> False unless the graph is a grid with that cell."},
+    {"component_labels", (PyCFunction)guarded<Graph_component_labels>, METH_VARARGS,
+     "component_labels(strong, out): writes the component label of every node into `out`."},
+    {"release_workspaces", (PyCFunction)guarded<Graph_release_workspaces>, METH_NOARGS,
+     "release_workspaces(): frees the idle search workspaces."},
+    {"distance_field", (PyCFunction)guarded<Graph_distance_field>, METH_VARARGS,
+     "distance_field(goal, dist, next_hop, stats) -> whether the goal is a valid node; fills the costs to the goal "
+     "and the next hops (next_hop may be None)."},
+    {"build_landmarks", (PyCFunction)guarded<Graph_build_landmarks>, METH_VARARGS,
+     "build_landmarks(count, landmarks, threads) -> number of landmarks; landmarks None picks them."},
+    {"rebuild_landmarks", (PyCFunction)guarded<Graph_rebuild_landmarks>, METH_VARARGS,
+     "rebuild_landmarks(threads) -> number of landmarks whose dropped tables were recomputed."},
+    {"landmark_tables", (PyCFunction)guarded<Graph_landmark_tables>, METH_VARARGS,
+     "landmark_tables(ids, dist_from, dist_to): copies the landmarks and their tables (each may be None)."},
+    {"set_landmarks", (PyCFunction)guarded<Graph_set_landmarks>, METH_VARARGS,
+     "set_landmarks(ids, dist_from, dist_to): installs tables saved by landmark_tables."},
+    {"set_heuristic", (PyCFunction)guarded<Graph_set_heuristic>, METH_O,
+     "set_heuristic(h): h(node, goal) -> float for heuristic mode 4, or None; memoized values are dropped."},
+    {"solve", (PyCFunction)guarded<Graph_solve>, METH_VARARGS,
+     "solve(start, goal, k, adaptive, h_mode, h_values, stats) -> Path; empty if there is none."},
+    {"solve_bounded", (PyCFunction)guarded<Graph_solve_bounded>, METH_VARARGS,
+     "solve_bounded(start, goal, k, adaptive, weight, focal, h_mode, h_values, stats) -> Path costing at most "
+     "weight times the optimal one (admissible heuristics)."},
+    {"solve_classic", (PyCFunction)guarded<Graph_solve_classic>, METH_VARARGS,
+     "solve_classic(start, goal, h_mode, h_values, stats) -> Path"},
+    {"solve_bidirectional", (PyCFunction)guarded<Graph_solve_bidirectional>, METH_VARARGS,
+     "solve_bidirectional(start, goal, k, h_mode, h_values, stats) -> Path"},
+    {"solve_jps", (PyCFunction)guarded<Graph_solve_jps>, METH_VARARGS, "solve_jps(start, goal, waypoints, stats) -> Path"},
+    {"solve_between", (PyCFunction)guarded<Graph_solve_between>, METH_VARARGS,
+     "solve_between(sources, source_costs, targets, target_costs, h_goal, h_mode, h_values, stats) -> Path from "
+     "the cheapest source to the cheapest target, the costs counting at either end."},
+    {"box_distances", (PyCFunction)guarded<Graph_box_distances>, METH_VARARGS,
+     "box_distances(box, sources, targets, out, stats): out[i * len(targets) + j] = grid distance from sources[i] "
+     "to targets[j] inside box (x0, y0, x1, y1), inf if unreachable there."},
+    {"box_path", (PyCFunction)guarded<Graph_box_path>, METH_VARARGS,
+     "box_path(box, start, goal, stats) -> Path inside box (x0, y0, x1, y1); empty if there is none."},
+    {"solve_many", (PyCFunction)guarded<Graph_solve_many>, METH_VARARGS,
+     "solve_many(starts, goals, k, adaptive, h_mode, h_values, classic, threads, offsets, stats) -> Path of all "
+     "paths; query i owns [offsets[i], offsets[i + 1])."},
+    {"begin_search", (PyCFunction)guarded<Graph_begin_search>, METH_VARARGS,
+     "begin_search(start, goal, k, adaptive, classic, h_mode, h_values) -> Search; nothing is searched before "
+     "its resume()."},
+    {"replanner", (PyCFunction)guarded<Graph_replanner>, METH_VARARGS,
+     "replanner(start, goal, h_mode) -> Replanner keeping a shortest path to `goal` up to date."},
+    {nullptr, nullptr, 0, nullptr}
+};
+
+static PyGetSetDef Graph_getset[] = {
+    {"version", (getter)guarded<Graph_version>, nullptr, "Graph version, bumped by every change.", nullptr},
+    {"num_edges", (getter)guarded<Graph_num_edges>, nullptr, "Number of edges (legal moves on grids).", nullptr},
+    {"memory_bytes", (getter)guarded<Graph_memory_bytes>, nullptr, "Bytes held by the graph storage.", nullptr},
+    {"finalized", (getter)guarded<Graph_finalized>, nullptr, "False while edges added one at a time wait to be packed.", nullptr},
+    {"borrowed", (getter)guarded<Graph_borrowed>, nullptr, "True while arrays of a borrowed image are in use.", nullptr},
+    {"supports_jps", (getter)guarded<Graph_supports_jps>, nullptr, "True for 8-connected grids without corner cutting.", nullptr},
+    {"num_landmarks", (getter)guarded<Graph_num_landmarks>, nullptr, "Number of landmarks with ALT tables.", nullptr},
+    {"num_components", (getter)guarded<Graph_num_components>, nullptr, "Number of weakly connected components.", nullptr},
+    {"workspace_count", (getter)guarded<Graph_workspace_count>, nullptr, "Number of idle search workspaces.", nullptr},
+    {"workspace_bytes", (getter)guarded<Graph_workspace_bytes>, nullptr, "Bytes held by the idle search workspaces.", nullptr},
+    {"open_list", (getter)guarded<Graph_get_open_list>, (setter)guarded<Graph_set_open_list>,
+     "OpenList of the A* searches: 0 binary, 1 quaternary, 2 radix.", nullptr},
+    {nullptr, nullptr, nullptr, nullptr, nullptr}
+};
+
+// parse_map(data) -> (status, width, height, cells): see parse_movingai_map; `cells` is a
+// bytearray of width * height walkability bytes, None unless the header was read.
+static PyObject* parse_map(PyObject*, PyObject* data) {
+    BufferArg text;
+    if (!text.require(data, 0, 1, false, "data")) return nullptr;
+    const char* chars = text.data<const char>();
+    int width = 0, height = 0;
+    int status = parse_movingai_map(chars, text.view.len, &width, &height, nullptr);
+    if (status) return Py_BuildValue("iiiO", status, width, height, Py_None);
+    PyObject* cells = PyByteArray_FromStringAndSize(nullptr, (Py_ssize_t)width * height);
+    if (!cells) return nullptr;
+    auto* bytes = (uint8_t*)PyByteArray_AS_STRING(cells);
+    try {
+        without_gil([&] { status = parse_movingai_map(chars, text.view.len, &width, &height, bytes); });
+    } catch (...) {
+        Py_DECREF(cells);
+        throw;
+    }
+    return Py_BuildValue("iiiN", status, width, height, cells);
+}
+
+// parse_scenarios(data, fields, optimal) -> count: see parse_movingai_scenarios, with the
+// capacity of the `fields` (7 ints per scenario) and `optimal` (doubles) buffers.
+static PyObject* parse_scenarios(PyObject*, PyObject* args) {
+    PyObject *data, *fields, *optimal;
+    if (!PyArg_ParseTuple(args, "OOO", &data, &fields, &optimal)) return nullptr;
+    BufferArg text, f, o;
+    if (!text.require(data, 0, 1, false, "data") || !f.require(fields, 0, sizeof(int), true, "fields") ||
+        !o.require(optimal, 0, sizeof(double), true, "optimal")) return nullptr;
+    int capacity = (int)std::min(f.count(7 * sizeof(int)), o.count(sizeof(double)));
+    int count = 0;
+    without_gil([&] {
+        count = parse_movingai_scenarios(text.data<const char>(), text.view.len, f.data<int>(), o.data<double>(),
+                                         capacity);
+    });
+    return PyLong_FromLong(count);
+}
+
+static PyMethodDef backend_methods[] = {
+    {"parse_map", (PyCFunction)guarded<parse_map>, METH_O,
+     "parse_map(data) -> (status, width, height, cells) of MovingAI .map text; status 0, -1 (bad header) or -2 "
+     "(missing or short rows)."},
+    {"parse_scenarios", (PyCFunction)guarded<parse_scenarios>, METH_VARARGS,
+     "parse_scenarios(data, fields, optimal) -> number of scenarios of .scen text, or -(line) of the first "
+     "malformed one."},
+    {nullptr, nullptr, 0, nullptr}
+};
+
+static PyModuleDef backend_module = {PyModuleDef_HEAD_INIT, "_cpp_backend", "Native Batch A* solver.", -1,
+                                     backend_methods};
+
+PyMODINIT_FUNC PyInit__cpp_backend() {
+    PathType.tp_name = "astart._cpp_backend.Path";
+    PathType.tp_doc = "Node ids of a path, as a read-only int buffer.";
+    PathType.tp_basicsize = sizeof(PathObject);
+    PathType.tp_flags = Py_TPFLAGS_DEFAULT;
+    PathType.tp_dealloc = (destructor)Path_dealloc;
+    PathType.tp_as_sequence = &Path_as_sequence;
+    PathType.tp_as_buffer = &Path_as_buffer;
+
+    GraphType.tp_name = "astart._cpp_backend.Graph";
+    GraphType.tp_doc = "Graph(num_nodes, width=0): a native graph without edges; see also Graph.grid and "
+                       "Graph.from_image.";
+    GraphType.tp_basicsize = sizeof(GraphObject);
+    GraphType.tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC;
+    GraphType.tp_new = guarded<Graph_new>;
+    GraphType.tp_dealloc = (destructor)Graph_dealloc;
+    GraphType.tp_traverse = (traverseproc)Graph_traverse;
+    GraphType.tp_clear = (inquiry)Graph_clear;
+    GraphType.tp_methods = Graph_methods;
+    GraphType.tp_getset = Graph_getset;
+
+    SearchType.tp_name = "astart._cpp_backend.Search";
+    SearchType.tp_doc = "A budgeted search, from Graph.begin_search.";
+    SearchType.tp_basicsize = sizeof(SearchObject);
+    SearchType.tp_flags = Py_TPFLAGS_DEFAULT;
+    SearchType.tp_dealloc = (destructor)Search_dealloc;
+    SearchType.tp_methods = Search_methods;
+
+    ReplannerType.tp_name = "astart._cpp_backend.Replanner";
+    ReplannerType.tp_doc = "An incremental (D* Lite) search, from Graph.replanner.";
+    ReplannerType.tp_basicsize = sizeof(ReplannerObject);
+    ReplannerType.tp_flags = Py_TPFLAGS_DEFAULT;
+    ReplannerType.tp_dealloc = (destructor)Replanner_dealloc;
+    ReplannerType.tp_methods = Replanner_methods;
+
+    if (PyType_Ready(&PathType) < 0 || PyType_Ready(&GraphType) < 0 || PyType_Ready(&SearchType) < 0 ||
+        PyType_Ready(&ReplannerType) < 0) return nullptr;
+    PyObject* module = PyModule_Create(&backend_module);
+    if (!module) return nullptr;
+    PyTypeObject* types[] = {&PathType, &GraphType, &SearchType, &ReplannerType};
+    for (PyTypeObject* type : types) {
+        Py_INCREF(type);
+        if (PyModule_AddObject(module, strrchr(type->tp_name, '.') + 1, (PyObject*)type) < 0) {
+            Py_DECREF(type);
+            Py_DECREF(module);
+            return nullptr;
+        }
     }
+    return module;
 }
@@ -0,0 +1,168 @@
+import heapq
+import time
+from array import array
+
+_INF = float('inf')
+_SQRT2_MINUS_2 = 2 ** 0.5 - 2
+# Search counters, in the order of the native SearchStats.
+_COUNTERS = ('nodes_expanded', 'heap_pushes', 'heap_pops', 'stale_pops', 'heuristic_calls', 'heuristic_evals',
+             'batch_steps', 'pivots_pushed')
+
+class PythonGraph:
+    """Pure-Python search engine behind `AStart` when the C++ backend is unavailable.
+
+    Nodes are the dense ids assigned by `AStart`; `neighbors[u]` lists the
+    ``(v, weight)`` pairs leaving u. Every search keeps its state in flat arrays
+    indexed by node id (``array('d')`` g values, ``array('i')`` parents and a
+    ``bytearray`` of closed flags), allocated per query, so concurrent queries
+    share nothing. The searches follow the native ones step for step: the same
+    batch expansion, pivot rules and ``(f, node)`` heap order.
+    """
+    def __init__(self, num_nodes, neighbors, coords=None):
+        self.num_nodes = num_nodes
+        self.neighbors = neighbors
+        # (xs, ys) coordinate arrays when the nodes are (x, y) cells
+        self.coords = coords
+
+    @classmethod
+    def from_dict(cls, graph, node_to_id, num_nodes):
+        neighbors = [() for _ in range(num_nodes)]
+        for u, nbrs in graph.items():
+            u_id = node_to_id[u]
+            neighbors[u_id] = tuple((node_to_id[v], float(w)) for v, w in nbrs.items() if v in node_to_id)
+        coords = None
+        first = next(iter(node_to_id), None)
+        if isinstance(first, tuple) and len(first) == 2:
+            xs, ys = array('d', bytes(8 * num_nodes)), array('d', bytes(8 * num_nodes))
+            for (x, y), i in node_to_id.items():
+                xs[i], ys[i] = x, y
+            coords = (xs, ys)
+        return cls(num_nodes, neighbors, coords)
+
+    def distance_heuristic(self, kind, goal):
+        """`h(u)` for 'manhattan' or 'octile' towards `goal`, None without (x, y) nodes."""
+        if self.coords is None: return None
+        xs, ys = self.coords
+        gx, gy = xs[goal], ys[goal]
+        if kind == 'manhattan':
+            return lambda u: abs(xs[u] - gx) + abs(ys[u] - gy)
+        def octile(u):
+            dx, dy = abs(xs[u] - gx), abs(ys[u] - gy)
+            return dx + dy + _SQRT2_MINUS_2 * (dx if dx < dy else dy)
+        return octile
+
+    def search(self, start, goal, k, adaptive, h, stats=None):
+        """Batch A* (classic A* when `k` is None); returns the list of node ids or None.
+
+        `h` maps a node id to its heuristic value, None for no heuristic. With
+        `stats` (a dict), the search counters are stored into it.
+        """
+        counters = dict.fromkeys(_COUNTERS, 0)
+        if h is None:
+            h = lambda u: 0.0
+        elif stats is not None:
+            inner = h
+            def h(u):
+                counters['heuristic_calls'] += 1
+                return inner(u)
+        t0 = time.perf_counter()
+        if k is None: path = self._classic(start, goal, h, counters)
+        else: path = self._batch(start, goal, k, adaptive, h, counters)
+        if stats is not None:
+            # Python heuristics are not memoized: every call is an evaluation.
+            counters['heuristic_evals'] = counters['heuristic_calls']
+            stats.clear()
+            stats.update(counters)
+            stats['time_us'] = (time.perf_counter() - t0) * 1e6
+        return path
+
+    def _classic(self, start, goal, h, counters):
+        n = self.num_nodes
+        g = array('d', [_INF]) * n
+        parent = array('i', [-1]) * n
+        closed = bytearray(n)
+        neighbors = self.neighbors
+        push, pop = heapq.heappush, heapq.heappop
+        g[start] = 0.0
+        open_set = [(h(start), start)]
+        pushes, pops, stale, expanded = 1, 0, 0, 0
+        try:
+            while open_set:
+                u = pop(open_set)[1]
+                pops += 1
+                if closed[u]:
+                    stale += 1
+                    continue
+                closed[u] = 1
+                if u == goal: return _trace(parent, u)
+                expanded += 1
+                g_u = g[u]
+                for v, w in neighbors[u]:
+                    tentative = g_u + w
+                    if tentative < g[v]:
+                        g[v] = tentative
+                        parent[v] = u
+                        push(open_set, (tentative + h(v), v))
+                        pushes += 1
+            return None
+        finally:
+            counters.update(nodes_expanded=expanded, heap_pushes=pushes, heap_pops=pops, stale_pops=stale)
+
+    def _batch(self, start, goal, k, adaptive, h, counters):
+        n = self.num_nodes
+        g = array('d', [_INF]) * n
+        parent = array('i', [-1]) * n
+        closed = bytearray(n)
+        neighbors = self.neighbors
+        push, pop = heapq.heappush, heapq.heappop
+        g[start] = 0.0
+        open_set = [(h(start), start)]
+        pushes, pops, stale, expanded, steps, pivots_pushed = 1, 0, 0, 0, 0, 0
+        try:
+            while open_set:
+                current = pop(open_set)[1]
+                pops += 1
+                if closed[current]:
+                    stale += 1
+                    continue
+                closed[current] = 1
+                if current == goal: return _trace(parent, current)
+
+                frontier = [current]
+                pivots = []
+                for step in range(k):
+                    steps += 1
+                    next_frontier = []
+                    for u in frontier:
+                        expanded += 1
+                        h_u = h(u) if adaptive else 0.0
+                        g_u = g[u]
+                        for v, w in neighbors[u]:
+                            tentative = g_u + w
+                            if tentative < g[v]:
+                                g[v] = tentative
+                                parent[v] = u
+                                # The goal waits in the heap: a later batch step may still reach it more cheaply.
+                                if (adaptive and h(v) > h_u) or v == goal: pivots.append(v)
+                                else: next_frontier.append(v)
+                    if not next_frontier:
+                        pivots.extend(frontier)
+                        break
+                    frontier = next_frontier
+                    if step == k - 1: pivots.extend(frontier)
+                for p in pivots:
+                    push(open_set, (g[p] + h(p), p))
+                pushes += len(pivots)
+                pivots_pushed += len(pivots)
+            return None
+        finally:
+            counters.update(nodes_expanded=expanded, heap_pushes=pushes, heap_pops=pops, stale_pops=stale, batch_steps=steps,
+                            pivots_pushed=pivots_pushed)
+
+def _trace(parent, node):
+    path = []
+    while node != -1:
+        path.append(node)
+        node = parent[node]
+    path.reverse()
+    return path
@@ -0,0 +1,196 @@
+import time
+from array import array
+from collections import defaultdict
+
+from .solver import AStart
+
+_INF = float('inf')
+
+class HierarchicalSolver:
+    """HPA* over a grid solver from `AStart.from_grid`, for maps too large to search cell by cell.
+
+    The grid is cut into `cluster_size` x `cluster_size` clusters. Every free
+    stretch along a border between two clusters is an entrance, crossed by one
+    transition in its middle, or one at each end once it is `long_entrance`
+    cells or longer. The abstract graph (`abstract`, an `AStart` over the
+    transition cells) links the two cells of each transition and every pair of
+    transitions of a cluster at their shortest distance inside the cluster,
+    found by native searches confined to it.
+
+    Queries link start and goal to the transitions of their clusters, search
+    the abstract graph and return a `HierarchicalPath`, whose cells are only
+    searched for, one cluster at a time, as they are consumed. Paths are
+    optimal on the abstract graph, usually within a few percent of the grid
+    optimum since they cross borders at transitions only.
+
+    Changing the grid (`AStart.set_walkable`, `AStart.set_edge`) rebuilds the
+    clusters on the next `solve`; paths planned before the change can no
+    longer be refined and raise RuntimeError.
+    """
+    def __init__(self, solver, cluster_size=32, long_entrance=6):
+        solver._require_cpp("HierarchicalSolver")
+        if solver._grid_shape is None: raise ValueError("HierarchicalSolver needs a grid solver from AStart.from_grid")
+        if cluster_size < 2: raise ValueError("cluster_size must be at least 2")
+        self.solver = solver
+        self.cluster_size = cluster_size
+        self.long_entrance = long_entrance
+        height, width = solver._grid_shape
+        self._width, self._height = width, height
+        self._clusters_x = -(-width // cluster_size)
+        self._build()
+
+    def _build(self):
+        """Find the entrances and transitions and build `abstract` for the current grid."""
+        t0 = time.perf_counter()
+        solver, long_entrance = self.solver, self.long_entrance
+        width, height = self._width, self._height
+        self._version = solver._native.version
+        free = solver.component_labels()
+
+        transitions = defaultdict(set)
+        src, dst, wts = array('i'), array('i'), array('f')
+        def link(run):
+            for a, b in ([run[len(run) // 2]] if len(run) < long_entrance else [run[0], run[-1]]):
+                transitions[self._cluster(a)].add(a)
+                transitions[self._cluster(b)].add(b)
+                src.extend((a, b)); dst.extend((b, a)); wts.extend((1.0, 1.0))
+        for border in self._borders():
+            run = []
+            for a, b in border:
+                if free[a] >= 0 and free[b] >= 0:
+                    run.append((a, b))
+                elif run:
+                    link(run)
+                    run = []
+            if run: link(run)
+
+        # Transition-to-transition distances inside each cluster, one native call per cluster
+        self._transitions = {}
+        self._costs = {}
+        for cluster, cells in transitions.items():
+            cells = self._transitions[cluster] = array('i', sorted(cells))
+            dist = self._distances(cluster, cells, cells)
+            n = len(cells)
+            for i, a in enumerate(cells):
+                for b, d in zip(cells, dist[i * n:(i + 1) * n]):
+                    if d < _INF and a != b:
+                        src.append(a); dst.append(b); wts.append(d)
+                        self._costs[a, b] = d
+
+        h = solver.h if solver.h in ('manhattan', 'octile') else 'octile'
+        self.abstract = AStart.from_edges(src, dst, wts, num_nodes=width * height, heuristic_func=h, width=width)
+        self.abstract.finalize()
+        self.num_transitions = sum(len(cells) for cells in self._transitions.values())
+        self.build_time = time.perf_counter() - t0
+
+    def _cluster(self, cell):
+        size = self.cluster_size
+        return (cell // self._width) // size * self._clusters_x + (cell % self._width) // size
+
+    def _box(self, cluster):
+        size = self.cluster_size
+        x0, y0 = cluster % self._clusters_x * size, cluster // self._clusters_x * size
+        return array('i', (x0, y0, min(x0 + size, self._width), min(y0 + size, self._height)))
+
+    def _borders(self):
+        """(cell, neighbour across the border) pairs along each shared border segment between clusters."""
+        size, width, height = self.cluster_size, self._width, self._height
+        for x in range(size, width, size):
+            for y0 in range(0, height, size):
+                yield [(y * width + x - 1, y * width + x) for y in range(y0, min(y0 + size, height))]
+        for y in range(size, height, size):
+            for x0 in range(0, width, size):
+                yield [((y - 1) * width + x, y * width + x) for x in range(x0, min(x0 + size, width))]
+
+    def _distances(self, cluster, sources, targets):
+        out = array('f', bytes(4 * len(sources) * len(targets)))
+        if out: self.solver._native.box_distances(self._box(cluster), sources, targets, out, None)
+        return out
+
+    def solve(self, start, goal):
+        """Path from `start` to `goal` as a `HierarchicalPath`, or None if there is none."""
+        solver = self.solver
+        if solver._native.version != self._version: self._build()
+        s, g = solver._lookup(start), solver._lookup(goal)
+        if s is None or g is None: return None
+        s_label, g_label = solver.component_of(start), solver.component_of(goal)
+        if s_label < 0 or s_label != g_label: return None
+        s_cluster, g_cluster = self._cluster(s), self._cluster(g)
+        empty = array('i')
+        exits = self._transitions.get(s_cluster, empty)
+        entries = self._transitions.get(g_cluster, empty)
+        sources, targets = array('i', exits), array('i', entries)
+        source_costs = self._distances(s_cluster, array('i', [s]), exits)
+        target_costs = self._distances(g_cluster, array('i', [g]), entries)
+        if s_cluster == g_cluster:
+            # The path inside the cluster competes as the goal seeded with its own cost
+            local = self._distances(s_cluster, array('i', [s]), array('i', [g]))[0]
+            if local < _INF:
+                sources.append(g); source_costs.append(local)
+                targets.append(g); target_costs.append(0.0)
+        if not sources or not targets: return None
+
+        abstract = self.abstract
+        h_mode, h_values = abstract._native_heuristic(g)
+        nodes = abstract._native_call(
+            abstract._native.solve_between, sources, source_costs, targets, target_costs, g, h_mode, h_values
+        )
+        if not nodes: return None
+        nodes = memoryview(nodes).tolist()
+        cost = source_costs[sources.index(nodes[0])] + target_costs[targets.index(nodes[-1])]
+        cost += sum(self._costs.get((u, v), 1.0) for u, v in zip(nodes, nodes[1:]))
+        waypoints = [s]
+        for node in nodes + [g]:
+            if node != waypoints[-1]: waypoints.append(node)
+        return HierarchicalPath(self, waypoints, cost, self._version)
+
+    def _refine(self, a, b, version):
+        """Cells from `a` up to (excluding) `b`, two waypoints of a path planned on grid `version`."""
+        if self.solver._native.version != version:
+            raise RuntimeError("the grid changed since this path was planned; solve again")
+        cluster = self._cluster(a)
+        if cluster != self._cluster(b): return [a]
+        path = memoryview(self.solver._native_call(self.solver._native.box_path, self._box(cluster), a, b))
+        if not path: raise RuntimeError(f"no path between waypoints {a} and {b} inside their cluster")
+        return path[:-1].tolist()
+
+class HierarchicalPath:
+    """A path from `HierarchicalSolver.solve`: abstract waypoints now, grid cells on demand.
+
+    Iterating yields the ``(x, y)`` cells, searching each segment between two
+    waypoints only when it is reached, so an agent that replans after a few
+    steps pays for the first segments only. `cost` is the exact cost of the
+    cell path; `refined` counts the segments searched so far.
+    """
+    def __init__(self, hpa, waypoints, cost, version):
+        self._hpa = hpa
+        self._version = version
+        self._ids = waypoints
+        self._segments = [None] * (len(waypoints) - 1)
+        self.cost = cost
+        self.refined = 0
+
+    @property
+    def waypoints(self):
+        """Start, the transitions crossed, and goal, as ``(x, y)`` cells."""
+        width = self._hpa._width
+        return [(i % width, i // width) for i in self._ids]
+
+    def segment(self, i):
+        """Cells of segment `i`, from waypoint i up to (excluding) waypoint i + 1."""
+        cells = self._segments[i]
+        if cells is None:
+            width = self._hpa._width
+            cells = self._segments[i] = [(c % width, c // width) for c in self._hpa._refine(self._ids[i], self._ids[i + 1], self._version)]
+            self.refined += 1
+        return cells
+
+    def __iter__(self):
+        for i in range(len(self._segments)):
+            yield from self.segment(i)
+        goal = self._ids[-1]
+        yield (goal % self._hpa._width, goal // self._hpa._width)
+
+    def cells(self):
+        """The whole path as a list of ``(x, y)`` cells (refines every segment)."""
+        return list(self)
@@ -0,0 +1,44 @@
+"""Readers for the MovingAI benchmark formats: ``.map`` grids and ``.scen`` scenario files.
+
+Both are parsed by the C++ backend straight from the file bytes, without a
+Python loop over cells or lines.
+"""
+from array import array
+from collections import namedtuple
+
+from .solver import AStart, _cpp_lib, _open_file
+
+# One query of a .scen file; `optimal` is the published optimal length (octile, no corner cutting).
+Scenario = namedtuple('Scenario', 'bucket start goal optimal')
+
+def _read(file):
+    if not _cpp_lib: raise RuntimeError("C++ Backend requested but not found!")
+    with _open_file(file, 'rb') as f:
+        return f.read()
+
+def read_map(file):
+    """Walkability of a ``.map`` file as a ``(height, width)`` memoryview of 0 / 1 bytes.
+
+    '.', 'G' and 'S' cells are walkable; '@', 'O', 'T' (trees) and 'W'
+    (water) are not, matching the published optimal lengths. The view can be
+    passed to `AStart.from_grid` (no copy) or to ``numpy.asarray``.
+    """
+    data = _read(file)
+    status, width, height, cells = _cpp_lib.parse_map(data)
+    if status == -1: raise ValueError("not a MovingAI map: missing width, height or 'map' line")
+    if status: raise ValueError(f"MovingAI map has fewer than {height} rows of {width} cells")
+    return memoryview(cells).cast('B', (height, width))
+
+def load_map(file, connectivity=8, corner_cutting=False, heuristic_func='auto'):
+    """`AStart.from_grid` over `read_map(file)`; the defaults match the MovingAI scenarios."""
+    return AStart.from_grid(read_map(file), connectivity, corner_cutting, heuristic_func)
+
+def read_scenarios(file):
+    """The queries of a ``.scen`` file as a list of `Scenario`, with ``(x, y)`` cells."""
+    data = _read(file)
+    capacity = data.count(b'\n') + 1
+    fields, optimal = array('i', bytes(28 * capacity)), array('d', bytes(8 * capacity))
+    count = _cpp_lib.parse_scenarios(data, fields, optimal)
+    if count < 0: raise ValueError(f"malformed scenario on line {-count}")
+    return [Scenario(fields[i], (fields[i + 3], fields[i + 4]), (fields[i + 5], fields[i + 6]), optimal[j])
+            for j, i in enumerate(range(0, 7 * count, 7))]
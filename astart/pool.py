@@ -0,0 +1,76 @@
+import os
+
+from .solver import AStart
+
+# Solver of the current worker process, attached to the pool's shared graph.
+_worker_solver = None
+
+def _init_worker(name, heuristic_func, started):
+    global _worker_solver
+    _worker_solver = AStart.attach(name, heuristic_func)
+    started.put(os.getpid())
+
+def _solve_chunk(args):
+    starts, goals, k, adaptive, classic = args
+    return _worker_solver.solve_many(starts, goals, k=k, adaptive=adaptive, threads=1, classic=classic)
+
+class SolverPool:
+    """Serve queries from worker processes that all read one shared copy of a solver's graph.
+
+    The graph is copied once into shared memory (see `AStart.share`) and every
+    worker attaches to it without copying, so memory stays flat as workers are
+    added. Callable heuristics are sent to the workers and must be picklable.
+    Use as a context manager, or call `close()`, to stop the workers and free
+    the shared block.
+    """
+    def __init__(self, solver, processes=None, heuristic_func=None, context=None):
+        if heuristic_func is None and callable(solver.h): heuristic_func = solver.h
+        self._block = solver.share()
+        try:
+            import multiprocessing
+            ctx = multiprocessing.get_context(context)
+            self._processes = processes or os.cpu_count() or 1
+            # Each worker reports its pid here once it has attached, see pids.
+            self._started, self._pids = ctx.SimpleQueue(), []
+            self._pool = ctx.Pool(self._processes, initializer=_init_worker,
+                                  initargs=(self._block.name, heuristic_func, self._started))
+        except BaseException:
+            self._release()
+            raise
+
+    @property
+    def pids(self):
+        """Process ids of the workers, waiting for those still starting."""
+        while len(self._pids) < self._processes: self._pids.append(self._started.get())
+        return list(self._pids)
+
+    def solve(self, start, goal, k=1000, adaptive=False, classic=False):
+        return self.solve_many([start], [goal], k, adaptive, classic)[0]
+
+    def solve_many(self, starts, goals, k=1000, adaptive=False, classic=False, chunksize=256):
+        """Paths for ``(starts[i], goals[i])`` (None where unreachable), solved in chunks across the workers."""
+        starts, goals = list(starts), list(goals)
+        if len(starts) != len(goals): raise ValueError("starts and goals must have the same length")
+        chunks = [
+            (starts[i:i + chunksize], goals[i:i + chunksize], k, adaptive, classic)
+            for i in range(0, len(starts), chunksize)
+        ]
+        paths = []
+        for chunk in self._pool.imap(_solve_chunk, chunks): paths.extend(chunk)
+        return paths
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+        self._started.close()
+        self._release()
+
+    def _release(self):
+        self._block.close()
+        self._block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
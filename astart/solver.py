@@ -1,62 +1,700 @@
 import heapq
-import ctypes
 import os
-import glob
-from collections import defaultdict
+import sys
+import operator
+import threading
+from array import array
+from collections import defaultdict, OrderedDict
 import math
+import struct
+import contextlib
+import mmap as _mmap
 
-_cpp_lib = None
-# Find the compiled extension module in the installed package or local folder
-try:
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    # Check for installed location first
-    import astart._cpp_backend as backend
-    _cpp_lib = ctypes.CDLL(backend.__file__)
-except Exception as e:
-    # Fallback to glob for development
+from .fallback import PythonGraph
+
+class _NativeLibrary:
+    """The C++ backend, loaded on first use so that ``import astart`` stays cheap.
+
+    Its attributes are those of the compiled ``astart._cpp_backend`` extension
+    module: the `Graph` type, which owns a native solver, and the MovingAI
+    parsers. It is false when the backend cannot be loaded.
+    """
+    def __init__(self):
+        self._loaded = None
+
+    def __bool__(self):
+        return self._load()
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not self._load(): raise AttributeError(name)
+        value = getattr(self._module, name)
+        self.__dict__[name] = value
+        return value
+
+    def _load(self):
+        if self._loaded is None:
+            self._loaded = False
+            try:
+                import importlib
+                self._module = importlib.import_module('astart._cpp_backend')
+            except ImportError:
+                # Fallback to a library built in place for development
+                import glob
+                import importlib.util
+                current_dir = os.path.dirname(os.path.abspath(__file__))
+                lib_files = glob.glob(os.path.join(current_dir, "*_cpp_backend*")) or \
+                    glob.glob(os.path.join(current_dir, "..", "*_cpp_backend*"))
+                if not lib_files: return False
+                try:
+                    spec = importlib.util.spec_from_file_location('astart._cpp_backend', lib_files[0])
+                    self._module = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(self._module)
+                except Exception:
+                    return False
+            self._loaded = True
+        return self._loaded
+
+_cpp_lib = _NativeLibrary()
+
+# Counters of the native SearchStats struct, in declaration order; all are 64-bit.
+_STATS_FIELDS = (
+    'nodes_expanded', 'heap_pushes', 'heap_pops', 'stale_pops',
+    'heuristic_calls', 'heuristic_evals', 'batch_steps', 'pivots_pushed', 'time_ns'
+)
+
+def _new_stats():
+    """A zeroed native SearchStats struct, as a writable buffer for the searches to fill."""
+    return array('q', bytes(8 * len(_STATS_FIELDS)))
+
+def _stats_dict(stats):
+    result = dict(zip(_STATS_FIELDS[:-1], stats))
+    result['time_us'] = stats[-1] / 1000.0
+    return result
+
+# Counts and arrays of a native solver image (see Graph.export), in their native order.
+_IMAGE_FIELDS = (
+    'num_nodes', 'num_edges', 'width', 'height', 'connectivity', 'corner_cutting', 'num_components', 'num_landmarks'
+)
+_IMAGE_ARRAYS = (
+    'offsets', 'targets', 'weights', 'cells', 'moves', 'narrow_components', 'wide_components',
+    'landmarks', 'landmark_from', 'landmark_to'
+)
+
+_OUTPUTS = ('nodes', 'ids', 'numpy', 'coords')
+# Landmark file header: magic, format version, num_nodes, num_edges, num_landmarks.
+_LANDMARKS_HEADER = struct.Struct('<4sIIII')
+_LANDMARKS_MAGIC = b'ASLM'
+# Saved solver header: magic, format version, offset and length of the JSON metadata.
+# Arrays follow the header, each 64-byte aligned; the metadata comes last.
+_SAVE_HEADER = struct.Struct('<8sIQQ')
+_SAVE_MAGIC = b'ASTARSLV'
+_SAVE_VERSION = 1
+_MANY_OUTPUTS = ('nodes', 'ids', 'numpy')
+# Open-list kinds, in the order of the native OpenList enum.
+_OPEN_LISTS = ('binary', 'quaternary', 'radix')
+# Outcomes of a budgeted search, in the order of the native SearchStatus enum.
+_SEARCH_STATUSES = ('found', 'no_path', 'max_expansions', 'deadline')
+
+class _StatsBuffer(threading.local):
+    """Per-thread native stats struct, reused across queries."""
+    def __init__(self):
+        self.stats = _new_stats()
+
+class _LRUCache:
+    """Least recently used mapping whose entries' total `weigh(value)` stays within `capacity`."""
+    def __init__(self, capacity, weigh=lambda value: 1):
+        self.capacity = capacity
+        self.weigh = weigh
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        weight = self.weigh(value)
+        with self.lock:
+            if key in self.entries: self.size -= self.weigh(self.entries.pop(key))
+            if weight > self.capacity: return
+            self.entries[key] = value
+            self.size += weight
+            while self.size > self.capacity:
+                self.size -= self.weigh(self.entries.popitem(last=False)[1])
+
+    def resize(self, capacity):
+        self.capacity = capacity
+        with self.lock:
+            while self.size > self.capacity:
+                self.size -= self.weigh(self.entries.popitem(last=False)[1])
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self.entries),
+                'size': self.size, 'capacity': self.capacity}
+
+class vectorized:
+    """Mark a heuristic as vectorized: ``func(nodes, goal)`` returns the estimates of many nodes at once.
+
+    `nodes` is an int32 array of node ids, an ``(n, 2)`` array of x, y cells for
+    grids and tuple-keyed graphs, or an object array of the nodes otherwise.
+    The solver calls it once per goal instead of once per node (needs NumPy).
+    """
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, nodes, goal):
+        return self.func(nodes, goal)
+
+def _numpy():
     try:
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        lib_files = glob.glob(os.path.join(current_dir, "*_cpp_backend*"))
-        if not lib_files:
-            lib_files = glob.glob(os.path.join(current_dir, "..", "*_cpp_backend*"))
-        if lib_files:
-            _cpp_lib = ctypes.CDLL(lib_files[0])
-    except: pass
-
-if _cpp_lib:
-    _cpp_lib.Solver_new.argtypes = [ctypes.c_int]
-    _cpp_lib.Solver_new.restype = ctypes.c_void_p
-    _cpp_lib.Solver_delete.argtypes = [ctypes.c_void_p]
-    _cpp_lib.Solver_set_width.argtypes = [ctypes.c_void_p, ctypes.c_int]
-    _cpp_lib.Solver_add_edge.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_float]
-    _cpp_lib.Solver_solve_classic.argtypes = [
-        ctypes.c_void_p, ctypes.c_int, ctypes.c_int, 
-        ctypes.c_int, ctypes.POINTER(ctypes.c_float),
-        ctypes.POINTER(ctypes.c_int), ctypes.c_int
-    ]
-    _cpp_lib.Solver_solve_classic.restype = ctypes.c_int
-    _cpp_lib.Solver_solve.argtypes = [
-        ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, 
-        ctypes.c_int, ctypes.c_int, ctypes.POINTER(ctypes.c_float),
-        ctypes.POINTER(ctypes.c_int), ctypes.c_int
-    ]
-    _cpp_lib.Solver_solve.restype = ctypes.c_int
+        import numpy
+    except ImportError:
+        raise ImportError("NumPy is required for output='numpy' / 'coords'") from None
+    return numpy
+
+def _as_buffer(values, typecode):
+    """Return `values` as a writable, contiguous buffer of C `int` ('i') or `float` ('f').
+
+    NumPy arrays and `array.array` objects of the right type are used as-is,
+    anything else is copied once.
+    """
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(values, np.ndarray):
+        dtype = np.intc if typecode == 'i' else np.float32
+        if values.dtype == dtype and values.flags.c_contiguous and values.flags.writeable:
+            return values.reshape(-1)
+        return np.ascontiguousarray(values, dtype=dtype).reshape(-1)
+    if isinstance(values, array) and values.typecode == typecode:
+        return values
+    return array(typecode, values)
+
+def _grid_buffer(grid):
+    """Return (cells, height, width) with `cells` a contiguous row-major uint8 buffer."""
+    if isinstance(grid, memoryview) and grid.ndim == 2 and grid.itemsize == 1:
+        height, width = grid.shape
+        cells = grid.cast('B') if grid.c_contiguous else bytearray(grid.tobytes())
+        return (bytearray(cells) if cells.readonly else cells), height, width
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(grid, np.ndarray):
+        if grid.ndim != 2: raise ValueError("grid must be a 2-D array")
+        cells = grid.view(np.uint8) if grid.dtype == np.bool_ else (grid != 0).view(np.uint8)
+        cells = np.ascontiguousarray(cells)
+        if not cells.flags.writeable: cells = cells.copy()
+        return cells.reshape(-1), grid.shape[0], grid.shape[1]
+    rows = list(grid)
+    width = len(rows[0]) if rows else 0
+    cells = bytearray()
+    for row in rows:
+        if len(row) != width: raise ValueError("grid rows must all have the same length")
+        cells.extend(1 if c else 0 for c in row)
+    return cells, len(rows), width
+
+def _open_file(file, mode):
+    """Open a path, or wrap an already open binary file without closing it."""
+    if isinstance(file, (str, bytes, os.PathLike)): return open(file, mode)
+    return contextlib.nullcontext(file)
+
+def _little_endian(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+def _copy_ints(values):
+    copy = array('i')
+    copy.frombytes(memoryview(values).cast('B'))
+    return copy
+
+class _CoordIndex:
+    """Id <-> node mapping for integer ``(x, y)`` nodes, stored in two flat int32 buffers.
+
+    `coords` holds x, y per id and `index` the id of every cell of the nodes'
+    bounding box ``box = (x0, y0, width, height)``, or -1. Being plain buffers,
+    they can live in a memory-mapped file or shared memory (kept alive by `owner`).
+    """
+    def __init__(self, coords, index, box, owner=None):
+        self.coords = coords
+        self.index = index
+        self.box = box
+        self.owner = owner
+
+    @classmethod
+    def build(cls, nodes):
+        """Index for `nodes`, or None if they are not integer pairs or too sparse for a dense box."""
+        if not nodes: return None
+        coords = array('i')
+        for node in nodes:
+            if type(node) is not tuple or len(node) != 2 or type(node[0]) is not int or type(node[1]) is not int:
+                return None
+            coords.extend(node)
+        xs, ys = coords[0::2], coords[1::2]
+        x0, y0 = min(xs), min(ys)
+        width, height = max(xs) - x0 + 1, max(ys) - y0 + 1
+        if width * height > 4 * len(nodes) + 1024: return None
+        index = array('i', [-1]) * (width * height)
+        for i in range(len(nodes)):
+            index[(ys[i] - y0) * width + xs[i] - x0] = i
+        return cls(coords, index, (x0, y0, width, height))
+
+    def __len__(self):
+        return len(self.coords) // 2
+
+    def __getitem__(self, node_id):
+        if node_id < 0: node_id += len(self)
+        return (self.coords[2 * node_id], self.coords[2 * node_id + 1])
+
+    def __iter__(self):
+        coords = self.coords
+        return ((coords[i], coords[i + 1]) for i in range(0, len(coords), 2))
+
+    def get(self, node, default=None):
+        x0, y0, width, height = self.box
+        try:
+            x, y = node
+            x, y = operator.index(x) - x0, operator.index(y) - y0
+        except (TypeError, ValueError):
+            return default
+        if not (0 <= x < width and 0 <= y < height): return default
+        node_id = self.index[y * width + x]
+        return default if node_id < 0 else node_id
+
+class DistanceField:
+    """Cost-to-goal and next hop of every node towards one goal, from a single reverse search.
+
+    `dist` (``array('f')``, inf where the goal is unreachable) and `next_hop`
+    (``array('i')``, -1 at the goal and at unreachable nodes) are indexed by
+    node id and shared with the solver's cache, so treat them as read-only.
+    """
+    def __init__(self, solver, goal_id, dist, next_hop):
+        self.solver = solver
+        self.goal_id = goal_id
+        self.dist = dist
+        self.next_hop = next_hop
+
+    @property
+    def goal(self):
+        return self.solver._node(self.goal_id)
+
+    def distance(self, node):
+        """Cost of a shortest path from `node` to the goal (inf if unreachable, None if unknown)."""
+        node_id = self.solver._lookup(node)
+        return None if node_id is None else self.dist[node_id]
+
+    def path_from(self, start, output='nodes'):
+        """Shortest path from `start` to the goal by following next hops, in O(path length)."""
+        if output not in _OUTPUTS: raise ValueError(f"output must be one of {_OUTPUTS}")
+        u = self.solver._lookup(start)
+        if u is None or self.dist[u] == math.inf: return None
+        next_hop, goal_id = self.next_hop, self.goal_id
+        ids = array('i', (u,))
+        while u != goal_id:
+            u = next_hop[u]
+            ids.append(u)
+        return self.solver._format_path(ids, len(ids), output)
+
+    def as_numpy(self):
+        """``(dist, next_hop)`` as float32 / int32 NumPy views of the same memory (no copy)."""
+        np = _numpy()
+        return np.frombuffer(self.dist, dtype=np.float32), np.frombuffer(self.next_hop, dtype=np.intc)
+
+class BoundedSearch:
+    """A `solve` / `solve_classic` query run under `max_expansions` / `deadline_us` budgets.
+
+    `status` is 'found', 'no_path', or the budget that ran out first:
+    'max_expansions' or 'deadline'. `path` is then the best partial path, from
+    the start to the queued node closest to the goal by the heuristic.
+    `resume()` continues the search where it stopped with a new budget, so a
+    long query can be spread over several ticks. If the graph was updated in
+    between, the search starts over.
+    """
+    def __init__(self, solver, fn, start_id, goal_id, params, output, max_expansions, deadline_us):
+        self.solver = solver
+        self.output = output
+        self.max_expansions = max_expansions
+        self.deadline_us = deadline_us
+        self.status = None
+        self.path = None
+        self._key = (fn.__name__, start_id, goal_id) + params
+        self._handle = None
+        results = solver._result_cache()
+        ids = results.get(self._key) if results is not None else None
+        if ids is not None:
+            self.status = 'found' if ids else 'no_path'
+            if ids: self.path = solver._format_path(ids, len(ids), output)
+            return
+        if start_id is None or goal_id is None:
+            self.status = 'no_path'
+            return
+        k, adaptive = params if params else (0, 0)
+        # The native search holds the vectorized heuristic values it is given.
+        self._handle = solver._native.begin_search(start_id, goal_id, k, adaptive, not params,
+                                                   *solver._native_heuristic(goal_id))
+        self.resume()
+
+    @property
+    def done(self):
+        """True once the search found a path or proved there is none."""
+        return self.status in ('found', 'no_path')
+
+    def resume(self, max_expansions=None, deadline_us=None):
+        """Continue the search; budgets default to those of the original call. Returns self."""
+        if self.done: return self
+        max_expansions = self.max_expansions if max_expansions is None else max_expansions
+        deadline_us = self.deadline_us if deadline_us is None else deadline_us
+        solver = self.solver
+        status, ids = solver._native_call(
+            self._handle.resume, -1 if max_expansions is None else int(max_expansions),
+            -1 if deadline_us is None else int(deadline_us)
+        )
+        ids = memoryview(ids)
+        self.status = _SEARCH_STATUSES[status]
+        self.path = solver._format_path(ids, len(ids), self.output) if ids else None
+        if self.done:
+            results = solver._result_cache()
+            if results is not None: results.put(self._key, ids)
+        return self
+
+class Replanner:
+    """Incremental (D* Lite) path from a moving start to a fixed goal, see `AStart.replanner`.
+
+    The search runs backwards from the goal and is kept between calls: `path()`
+    only repairs the part affected by the solver updates made since the last
+    call, and `move()` advances the start without searching.
+    """
+    def __init__(self, solver, start_id, goal_id):
+        self.solver = solver
+        self.goal_id = goal_id
+        self._start_id = start_id
+        h_mode = {'manhattan': 1, 'octile': 3}.get(solver.h, 0) if isinstance(solver.h, str) else 0
+        self._handle = solver._native.replanner(start_id, goal_id, h_mode)
+
+    @property
+    def start(self):
+        return self.solver._node(self._start_id)
+
+    def move(self, node):
+        """Make `node` (usually the next cell of the current path) the new start."""
+        node_id = self.solver._lookup(node)
+        if node_id is None: raise ValueError(f"unknown node {node!r}")
+        self._start_id = node_id
+        self._handle.move(node_id)
+
+    def path(self, output='nodes'):
+        """Shortest path from the current start to the goal, or None; repairs the search first."""
+        if output not in _OUTPUTS: raise ValueError(f"output must be one of {_OUTPUTS}")
+        ids = memoryview(self.solver._native_call(self._handle.plan))
+        if not ids: return None
+        return self.solver._format_path(ids, len(ids), output)
 
 class AStart:
-    def __init__(self, graph_adj, heuristic_func=None, use_cpp=True):
+    def __init__(self, graph_adj, heuristic_func=None, use_cpp=None, collect_stats=False, open_list='binary'):
         self.graph = graph_adj
         self.h = heuristic_func
-        self.use_cpp = use_cpp and (_cpp_lib is not None)
-        if use_cpp and not _cpp_lib:
+        # When set, every solve stores its native search counters in `self.stats`.
+        self.collect_stats = collect_stats
+        self.stats = {}
+        # None picks the C++ backend when it loaded, the pure-Python engine otherwise.
+        self.use_cpp = bool(_cpp_lib) if use_cpp is None else bool(use_cpp)
+        if self.use_cpp and not _cpp_lib:
             raise RuntimeError("C++ Backend requested but not found!")
-            
-        self._cpp_solver = None
+
+        self._native = None
+        self._engine = None
+        self._mapped = None
+        self._mapped_bytes = 0
         self._id_to_node = []
         self._node_to_id = {}
+        self._num_nodes = 0
+        self._width = 0
+        self._grid_shape = None
+        self._coords = None
+        self._components = None
+        self._front_end = None
+        # Batches of `aio.AsyncSolver` front-ends running on this solver, see _check_updatable
+        self._async_batches = 0
+        self._stats_buffer = _StatsBuffer()
+        self._init_caches()
         if self.use_cpp:
             self._init_cpp_graph()
+        else:
+            self._index_nodes()
+            self._engine = PythonGraph.from_dict(self.graph, self._node_to_id, self._num_nodes)
+        self.open_list = open_list
+
+    @classmethod
+    def _from_native(cls, num_nodes, heuristic_func, width, native=None, grid_shape=None):
+        if not _cpp_lib:
+            raise RuntimeError("C++ Backend requested but not found!")
+        self = cls.__new__(cls)
+        self.graph = None
+        self.h = heuristic_func
+        self.collect_stats = False
+        self.stats = {}
+        self.use_cpp = True
+        self._engine = None
+        self._mapped = None
+        self._mapped_bytes = 0
+        # Nodes are the integer ids themselves, no mapping is materialised.
+        self._id_to_node = None
+        self._node_to_id = None
+        self._num_nodes = int(num_nodes)
+        self._width = int(width)
+        self._grid_shape = grid_shape
+        self._coords = None
+        self._components = None
+        self._front_end = None
+        # Batches of `aio.AsyncSolver` front-ends running on this solver, see _check_updatable
+        self._async_batches = 0
+        self._stats_buffer = _StatsBuffer()
+        self._init_caches()
+        # The extension type owns the native solver.
+        self._native = native if native is not None else _cpp_lib.Graph(self._num_nodes, self._width)
+        return self
+
+    @classmethod
+    def from_grid(cls, grid, connectivity=8, corner_cutting=False, heuristic_func='auto'):
+        """Build an implicit grid solver from a 2-D walkability array.
+
+        `grid` is a list of rows, a 2-D NumPy array or a 2-D memoryview of
+        bytes (see `movingai.read_map`). Truthy cells are walkable (pass
+        ``~occupancy`` for an occupancy grid where 1 means blocked). Only the bitmap is stored; neighbours are
+        generated inside the C++ searches. Nodes are ``(x, y)`` tuples, with
+        straight moves costing 1 and diagonal moves sqrt(2). Diagonals never
+        squeeze between two blocked cells; without `corner_cutting` both side
+        cells must be free. The default heuristic is 'octile' for
+        8-connectivity and 'manhattan' for 4-connectivity.
+        """
+        if connectivity not in (4, 8): raise ValueError("connectivity must be 4 or 8")
+        if heuristic_func == 'auto': heuristic_func = 'octile' if connectivity == 8 else 'manhattan'
+        cells, height, width = _grid_buffer(grid)
+        if not _cpp_lib:
+            raise RuntimeError("C++ Backend requested but not found!")
+        native = _cpp_lib.Graph.grid(cells, width, height, connectivity, corner_cutting)
+        return cls._from_native(width * height, heuristic_func, width, native, (height, width))
+
+    @classmethod
+    def from_edges(cls, src, dst, weight=None, num_nodes=None, heuristic_func=None, width=0):
+        """Build a solver over nodes ``0..num_nodes-1`` from parallel edge arrays.
+
+        `src`, `dst` and `weight` may be NumPy arrays, `array.array` objects or
+        any sequence. Missing weights default to 1. The whole edge list is
+        handed to the C++ backend in a single call.
+        """
+        src = _as_buffer(src, 'i')
+        dst = _as_buffer(dst, 'i')
+        if len(src) != len(dst):
+            raise ValueError("src and dst must have the same length")
+        if weight is not None:
+            weight = _as_buffer(weight, 'f')
+            if len(weight) != len(src):
+                raise ValueError("weight must have the same length as src")
+        if num_nodes is None:
+            num_nodes = max(max(src), max(dst)) + 1 if len(src) else 0
+        self = cls._from_native(num_nodes, heuristic_func, width)
+        self._native.add_edges(src, dst, weight)
+        return self
+
+    @classmethod
+    def from_csr(cls, indptr, indices, weights=None, heuristic_func=None, width=0):
+        """Build a solver from compressed sparse row arrays (as in ``scipy.sparse.csr_matrix``).
+
+        The neighbours of node ``u`` are ``indices[indptr[u]:indptr[u+1]]``.
+        `indptr` must start at 0, never decrease and end at ``len(indices)``,
+        and every index must be a node id; ValueError otherwise.
+        """
+        indptr = _as_buffer(indptr, 'i')
+        indices = _as_buffer(indices, 'i')
+        if len(indptr) == 0:
+            raise ValueError("indptr must have num_nodes + 1 entries")
+        if indptr[0] != 0:
+            raise ValueError("indptr must start at 0")
+        if indptr[-1] != len(indices):
+            raise ValueError("indptr must end at len(indices)")
+        if weights is not None:
+            weights = _as_buffer(weights, 'f')
+            if len(weights) < indptr[-1]:
+                raise ValueError("weights must have an entry per edge")
+        self = cls._from_native(len(indptr) - 1, heuristic_func, width)
+        if len(indptr) > 1: self._native.set_csr(indptr, indices, weights)
+        return self
+
+    def save(self, path):
+        """Write the built solver to `path` so `load` can restore it without rebuilding.
+
+        The file holds the graph arrays (CSR or grid bitmap), the node mapping of
+        dict graphs, the components and any landmark tables, in a versioned
+        little-endian format. String heuristics are saved too; callable ones must
+        be passed to `load` again.
+        """
+        self._require_cpp("save")
+        with open(path, 'wb') as f:
+            for offset, data in self._image():
+                f.seek(offset)
+                f.write(data)
+
+    @classmethod
+    def load(cls, path, mmap=True, heuristic_func=None):
+        """Restore a solver written by `save`.
+
+        With `mmap` the arrays stay in the memory-mapped file instead of being
+        copied: loading is near-instant and processes loading the same file share
+        its physical pages. The mapping is copy-on-write, so the solver can still
+        be modified. `heuristic_func` defaults to the saved string heuristic.
+        Node mappings other than integer ``(x, y)`` tuples are pickled, so only
+        load files you trust.
+        """
+        with open(path, 'rb') as f:
+            data = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_COPY) if mmap else bytearray(f.read())
+        return cls._from_image(data, heuristic_func, data if mmap else None)
+
+    def share(self):
+        """Copy the built solver into a new shared memory block, for `attach` in other processes.
+
+        Returns the `multiprocessing.shared_memory.SharedMemory` block; its
+        ``name`` identifies it. The caller owns it: ``close()`` and ``unlink()``
+        it once no process needs it any more.
+        """
+        self._require_cpp("share")
+        from multiprocessing import shared_memory
+        sections = [(offset, memoryview(data).cast('B')) for offset, data in self._image()]
+        block = shared_memory.SharedMemory(create=True, size=max(offset + len(data) for offset, data in sections))
+        for offset, data in sections:
+            block.buf[offset:offset + len(data)] = data
+        return block
+
+    @classmethod
+    def attach(cls, name, heuristic_func=None):
+        """Read-only solver over the shared memory block `name` created by `share`, without copying.
+
+        The graph arrays and integer ``(x, y)`` node mappings are used in place.
+        Modifying the attached solver gives it a private copy first. Before
+        Python 3.13, attach only from the creating process or processes it
+        started with `multiprocessing`: any other process has its own resource
+        tracker, which unlinks the block when that process exits.
+        """
+        from multiprocessing import shared_memory
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(name, track=False)
+        else:
+            block = shared_memory.SharedMemory(name)
+        return cls._from_image(block.buf, heuristic_func, block)
+
+    def _image(self):
+        """The solver serialized as ``(offset, buffer)`` sections, header and metadata included."""
+        if sys.byteorder != 'little': raise ValueError("saving needs a little-endian platform")
+        fields, data = self._native.export()
+        arrays = [(name, values) for name, values in zip(_IMAGE_ARRAYS, data) if values is not None]
+        meta = {
+            'image': dict(zip(_IMAGE_FIELDS, fields)),
+            'heuristic': self.h if isinstance(self.h, str) else None,
+        }
+        if self._id_to_node is not None:
+            index = _CoordIndex.build(self._id_to_node)
+            if index is None:
+                import pickle
+                arrays.append(('nodes', pickle.dumps(self._id_to_node, protocol=pickle.HIGHEST_PROTOCOL)))
+            else:
+                arrays += [('node_coords', index.coords), ('node_index', index.index)]
+                meta['node_box'] = index.box
+
+        sections, layout, offset = [], {}, _SAVE_HEADER.size
+        for name, data in arrays:
+            offset += -offset % 64
+            layout[name] = [offset, memoryview(data).nbytes]
+            sections.append((offset, data))
+            offset += layout[name][1]
+        meta['arrays'] = layout
+        import json
+        meta = json.dumps(meta).encode()
+        sections.append((0, _SAVE_HEADER.pack(_SAVE_MAGIC, _SAVE_VERSION, offset, len(meta))))
+        sections.append((offset, meta))
+        return sections
+
+    @classmethod
+    def _from_image(cls, data, heuristic_func, owner):
+        """Solver over a serialized image in `data`, borrowing its arrays if `owner` keeps it alive."""
+        if not _cpp_lib:
+            raise RuntimeError("C++ Backend requested but not found!")
+        if sys.byteorder != 'little': raise ValueError("saved solvers are little-endian")
+        if len(data) < _SAVE_HEADER.size: raise ValueError("not a saved AStart solver")
+        magic, version, meta_offset, meta_length = _SAVE_HEADER.unpack_from(data)
+        if magic != _SAVE_MAGIC: raise ValueError("not a saved AStart solver")
+        if version != _SAVE_VERSION: raise ValueError(f"unsupported solver file version {version}")
+        import json
+        meta = json.loads(bytes(data[meta_offset:meta_offset + meta_length]))
+
+        arrays, image, view = meta['arrays'], meta['image'], memoryview(data).cast('B')
+        section = lambda name: view[arrays[name][0]:arrays[name][0] + arrays[name][1]]
+        native = _cpp_lib.Graph.from_image(
+            tuple(image[name] for name in _IMAGE_FIELDS),
+            tuple(section(name) if name in arrays and arrays[name][1] else None for name in _IMAGE_ARRAYS), owner
+        )
+        grid_shape = (image['height'], image['width']) if image['connectivity'] else None
+        if heuristic_func is None: heuristic_func = meta['heuristic']
+        self = cls._from_native(image['num_nodes'], heuristic_func, image['width'], native, grid_shape)
+        if 'nodes' in arrays:
+            offset, length = arrays['nodes']
+            import pickle
+            self._id_to_node = pickle.loads(bytes(data[offset:offset + length]))
+            self._node_to_id = dict(zip(self._id_to_node, range(len(self._id_to_node))))
+        elif 'node_coords' in arrays:
+            coords, index = section('node_coords').cast('i'), section('node_index').cast('i')
+            if owner is None: coords, index = _copy_ints(coords), _copy_ints(index)
+            self._id_to_node = self._node_to_id = _CoordIndex(coords, index, meta['node_box'], owner)
+        if owner is not None:
+            self._mapped = owner
+            self._mapped_bytes = len(data)
+        return self
+
+    def _init_caches(self):
+        # The callable wrapping `self.h` for the native searches, rebuilt when `self.h` is reassigned.
+        self._h_bound = None
+        self._h_callback = None
+        self._h_errors = []
+        self._h_nodes = None
+        # Vectorized heuristic arrays by goal id, bounded in bytes.
+        self._h_arrays = _LRUCache(64 << 20, lambda values: values.nbytes)
+        self._h_arrays_for = None
+        # Paths by (start id, goal id, search parameters); disabled until configured.
+        self._results = _LRUCache(0)
+        self._results_for = None
+        # (dist, next_hop) distance fields by goal id, bounded in bytes.
+        self._fields = _LRUCache(64 << 20, lambda field: 8 * len(field[0]))
+        self._fields_for = None
 
     def _init_cpp_graph(self):
+        is_grid = self._index_nodes()
+        self._native = _cpp_lib.Graph(self._num_nodes, self._width if is_grid else 0)
+
+        # Flatten the dict-of-dicts into edge arrays and hand them over in one call.
+        node_to_id = self._node_to_id
+        src, dst, wts = array('i'), array('i'), array('f')
+        for u, nbrs in self.graph.items():
+            u_id = node_to_id[u]
+            for v, w in nbrs.items():
+                v_id = node_to_id.get(v)
+                if v_id is not None:
+                    src.append(u_id)
+                    dst.append(v_id)
+                    wts.append(w)
+        self._native.add_edges(src, dst, wts)
+        self._native.finalize()
+
+    def _index_nodes(self):
+        """Assigns dense ids to the nodes of `self.graph`; returns whether they are (x, y) cells."""
         nodes = set(self.graph.keys())
         first_key = next(iter(self.graph)) if self.graph else None
         is_grid = isinstance(first_key, tuple)
@@ -69,52 +707,609 @@ class AStart:
              self._id_to_node = list(nodes)
              
         self._node_to_id = {n: i for i, n in enumerate(self._id_to_node)}
-        self._cpp_solver = _cpp_lib.Solver_new(len(self._id_to_node))
-        
+        self._num_nodes = len(self._id_to_node)
         if is_grid:
             min_x = min(n[0] for n in self._id_to_node)
             max_x = max(n[0] for n in self._id_to_node)
-            _cpp_lib.Solver_set_width(self._cpp_solver, int(max_x - min_x + 1))
-            
-        for u, nbrs in self.graph.items():
-            u_id = self._node_to_id[u]
-            for v, w in nbrs.items():
-                if v in self._node_to_id:
-                    _cpp_lib.Solver_add_edge(self._cpp_solver, u_id, self._node_to_id[v], float(w))
-
-    def __del__(self):
-        if self._cpp_solver: _cpp_lib.Solver_delete(self._cpp_solver)
-
-    def solve(self, start, goal, k=1000, adaptive=False):
-        if self.use_cpp: return self._solve_cpp(start, goal, k, adaptive)
-        return None
-
-
-    def solve_classic(self, start, goal):
-        if start not in self._node_to_id or goal not in self._node_to_id: return None
-        h_mode = 0
-        if self.h == 'manhattan': h_mode = 1
-        elif self.h == 'octile': h_mode = 3
-        max_len = 1000000 
-        path_array = (ctypes.c_int * max_len)()
-        p_len = _cpp_lib.Solver_solve_classic(self._cpp_solver, self._node_to_id[start], self._node_to_id[goal], h_mode, None, path_array, max_len)
-        if p_len == 0: return None
-        return [self._id_to_node[path_array[i]] for i in range(p_len)]
-
-    def _solve_cpp(self, start, goal, k, adaptive):
-        if start not in self._node_to_id or goal not in self._node_to_id: return None
-        h_mode = 0
-        h_array = None
-        if self.h == 'manhattan': h_mode = 1
-        elif self.h == 'octile': h_mode = 3
-        elif callable(self.h):
-            h_mode = 2
-            num_nodes = len(self._id_to_node)
-            h_array = (ctypes.c_float * num_nodes)()
-            for i, node in enumerate(self._id_to_node):
-                h_array[i] = float(self.h(node, goal))
-        max_len = 1000000 
-        path_array = (ctypes.c_int * max_len)()
-        p_len = _cpp_lib.Solver_solve(self._cpp_solver, self._node_to_id[start], self._node_to_id[goal], k, int(adaptive), h_mode, h_array, path_array, max_len)
-        if p_len == 0: return None
-        return [self._id_to_node[path_array[i]] for i in range(p_len)]
\ No newline at end of file
+            self._width = int(max_x - min_x + 1)
+        return is_grid
+
+    def _lookup(self, node):
+        if self._node_to_id is not None: return self._node_to_id.get(node)
+        if self._grid_shape is not None:
+            try: x, y = operator.index(node[0]), operator.index(node[1])
+            except (TypeError, IndexError): return None
+            height, width = self._grid_shape
+            return y * width + x if 0 <= x < width and 0 <= y < height and len(node) == 2 else None
+        try: node_id = operator.index(node)
+        except TypeError: return None
+        return node_id if 0 <= node_id < self._num_nodes else None
+
+    def _node(self, node_id):
+        if self._grid_shape is not None: return (node_id % self._width, node_id // self._width)
+        return node_id if self._id_to_node is None else self._id_to_node[node_id]
+
+    def _native_call(self, fn, *args):
+        """Call a native search with the thread's stats struct as last argument (None unless
+        `collect_stats`); returns its result. The GIL is released during the search."""
+        stats = self._stats_buffer.stats if self.collect_stats else None
+        result = fn(*args, stats)
+        if stats is not None: self.stats = _stats_dict(stats)
+        self._raise_heuristic_error()
+        return result
+
+    def _format_path(self, path_array, p_len, output):
+        if output == 'nodes':
+            ids = path_array[:p_len]
+            if not isinstance(ids, list): ids = ids.tolist()
+            if self._grid_shape is not None:
+                width = self._width
+                return [(i % width, i // width) for i in ids]
+            if self._id_to_node is None: return ids
+            id_to_node = self._id_to_node
+            return [id_to_node[i] for i in ids]
+        if output == 'ids':
+            if isinstance(path_array, array): return path_array[:p_len]
+            ids = array('i')
+            ids.frombytes(memoryview(path_array)[:p_len].cast('B'))
+            return ids
+        np = _numpy()
+        ids = np.frombuffer(path_array, dtype=np.intc, count=p_len)
+        # Paths of the native searches are immutable and shared as-is; other buffers may be reused or cached.
+        if not (isinstance(path_array, memoryview) and path_array.readonly): ids = ids.copy()
+        if output == 'numpy': return ids
+        return self._ids_to_coords(np, ids)
+
+    def _ids_to_coords(self, np, ids):
+        if self._id_to_node is None:
+            if not self._width: raise ValueError("output='coords' needs a grid (width) to map ids to cells")
+            return np.stack((ids % self._width, ids // self._width), axis=1)
+        if self._coords is None and isinstance(self._id_to_node, _CoordIndex):
+            self._coords = np.frombuffer(self._id_to_node.coords, dtype=np.intc).reshape(-1, 2)
+        if self._coords is None:
+            first = self._id_to_node[0] if self._id_to_node else None
+            if not isinstance(first, tuple): raise ValueError("output='coords' needs (x, y) tuple nodes")
+            self._coords = np.array(self._id_to_node, dtype=np.intc).reshape(-1, 2)
+        return self._coords[ids]
+
+    def finalize(self):
+        """Pack edges added since construction into the contiguous CSR arrays used by the searches.
+
+        The constructors already do this; searches also finalize lazily on first use.
+        """
+        if self._native is not None: self._native.finalize()
+
+    def memory_usage(self):
+        """Bytes held by the native graph storage, in total and per node."""
+        native = self._native
+        if native is None: return None
+        total = native.memory_bytes
+        return {
+            'bytes': total,
+            'bytes_per_node': total / max(1, self._num_nodes),
+            'num_nodes': self._num_nodes,
+            'num_edges': native.num_edges,
+            'finalized': native.finalized,
+            'workspaces': native.workspace_count,
+            'workspace_bytes': native.workspace_bytes,
+            'mapped_bytes': self._mapped_bytes if self._mapped is not None and native.borrowed else 0,
+        }
+
+    def _check_updatable(self):
+        if self._async_batches:
+            raise RuntimeError("searches of an AsyncSolver are running on this solver; update the graph "
+                               "through the AsyncSolver (e.g. await front_end.set_edge(...)) to order it with them")
+
+    def _update_ids(self, *nodes):
+        ids = [self._lookup(node) for node in nodes]
+        for node, node_id in zip(nodes, ids):
+            if node_id is None: raise ValueError(f"unknown node {node!r}")
+        return ids
+
+    def add_edge(self, u, v, weight=1.0):
+        """Add an edge ``u -> v`` next to any existing one, as `from_edges` would.
+
+        It is packed in before the next search. Component labels, ALT landmarks,
+        cached results and distance fields are dropped; use `set_edge` to keep
+        the landmarks of a graph being edited.
+        """
+        self._require_cpp("add_edge")
+        self._check_updatable()
+        if self._grid_shape is not None: raise ValueError("grid solvers change cells, see set_walkable")
+        self._native.add_edge(*self._update_ids(u, v), float(weight))
+
+    def set_edge(self, u, v, weight=1.0):
+        """Set the weight of edge ``u -> v`` in place, adding the edge if it is missing.
+
+        Raising a weight keeps the component labels and ALT tables, which stay
+        valid bounds. Lowering one joins components at once and drops the ALT
+        tables, which the next 'alt' search rebuilds for the same landmarks. A new
+        edge is packed in before the next search, one pass over the edges.
+        Cached results and distance fields are dropped either way.
+        """
+        self._require_cpp("set_edge")
+        self._check_updatable()
+        if self._grid_shape is not None: raise ValueError("grid solvers change cells, see set_walkable")
+        self._native.set_edge(*self._update_ids(u, v), float(weight))
+
+    def remove_edge(self, u, v):
+        """Remove every ``u -> v`` edge in place; returns False if there was none.
+
+        The edge keeps its storage slot, so `set_edge` can restore it without
+        repacking (doors that open and close).
+        """
+        self._require_cpp("remove_edge")
+        self._check_updatable()
+        if self._grid_shape is not None: raise ValueError("grid solvers change cells, see set_walkable")
+        return self._native.remove_edge(*self._update_ids(u, v)) > 0
+
+    def set_walkable(self, cell, walkable=True):
+        """Block or unblock a cell of a grid from `from_grid`, updating the moves around it in place."""
+        self._require_cpp("set_walkable")
+        self._check_updatable()
+        if self._grid_shape is None: raise ValueError("set_walkable needs a grid solver from AStart.from_grid")
+        self._native.set_walkable(self._update_ids(cell)[0], bool(walkable))
+
+    def replanner(self, start, goal):
+        """A `Replanner` (D* Lite) keeping a path from a moving `start` to `goal` up to date.
+
+        After `set_edge`, `remove_edge` or `set_walkable`, its `path()` only
+        re-expands the nodes whose cost to the goal changed, instead of
+        searching again. Only 'manhattan' and 'octile' heuristics guide it.
+        """
+        self._require_cpp("replanner")
+        return Replanner(self, *self._update_ids(start, goal))
+
+    @property
+    def open_list(self):
+        """Priority queue of the A* searches: 'binary', 'quaternary' or 'radix'.
+
+        'binary' is a binary heap with lazy deletion. 'quaternary' is a 4-ary heap
+        with decrease-key, holding each node at most once. 'radix' is a monotone
+        radix heap; it needs a consistent heuristic (none, 'manhattan', 'octile',
+        'alt') to stay optimal. Paths may differ on ties, never in cost. The
+        Python engine only has the binary heap.
+        """
+        if not self.use_cpp: return 'binary'
+        return _OPEN_LISTS[self._native.open_list]
+
+    @open_list.setter
+    def open_list(self, kind):
+        if kind not in _OPEN_LISTS: raise ValueError(f"open_list must be one of {_OPEN_LISTS}")
+        if not self.use_cpp:
+            if kind != 'binary': raise ValueError("the Python engine only supports open_list='binary'")
+            return
+        self._native.open_list = _OPEN_LISTS.index(kind)
+
+    @property
+    def num_components(self):
+        """Number of weakly connected components (walkable regions on grids)."""
+        self._require_cpp("num_components")
+        return self._native.num_components
+
+    def component_labels(self, strong=False, output='ids'):
+        """Component label of every node id, -1 for blocked grid cells.
+
+        Labels are weakly connected components by default (queries across them
+        return None without searching); ``strong=True`` gives strongly connected
+        components. `output` is 'ids' (``array('i')``) or 'numpy'.
+        """
+        self._require_cpp("component_labels")
+        labels = array('i', bytes(4 * self._num_nodes))
+        if self._num_nodes: self._native.component_labels(strong, labels)
+        if output == 'numpy':
+            np = _numpy()
+            return np.frombuffer(labels, dtype=np.intc)
+        return labels
+
+    def component_of(self, node):
+        """Weakly connected component label of `node` (None if unknown, -1 if blocked)."""
+        self._require_cpp("component_of")
+        node_id = self._lookup(node)
+        if node_id is None: return None
+        version = self._native.version
+        if self._components is None or self._components[0] != version:
+            self._components = (version, self.component_labels())
+        return self._components[1][node_id]
+
+    def release_workspaces(self):
+        """Free the idle per-thread search workspaces (they are recreated on demand)."""
+        if self._native is not None: self._native.release_workspaces()
+
+    def distance_field(self, goal):
+        """Run one reverse Dijkstra search from `goal` and return a `DistanceField`.
+
+        Every node's path to the goal can then be read off in O(path length),
+        which suits many agents converging on one target. Fields are cached per
+        goal until edges are added. Returns None for unknown goals.
+        """
+        self._require_cpp("distance_field")
+        goal_id = self._lookup(goal)
+        if goal_id is None: return None
+        fields = self._field_cache()
+        field = fields.get(goal_id)
+        if field is None:
+            dist, next_hop = array('f', bytes(4 * self._num_nodes)), array('i', bytes(4 * self._num_nodes))
+            self._native_call(self._native.distance_field, goal_id, dist, next_hop)
+            field = (dist, next_hop)
+            fields.put(goal_id, field)
+        return DistanceField(self, goal_id, *field)
+
+    def _field_cache(self):
+        version = self._native.version
+        if version != self._fields_for:
+            self._fields.clear()
+            self._fields_for = version
+        return self._fields
+
+    def build_landmarks(self, count=16, landmarks=None, threads=None):
+        """Precompute the ALT landmark tables used by ``heuristic_func='alt'``.
+
+        Landmarks are picked with the farthest strategy unless `landmarks` lists
+        the nodes to use. Each one costs a forward and a backward Dijkstra search,
+        run on `threads` native workers (all cores by default), and 8 bytes per
+        node. Tables are dropped when edges are added. Returns the landmark nodes.
+        """
+        self._require_cpp("build_landmarks")
+        chosen = None
+        if landmarks is not None:
+            chosen = self._id_buffer(landmarks)
+            count = len(chosen)
+        self._native.build_landmarks(int(count), chosen, threads or 0)
+        return self.landmarks
+
+    @property
+    def landmarks(self):
+        ids = self._landmark_tables()[0]
+        return [self._node(i) for i in ids]
+
+    def _landmark_tables(self, tables=False):
+        self._require_cpp("landmarks")
+        count = self._native.num_landmarks
+        ids = array('i', bytes(4 * count))
+        size = count * self._num_nodes if tables else 0
+        dist_from, dist_to = array('f', bytes(4 * size)), array('f', bytes(4 * size))
+        self._native.landmark_tables(ids, dist_from if tables else None, dist_to if tables else None)
+        return ids, dist_from, dist_to
+
+    def save_landmarks(self, file):
+        """Write the landmark tables to a path or binary file, to skip the precomputation next time."""
+        ids, dist_from, dist_to = self._landmark_tables(tables=True)
+        num_edges = self._native.num_edges
+        with _open_file(file, 'wb') as f:
+            f.write(_LANDMARKS_HEADER.pack(_LANDMARKS_MAGIC, 1, self._num_nodes, num_edges, len(ids)))
+            for values in (ids, dist_from, dist_to): f.write(_little_endian(values).tobytes())
+
+    def load_landmarks(self, file):
+        """Load tables written by `save_landmarks` for this same graph; returns the landmark nodes."""
+        self._require_cpp("load_landmarks")
+        with _open_file(file, 'rb') as f:
+            header = f.read(_LANDMARKS_HEADER.size)
+            if len(header) != _LANDMARKS_HEADER.size: raise ValueError("not a landmark file")
+            magic, version, num_nodes, num_edges, count = _LANDMARKS_HEADER.unpack(header)
+            if magic != _LANDMARKS_MAGIC or version != 1: raise ValueError("not a landmark file")
+            if num_nodes != self._num_nodes or num_edges != self._native.num_edges:
+                raise ValueError("landmark tables were built for a different graph")
+            tables = []
+            for typecode, size in (('i', count), ('f', count * num_nodes), ('f', count * num_nodes)):
+                values = array(typecode)
+                values.frombytes(f.read(size * values.itemsize))
+                if len(values) != size: raise ValueError("truncated landmark file")
+                tables.append(_little_endian(values))
+        self._native.set_landmarks(*tables)
+        return self.landmarks
+
+    def configure_cache(self, heuristic_bytes=None, results=None, field_bytes=None):
+        """Bound the goal-keyed caches; arguments left as None keep their current limit.
+
+        `heuristic_bytes` caps the memory of cached vectorized heuristic arrays
+        (64 MiB by default). `results` is the number of paths kept by the result
+        cache, keyed by (start, goal, k, adaptive), 0 (the default) disables it.
+        Cached results are dropped when edges are added or `h` is reassigned.
+        `field_bytes` caps the memory of cached distance fields (64 MiB by default).
+        """
+        if heuristic_bytes is not None: self._h_arrays.resize(int(heuristic_bytes))
+        if results is not None: self._results.resize(int(results))
+        if field_bytes is not None: self._fields.resize(int(field_bytes))
+
+    def cache_info(self):
+        """Hit/miss counters and occupancy of the 'heuristic', 'results' and 'fields' caches.
+
+        Sizes are in bytes, except for 'results' which counts paths.
+        """
+        return {'heuristic': self._h_arrays.info(), 'results': self._results.info(), 'fields': self._fields.info()}
+
+    def cache_clear(self):
+        self._h_arrays.clear()
+        self._results.clear()
+        self._fields.clear()
+
+    def solve(self, start, goal, k=1000, adaptive=False, output='nodes', bidirectional=False, max_expansions=None,
+              deadline_us=None, epsilon=0, focal=False):
+        """Batch A* search from `start` to `goal`; returns the path or None.
+
+        `output` selects the path format: 'nodes' (list of nodes), 'ids'
+        (``array('i')`` of node ids), 'numpy' (int32 id array) or 'coords'
+        (``(n, 2)`` array of x, y cells for grids).
+
+        With `bidirectional`, batch searches run from both ends and stop once
+        they meet on a path neither side can improve, which saves most of the
+        expansions on long queries. The backward side searches against the
+        edges (a reverse adjacency is built on first use) and only uses
+        'manhattan', 'octile' and 'alt' heuristics; it cannot be `adaptive`.
+
+        With `max_expansions` and/or `deadline_us` (microseconds) the search
+        stops once either budget is spent and a resumable `BoundedSearch` is
+        returned instead of the path. Batch steps are cut short at the budget,
+        so a search overshoots `max_expansions` by one step's frontier at most.
+
+        With `epsilon` > 0 the search is bounded-suboptimal: the path costs at
+        most ``(1 + epsilon)`` times the optimal one, given an admissible
+        heuristic. By default that is weighted A*, batches whose pivots are
+        ordered by ``g + (1 + epsilon) * h``; ``k=1`` is classic weighted A*.
+        With `focal` it is focal search: the queued nodes whose ``g + h`` is
+        within the bound of the smallest one form the focal list. Each node
+        taken from it dives up to `k` steps towards the goal through focal
+        nodes, and the search stops as soon as it reaches the goal within the
+        bound. `focal` cannot be `adaptive`.
+        """
+        if output not in _OUTPUTS: raise ValueError(f"output must be one of {_OUTPUTS}")
+        if epsilon < 0: raise ValueError("epsilon must be >= 0")
+        if epsilon or focal:
+            self._require_cpp("bounded-suboptimal search")
+            if bidirectional or max_expansions is not None or deadline_us is not None:
+                raise ValueError("epsilon is not supported with bidirectional search or budgets")
+            if focal and adaptive: raise ValueError("adaptive batching is not supported by focal search")
+            return self._search(self._native.solve_bounded, start, goal, (k, int(adaptive), 1.0 + epsilon, bool(focal)),
+                                output)
+        if max_expansions is not None or deadline_us is not None:
+            self._require_cpp("search budgets")
+            if bidirectional: raise ValueError("budgets are not supported by bidirectional search")
+            return BoundedSearch(self, self._native.solve, self._lookup(start), self._lookup(goal),
+                                 (k, int(adaptive)), output, max_expansions, deadline_us)
+        if bidirectional:
+            self._require_cpp("bidirectional search")
+            if adaptive: raise ValueError("adaptive batching is not supported by bidirectional search")
+            return self._search(self._native.solve_bidirectional, start, goal, (k,), output)
+        if self.use_cpp: return self._solve_cpp(start, goal, k, adaptive, output)
+        return self._solve_python(start, goal, k, adaptive, output)
+
+    def solve_classic(self, start, goal, output='nodes', max_expansions=None, deadline_us=None):
+        """Plain A* search; budgets work as in `solve`."""
+        if output not in _OUTPUTS: raise ValueError(f"output must be one of {_OUTPUTS}")
+        if max_expansions is not None or deadline_us is not None:
+            self._require_cpp("search budgets")
+            return BoundedSearch(self, self._native.solve_classic, self._lookup(start), self._lookup(goal), (),
+                                 output, max_expansions, deadline_us)
+        if not self.use_cpp: return self._solve_python(start, goal, None, False, output)
+        return self._search(self._native.solve_classic, start, goal, (), output)
+
+    def solve_jps(self, start, goal, output='nodes', waypoints=False):
+        """Optimal path by Jump Point Search, for grids from ``from_grid(..., connectivity=8)``
+        without corner cutting.
+
+        Only jump points (where the path may turn) are queued, which skips the
+        many equal-cost orderings of straight and diagonal moves that A*
+        expands. The octile heuristic is always used. With `waypoints` only the
+        jump points are returned, consecutive ones lying on a straight or
+        diagonal line; otherwise every cell is.
+        """
+        if output not in _OUTPUTS: raise ValueError(f"output must be one of {_OUTPUTS}")
+        self._require_cpp("solve_jps")
+        if not self._native.supports_jps:
+            raise ValueError("solve_jps needs an 8-connected grid without corner cutting")
+        return self._search(self._native.solve_jps, start, goal, (int(waypoints),), output, heuristic=False)
+
+    def solve_many(self, starts, goals, k=1000, adaptive=False, threads=None, output='nodes', classic=False):
+        """Solve ``(starts[i], goals[i])`` for every i on a pool of native threads.
+
+        `threads` defaults to the number of cores. With output='nodes' a list of
+        paths (None where unreachable) is returned. 'ids' and 'numpy' return a
+        packed ``(paths, offsets)`` pair of ``array('i')`` / int32 arrays: query i
+        owns ``paths[offsets[i]:offsets[i+1]]`` and an empty slice means no path.
+        Vectorized heuristics depend on the goal, so they are solved one by one.
+        With `collect_stats`, `self.stats` holds the counters summed over all queries.
+        """
+        if output not in _MANY_OUTPUTS: raise ValueError(f"output must be one of {_MANY_OUTPUTS}")
+        start_ids, goal_ids = self._id_buffer(starts), self._id_buffer(goals)
+        n = len(start_ids)
+        if len(goal_ids) != n: raise ValueError("starts and goals must have the same length")
+
+        offsets = array('i', bytes(4 * (n + 1)))
+        if isinstance(self.h, vectorized) or not self.use_cpp:
+            paths = array('i')
+            for i in range(n):
+                path = self._solve_ids(start_ids[i], goal_ids[i], k, adaptive, classic)
+                if path is not None: paths.extend(path)
+                offsets[i + 1] = len(paths)
+        else:
+            # One buffer holding every path, handed over without a copy.
+            paths = memoryview(self._native_call(
+                self._native.solve_many, start_ids, goal_ids, k, int(adaptive), self._native_h_mode(), None,
+                int(classic), threads or 0, offsets
+            ))
+
+        if output == 'ids': return (paths if isinstance(paths, array) else _copy_ints(paths)), offsets
+        if output == 'numpy':
+            np = _numpy()
+            return np.frombuffer(paths, dtype=np.intc), np.frombuffer(offsets, dtype=np.intc)
+        result = []
+        for i in range(n):
+            lo, hi = offsets[i], offsets[i + 1]
+            result.append(self._format_path(paths[lo:hi], hi - lo, 'nodes') if hi > lo else None)
+        return result
+
+    async def solve_async(self, start, goal, k=1000, adaptive=False, output='nodes', classic=False):
+        """`solve` (or `solve_classic`) awaited from asyncio, without blocking the event loop.
+
+        Calls made in the same loop iteration are batched into one `solve_many`
+        on a worker thread, and identical calls in flight share one search. The
+        `aio.AsyncSolver` doing this is made on first use, with its default
+        pool; `async_stats()` reports its queue depth and latencies. The update
+        methods raise RuntimeError while its batches run: to interleave updates
+        with searches, serve through an `aio.AsyncSolver` and update through it.
+        """
+        import asyncio
+        from .aio import AsyncSolver
+        front_end = self._front_end
+        if front_end is None or front_end.loop not in (None, asyncio.get_running_loop()):
+            # First call, or from a new event loop (e.g. another asyncio.run).
+            if front_end is not None: front_end.close(wait=False)
+            front_end = self._front_end = AsyncSolver(self)
+        return await front_end.solve(start, goal, k, adaptive, output, classic)
+
+    def async_stats(self):
+        """`AsyncSolver.stats` of the `solve_async` front-end; empty before its first call."""
+        return self._front_end.stats() if self._front_end is not None else {}
+
+    def _id_buffer(self, nodes):
+        np = sys.modules.get("numpy")
+        if self._node_to_id is None and self._grid_shape is None:
+            return _as_buffer(nodes, 'i')
+        if self._grid_shape is not None and np is not None and isinstance(nodes, np.ndarray) and nodes.ndim == 2:
+            height, width = self._grid_shape
+            x, y = nodes[:, 0], nodes[:, 1]
+            inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+            return _as_buffer(np.where(inside, y * width + x, -1), 'i')
+        ids = array('i')
+        for node in nodes:
+            node_id = self._lookup(node)
+            ids.append(-1 if node_id is None else node_id)
+        return ids
+
+    def _solve_ids(self, start_id, goal_id, k, adaptive, classic):
+        if start_id < 0 or goal_id < 0: return None
+        start, goal = self._node(start_id), self._node(goal_id)
+        if classic: return self.solve_classic(start, goal, output='ids')
+        return self.solve(start, goal, k, adaptive, output='ids')
+
+    def _native_h_mode(self):
+        if self.h == 'manhattan': return 1
+        if self.h == 'octile': return 3
+        if self.h == 'alt':
+            if not self._native.num_landmarks:
+                # Tables dropped by an in-place update are rebuilt for the same landmarks.
+                if not self._native.rebuild_landmarks(0): self.build_landmarks()
+            return 5
+        if callable(self.h):
+            if self._h_bound is not self.h: self._bind_heuristic()
+            return 4
+        return 0
+
+    def _native_heuristic(self, goal_id):
+        """(mode, h_values) for a search towards `goal_id`; h_values is a float32 array or None."""
+        if not isinstance(self.h, vectorized): return self._native_h_mode(), None
+        return 2, self._heuristic_values(goal_id)
+
+    def _heuristic_values(self, goal_id):
+        """Values of the vectorized heuristic towards `goal_id` for every node, as a float32 array."""
+        if self._h_arrays_for is not self.h:
+            self._h_arrays.clear()
+            self._h_arrays_for = self.h
+        values = self._h_arrays.get(goal_id)
+        if values is None:
+            np = _numpy()
+            if self._h_nodes is None: self._h_nodes = self._heuristic_nodes(np)
+            values = np.ascontiguousarray(self.h(self._h_nodes, self._node(goal_id)), dtype=np.float32)
+            if values.shape != (self._num_nodes,):
+                raise ValueError(f"vectorized heuristic must return {self._num_nodes} values")
+            self._h_arrays.put(goal_id, values)
+        return values
+
+    def _heuristic_nodes(self, np):
+        ids = np.arange(self._num_nodes, dtype=np.intc)
+        if self._grid_shape is not None or (self._id_to_node and isinstance(self._id_to_node[0], tuple)):
+            return self._ids_to_coords(np, ids)
+        if self._id_to_node is None: return ids
+        nodes = np.empty(self._num_nodes, dtype=object)
+        nodes[:] = self._id_to_node
+        return nodes
+
+    def _bind_heuristic(self):
+        h, errors = self.h, self._h_errors
+        if self._grid_shape is not None:
+            width = self._width
+            to_node = lambda i: (i % width, i // width)
+        elif self._id_to_node is None:
+            to_node = int
+        else:
+            to_node = self._id_to_node.__getitem__
+
+        def callback(node_id, goal_id):
+            # Exceptions cannot cross the C++ frames; keep the first one and
+            # re-raise it once the search has returned.
+            if errors: return 0.0
+            try:
+                return float(h(to_node(node_id), to_node(goal_id)))
+            except BaseException as e:
+                errors.append(e)
+                return 0.0
+
+        self._h_callback = callback
+        self._h_bound = h
+        self._native.set_heuristic(callback)
+
+    def _raise_heuristic_error(self):
+        if self._h_errors:
+            error = self._h_errors[0]
+            self._h_errors.clear()
+            # Values memoized after the failure are placeholders, drop them.
+            self._native.set_heuristic(self._h_callback)
+            raise error
+
+    def _solve_cpp(self, start, goal, k, adaptive, output='nodes'):
+        return self._search(self._native.solve, start, goal, (k, int(adaptive)), output)
+
+    def _solve_python(self, start, goal, k, adaptive, output):
+        start_id, goal_id = self._lookup(start), self._lookup(goal)
+        if start_id is None or goal_id is None: return None
+        results = self._result_cache()
+        if results is not None:
+            key = ('python', start_id, goal_id, k, adaptive)
+            ids = results.get(key)
+            if ids is not None: return self._format_path(ids, len(ids), output) if ids else None
+        stats = {} if self.collect_stats else None
+        path = self._engine.search(start_id, goal_id, k, adaptive, self._python_heuristic(goal_id), stats)
+        if stats is not None: self.stats = stats
+        ids = array('i', path or ())
+        if results is not None: results.put(key, ids)
+        if not ids: return None
+        return self._format_path(ids, len(ids), output)
+
+    def _python_heuristic(self, goal_id):
+        """`h(node id)` towards `goal_id` for the Python engine, None for no heuristic."""
+        h = self.h
+        if h is None: return None
+        if isinstance(h, vectorized): return self._heuristic_values(goal_id).tolist().__getitem__
+        if callable(h):
+            to_node, goal = self._id_to_node.__getitem__, self._id_to_node[goal_id]
+            return lambda u: float(h(to_node(u), goal))
+        if h in ('manhattan', 'octile'): return self._engine.distance_heuristic(h, goal_id)
+        raise ValueError(f"the {h!r} heuristic needs the C++ backend")
+
+    def _require_cpp(self, feature):
+        if not self.use_cpp: raise RuntimeError(f"{feature} needs the C++ backend")
+
+    def _search(self, fn, start, goal, params, output, heuristic=True):
+        start_id, goal_id = self._lookup(start), self._lookup(goal)
+        if start_id is None or goal_id is None: return None
+        results = self._result_cache()
+        if results is not None:
+            key = (fn.__name__, start_id, goal_id) + params
+            ids = results.get(key)
+            if ids is not None: return self._format_path(ids, len(ids), output) if ids else None
+        if heuristic: params += self._native_heuristic(goal_id)
+        # The path comes back as a read-only int buffer, not copied.
+        ids = memoryview(self._native_call(fn, start_id, goal_id, *params))
+        if results is not None: results.put(key, ids)
+        if not ids: return None
+        return self._format_path(ids, len(ids), output)
+
+    def _result_cache(self):
+        """The result cache, emptied first if the graph or heuristic changed since it was filled."""
+        if not self._results.capacity: return None
+        state = (self._native.version if self.use_cpp else 0, self.h)
+        if state != self._results_for:
+            self._results.clear()
+            self._results_for = state
+        return self._results
@@ -0,0 +1,83 @@
+import asyncio
+import random
+import time
+
+from astart import AStart
+from astart.aio import AsyncSolver
+from synthetic_maps import generate
+
+# Configuration
+MAP_KIND = 'rooms'
+MAP_SIZE = 256
+CLIENTS = 64            # concurrent coroutines, each sending queries one after another
+QUERIES_PER_CLIENT = 20
+HOT_QUERIES = 0.25      # share of queries drawn from a few popular (start, goal) pairs
+K = 20
+SEED = 3
+
+def make_queries(walkable):
+    rng = random.Random(SEED)
+    cells = [(x, y) for y in range(MAP_SIZE) for x in range(MAP_SIZE) if walkable[y][x]]
+    hot = [(rng.choice(cells), rng.choice(cells)) for _ in range(8)]
+    return [[rng.choice(hot) if rng.random() < HOT_QUERIES else (rng.choice(cells), rng.choice(cells))
+             for _ in range(QUERIES_PER_CLIENT)] for _ in range(CLIENTS)]
+
+async def serve(solve, queries):
+    """Run the clients; (seconds, per-query latencies, longest event loop stall)."""
+    beats = [time.perf_counter()]
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(0.001)
+            beats.append(time.perf_counter())
+    latencies = []
+    async def client(own):
+        for start, goal in own:
+            t0 = time.perf_counter()
+            await solve(start, goal)
+            latencies.append(time.perf_counter() - t0)
+    beat = asyncio.ensure_future(heartbeat())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(own) for own in queries))
+    elapsed = time.perf_counter() - t0
+    beat.cancel()
+    # An inline solve starves the heartbeat until the end: count that last gap too.
+    beats.append(time.perf_counter())
+    return elapsed, sorted(latencies), max(b - a for a, b in zip(beats, beats[1:])) - 0.001
+
+def run():
+    walkable = generate(MAP_KIND, MAP_SIZE)
+    solver = AStart.from_grid(walkable)
+    queries = make_queries(walkable)
+    total = CLIENTS * QUERIES_PER_CLIENT
+
+    async def inline(start, goal):
+        return solver.solve(start, goal, k=K)
+
+    async def per_request(start, goal):
+        return await asyncio.get_running_loop().run_in_executor(None, lambda: solver.solve(start, goal, k=K))
+
+    front_end = None
+    async def coalesced(start, goal):
+        return await front_end.solve(start, goal, k=K)
+
+    print(f"{CLIENTS} clients x {QUERIES_PER_CLIENT} queries on a {MAP_SIZE}x{MAP_SIZE} {MAP_KIND} map, k={K}")
+    print(f"{'FRONT-END':<24} | {'QUERIES/S':<9} | {'P50 (ms)':<8} | {'P99 (ms)':<8} | {'LOOP STALL (ms)'}")
+    print("-" * 76)
+    for name, solve in (("inline solve", inline), ("executor per request", per_request), ("solve_async", coalesced)):
+        async def main():
+            nonlocal front_end
+            front_end = AsyncSolver(solver)
+            try:
+                return await serve(solve, queries)
+            finally:
+                front_end.close()
+        elapsed, latencies, stall = asyncio.run(main())
+        p50, p99 = latencies[len(latencies) // 2], latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+        print(f"{name:<24} | {total / elapsed:<9.0f} | {p50 * 1000:<8.2f} | {p99 * 1000:<8.2f} | {stall * 1000:.2f}")
+        if solve is coalesced: stats = front_end.stats()
+
+    print(f"\nsolve_async: {stats['searches']} searches for {stats['requests']} requests "
+          f"({stats['deduplicated']} deduplicated) in {stats['batches']} batches of {stats['batch_size_mean']:.1f}")
+
+if __name__ == "__main__":
+    run()
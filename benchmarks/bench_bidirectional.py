@@ -0,0 +1,68 @@
+import random
+import time
+
+from astart import AStart
+from bench_open_list import movingai_maps, synthetic_map
+
+# Configuration
+K = 20
+ROOMS_SIZE = 512     # synthetic indoor map: ROOM x ROOM rooms joined by one-cell doors
+ROOM = 32
+NUM_QUERIES = 200
+SEED = 7
+
+MODES = (
+    ("Classic A*", lambda solver, s, g: solver.solve_classic(s, g, output='ids')),
+    (f"Batch A* (k={K})", lambda solver, s, g: solver.solve(s, g, k=K, output='ids')),
+    (f"Bidirectional (k={K})", lambda solver, s, g: solver.solve(s, g, k=K, output='ids', bidirectional=True)),
+    ("Bidirectional (k=1)", lambda solver, s, g: solver.solve(s, g, k=1, output='ids', bidirectional=True)),
+)
+
+def rooms_map(size, room, seed):
+    """Rooms separated by walls with one door per wall: long queries must detour, as on DAO maps."""
+    rng = random.Random(seed)
+    walkable = [[x % room and y % room for x in range(size)] for y in range(size)]
+    for ry in range(0, size, room):
+        for rx in range(0, size, room):
+            if rx: walkable[ry + rng.randrange(1, room)][rx] = True
+            if ry: walkable[ry][rx + rng.randrange(1, room)] = True
+    cells = [(x, y) for y in range(size) for x in range(size) if walkable[y][x]]
+    queries = []
+    while len(queries) < NUM_QUERIES:
+        start, goal = rng.choice(cells), rng.choice(cells)
+        if abs(start[0] - goal[0]) + abs(start[1] - goal[1]) >= size // 2: queries.append((start, goal))
+    return f"rooms {size}x{size}", walkable, queries
+
+def run():
+    maps = list(movingai_maps()) or [synthetic_map(), rooms_map(ROOMS_SIZE, ROOM, SEED)]
+    for name, walkable, scenarios in maps:
+        solver = AStart.from_grid(walkable)
+        solver.collect_stats = True
+        print(f"\nMap: {name}, {len(scenarios)} scenarios")
+        print(f"{'MODE':<24} | {'QUERY (ms)':<10} | {'EXPANDED':<9} | {'COST vs CLASSIC'}")
+        print("-" * 66)
+        optimal = None
+        for mode, solve in MODES:
+            expanded, total, elapsed = 0, 0.0, 0.0
+            lengths = []
+            for start, goal in scenarios:
+                t0 = time.perf_counter()
+                path = solve(solver, start, goal)
+                elapsed += time.perf_counter() - t0
+                expanded += solver.stats['nodes_expanded']
+                lengths.append(path_cost(solver, path))
+            total = sum(lengths)
+            if optimal is None: optimal = total
+            print(f"{mode:<24} | {elapsed / len(scenarios) * 1000:<10.3f} | {expanded / len(scenarios):<9.0f} | "
+                  f"{total / optimal:.4f}")
+
+def path_cost(solver, path):
+    if path is None: return 0.0
+    width = solver._width
+    cost = 0.0
+    for u, v in zip(path, path[1:]):
+        cost += 1.0 if abs(u - v) in (1, width) else 1.41421356
+    return cost
+
+if __name__ == "__main__":
+    run()
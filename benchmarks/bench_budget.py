@@ -0,0 +1,54 @@
+import time
+
+from astart import AStart
+from bench_bidirectional import ROOM, ROOMS_SIZE, SEED, rooms_map
+from bench_open_list import movingai_maps, synthetic_map
+
+# Configuration
+K = 20
+DEADLINES_US = (250, 1000, 4000)   # per-tick budgets
+EXPANSIONS = (1000, 10000)
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def run_ticks(scenarios, start_search):
+    """Runs every query to completion one tick at a time; returns per-tick times (ms) and ticks per query."""
+    ticks, counts = [], []
+    for start, goal in scenarios:
+        t0 = time.perf_counter()
+        search = start_search(start, goal)
+        ticks.append((time.perf_counter() - t0) * 1000)
+        count = 1
+        while not search.done:
+            t0 = time.perf_counter()
+            search.resume()
+            ticks.append((time.perf_counter() - t0) * 1000)
+            count += 1
+        counts.append(count)
+    return ticks, counts
+
+def run():
+    maps = list(movingai_maps()) or [synthetic_map(), rooms_map(ROOMS_SIZE, ROOM, SEED)]
+    for name, walkable, scenarios in maps:
+        solver = AStart.from_grid(walkable)
+        print(f"\nMap: {name}, {len(scenarios)} scenarios, batch A* k={K}")
+        print(f"{'BUDGET':<18} | {'TICK P50 (ms)':<13} | {'TICK P99 (ms)':<13} | {'TICK MAX (ms)':<13} | {'TICKS/QUERY'}")
+        print("-" * 78)
+        latencies = []
+        for start, goal in scenarios:
+            t0 = time.perf_counter()
+            solver.solve(start, goal, k=K, output='ids')
+            latencies.append((time.perf_counter() - t0) * 1000)
+        print(f"{'none':<18} | {percentile(latencies, 0.5):<13.3f} | {percentile(latencies, 0.99):<13.3f} | "
+              f"{max(latencies):<13.3f} | 1.0")
+        budgets = [(f"deadline {us} us", dict(deadline_us=us)) for us in DEADLINES_US]
+        budgets += [(f"{n} expansions", dict(max_expansions=n)) for n in EXPANSIONS]
+        for label, budget in budgets:
+            ticks, counts = run_ticks(scenarios, lambda s, g: solver.solve(s, g, k=K, output='ids', **budget))
+            print(f"{label:<18} | {percentile(ticks, 0.5):<13.3f} | {percentile(ticks, 0.99):<13.3f} | "
+                  f"{max(ticks):<13.3f} | {sum(counts) / len(counts):.1f}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,86 @@
+import random
+import time
+from array import array
+
+from astart import AStart
+from astart import solver as astart_solver
+
+# Configuration
+SIZE = 512           # Dragon Age sized map (SIZE x SIZE cells)
+OBSTACLE_RATIO = 0.2
+SEED = 7
+SQRT2 = 1.41421356
+
+def make_grid(size, ratio, seed):
+    rng = random.Random(seed)
+    return [[rng.random() >= ratio for _ in range(size)] for _ in range(size)]
+
+def build_dict_graph(grid):
+    """Same adjacency as benchmarks/run_all_movingai.py: 8-connected, no corner cutting."""
+    height, width = len(grid), len(grid[0])
+    adj = {}
+    for y in range(height):
+        for x in range(width):
+            nbrs = {}
+            adj[(x, y)] = nbrs
+            if not grid[y][x]: continue
+            for dx, dy, cost in ((-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+                                 (-1, -1, SQRT2), (-1, 1, SQRT2), (1, -1, SQRT2), (1, 1, SQRT2)):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < width and 0 <= ny < height and grid[ny][nx]:
+                    if dx and dy and not (grid[y][nx] and grid[ny][x]): continue
+                    nbrs[(nx, ny)] = cost
+    return adj
+
+def dict_to_edges(adj, width):
+    src, dst, wts = array('i'), array('i'), array('f')
+    for (x, y), nbrs in adj.items():
+        u = y * width + x
+        for (nx, ny), w in nbrs.items():
+            src.append(u)
+            dst.append(ny * width + nx)
+            wts.append(w)
+    return src, dst, wts
+
+def edges_to_csr(src, dst, wts, num_nodes):
+    order = sorted(range(len(src)), key=src.__getitem__)
+    indptr = array('i', [0] * (num_nodes + 1))
+    for u in src: indptr[u + 1] += 1
+    for i in range(num_nodes): indptr[i + 1] += indptr[i]
+    return indptr, array('i', (dst[i] for i in order)), array('f', (wts[i] for i in order))
+
+def build_per_edge(adj):
+    """The pre-bulk ingestion path: one native add_edge call per edge."""
+    id_to_node = sorted(adj.keys(), key=lambda p: (p[1], p[0]))
+    node_to_id = {n: i for i, n in enumerate(id_to_node)}
+    graph = astart_solver._cpp_lib.Graph(len(id_to_node))
+    for u, nbrs in adj.items():
+        u_id = node_to_id[u]
+        for v, w in nbrs.items():
+            graph.add_edge(u_id, node_to_id[v], float(w))
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+def run():
+    grid = make_grid(SIZE, OBSTACLE_RATIO, SEED)
+    adj = build_dict_graph(grid)
+    src, dst, wts = dict_to_edges(adj, SIZE)
+    indptr, indices, csr_w = edges_to_csr(src, dst, wts, SIZE * SIZE)
+    print(f"Map: {SIZE}x{SIZE}, {len(src)} edges")
+
+    _, t_per_edge = timed(build_per_edge, adj)
+    _, t_dict = timed(AStart, adj, 'octile')
+    _, t_edges = timed(AStart.from_edges, src, dst, wts, SIZE * SIZE, 'octile', SIZE)
+    _, t_csr = timed(AStart.from_csr, indptr, indices, csr_w, 'octile', SIZE)
+
+    print(f"{'BUILD PATH':<28} | {'TIME (s)':<10} | {'SPEEDUP'}")
+    print("-" * 52)
+    for name, t in (("Per-edge add_edge (legacy)", t_per_edge), ("Dict-of-dicts (AStart)", t_dict),
+                    ("AStart.from_edges", t_edges), ("AStart.from_csr", t_csr)):
+        print(f"{name:<28} | {t:<10.4f} | {t_per_edge / t:.1f}x")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,44 @@
+import random
+import time
+
+from astart import AStart
+from bench_build import make_grid
+
+# Configuration
+SIZE = 512
+OBSTACLE_RATIO = 0.2
+SEED = 7
+NUM_AGENTS = 500
+K = 20
+
+def run():
+    grid = make_grid(SIZE, OBSTACLE_RATIO, SEED)
+    solver = AStart.from_grid(grid)
+    rng = random.Random(SEED)
+    cells = [(x, y) for y in range(SIZE) for x in range(SIZE) if grid[y][x]]
+    goal = rng.choice(cells)
+    agents = [rng.choice(cells) for _ in range(NUM_AGENTS)]
+
+    t0 = time.perf_counter()
+    for start in agents:
+        solver.solve(start, goal, k=K)
+    t_solve = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    field = solver.distance_field(goal)
+    t_field = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for start in agents:
+        field.path_from(start)
+    t_paths = time.perf_counter() - t0
+
+    print(f"Map: {SIZE}x{SIZE}, {NUM_AGENTS} agents converging on one goal, k={K}")
+    print(f"{'METHOD':<28} | {'TIME (s)':<10} | {'SPEEDUP'}")
+    print("-" * 52)
+    print(f"{'solve() per agent':<28} | {t_solve:<10.4f} | 1.0x")
+    print(f"{'distance_field() build':<28} | {t_field:<10.4f} |")
+    print(f"{'path_from() per agent':<28} | {t_paths:<10.4f} |")
+    print(f"{'Field total':<28} | {t_field + t_paths:<10.4f} | {t_solve / (t_field + t_paths):.1f}x")
+
+if __name__ == "__main__":
+    run()
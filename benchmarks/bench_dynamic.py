@@ -0,0 +1,66 @@
+import random
+import time
+
+from astart import AStart
+from bench_bidirectional import ROOM, ROOMS_SIZE, SEED, rooms_map
+from bench_open_list import movingai_maps, synthetic_map
+
+# Configuration
+NUM_AGENTS = 20      # scenarios walked per map
+STEPS = 50           # moves per agent; a cell ahead on its path is blocked every BLOCK_EVERY moves
+BLOCK_EVERY = 5
+
+def walk(solver, start, goal, plan, rng):
+    """Walk an agent STEPS moves, blocking cells ahead of it; returns (seconds, expansions, replans, blocked cells)."""
+    elapsed, expanded, replans, blocked = 0.0, 0, 0, []
+    path = plan(start, goal, True)
+    for step in range(STEPS):
+        if not path or len(path) < 3: break
+        start = path[1]
+        if step % BLOCK_EVERY == 0:
+            cell = path[rng.randrange(2, len(path))]
+            if cell != goal:
+                solver.set_walkable(cell, False)
+                blocked.append(cell)
+        t0 = time.perf_counter()
+        path = plan(start, goal, False)
+        elapsed += time.perf_counter() - t0
+        expanded += solver.stats['nodes_expanded']
+        replans += 1
+    return elapsed, expanded, replans, blocked
+
+def run():
+    maps = list(movingai_maps()) or [synthetic_map(), rooms_map(ROOMS_SIZE, ROOM, SEED)]
+    for name, walkable, scenarios in maps:
+        solver = AStart.from_grid(walkable)
+        solver.collect_stats = True
+        scenarios = scenarios[:NUM_AGENTS]
+        print(f"\nMap: {name}, {len(scenarios)} agents x {STEPS} moves, a cell blocked every {BLOCK_EVERY} moves")
+        print(f"{'MODE':<20} | {'REPLAN (ms)':<11} | {'EXPANDED':<9} | {'SPEEDUP'}")
+        print("-" * 56)
+
+        def fresh(start, goal, first):
+            return solver.solve_classic(start, goal)
+
+        def replanner():
+            state = {}
+            def plan(start, goal, first):
+                if first: state['r'] = solver.replanner(start, goal)
+                else: state['r'].move(start)
+                return state['r'].path()
+            return plan
+
+        baseline = None
+        for mode, plan in (("Classic A*", fresh), ("D* Lite replanner", replanner())):
+            rng = random.Random(SEED)
+            elapsed = expanded = replans = 0
+            for start, goal in scenarios:
+                ms, nodes, count, blocked = walk(solver, start, goal, plan, rng)
+                elapsed += ms; expanded += nodes; replans += count
+                for cell in blocked: solver.set_walkable(cell, True)
+            ms = elapsed / replans * 1000
+            if baseline is None: baseline = ms
+            print(f"{mode:<20} | {ms:<11.3f} | {expanded / replans:<9.0f} | {baseline / ms:.1f}x")
+
+if __name__ == "__main__":
+    run()
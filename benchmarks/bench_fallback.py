@@ -0,0 +1,37 @@
+import random
+import time
+
+from astart import AStart
+from bench_build import build_dict_graph, make_grid
+
+# Configuration
+SIZES = (64, 128, 256)
+OBSTACLE_RATIO = 0.2
+SEED = 7
+NUM_QUERIES = 50
+K_VALUES = (1, 20)    # k=1 is classic A*
+
+def time_queries(solver, queries, k):
+    t0 = time.perf_counter()
+    for start, goal in queries:
+        if k == 1: solver.solve_classic(start, goal, output='ids')
+        else: solver.solve(start, goal, k=k, output='ids')
+    return (time.perf_counter() - t0) / len(queries) * 1000
+
+def run():
+    print(f"{'MAP':<10} | {'K':<3} | {'C++ (ms)':<9} | {'PYTHON (ms)':<11} | {'GAP'}")
+    print("-" * 48)
+    for size in SIZES:
+        grid = make_grid(size, OBSTACLE_RATIO, SEED)
+        graph = build_dict_graph(grid)
+        rng = random.Random(SEED)
+        cells = [(x, y) for y in range(size) for x in range(size) if grid[y][x]]
+        queries = [(rng.choice(cells), rng.choice(cells)) for _ in range(NUM_QUERIES)]
+        cpp = AStart(graph, 'octile', use_cpp=True)
+        python = AStart(graph, 'octile', use_cpp=False)
+        for k in K_VALUES:
+            cpp_ms, python_ms = time_queries(cpp, queries, k), time_queries(python, queries, k)
+            print(f"{f'{size}x{size}':<10} | {k:<3} | {cpp_ms:<9.3f} | {python_ms:<11.3f} | {python_ms / cpp_ms:.0f}x")
+
+if __name__ == "__main__":
+    run()
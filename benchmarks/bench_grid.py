@@ -0,0 +1,45 @@
+import random
+import time
+
+from astart import AStart
+from bench_build import build_dict_graph, make_grid
+
+# Configuration
+SIZE = 512
+OBSTACLE_RATIO = 0.2
+SEED = 7
+NUM_QUERIES = 200
+K = 20
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+def run_queries(solver, queries):
+    t0 = time.perf_counter()
+    for start, goal in queries:
+        solver.solve(start, goal, k=K)
+    return (time.perf_counter() - t0) / len(queries) * 1000
+
+def run():
+    grid = make_grid(SIZE, OBSTACLE_RATIO, SEED)
+    rng = random.Random(SEED)
+    cells = [(x, y) for y in range(SIZE) for x in range(SIZE) if grid[y][x]]
+    queries = [(rng.choice(cells), rng.choice(cells)) for _ in range(NUM_QUERIES)]
+
+    adj, t_adj = timed(build_dict_graph, grid)
+    dict_solver, t_dict = timed(AStart, adj, 'octile')
+    grid_solver, t_grid = timed(AStart.from_grid, grid)
+
+    print(f"Map: {SIZE}x{SIZE}, {NUM_QUERIES} queries, k={K}")
+    print(f"{'ENGINE':<22} | {'BUILD (s)':<10} | {'B/NODE':<8} | {'QUERY (ms)'}")
+    print("-" * 60)
+    for name, solver, t_build in (("Dict-of-dicts + CSR", dict_solver, t_adj + t_dict),
+                                  ("Implicit grid", grid_solver, t_grid)):
+        solver.release_workspaces()
+        usage = solver.memory_usage()
+        print(f"{name:<22} | {t_build:<10.4f} | {usage['bytes_per_node']:<8.1f} | {run_queries(solver, queries):.3f}")
+
+if __name__ == "__main__":
+    run()
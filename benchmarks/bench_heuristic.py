@@ -0,0 +1,75 @@
+import math
+import random
+import time
+from array import array
+
+from astart import AStart, vectorized
+from bench_build import make_grid
+
+# Configuration
+SIZE = 256
+OBSTACLE_RATIO = 0.2
+SEED = 7
+NUM_QUERIES = 50
+K = 20
+
+class CountingOctile:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, u, goal):
+        self.calls += 1
+        dx, dy = abs(u[0] - goal[0]), abs(u[1] - goal[1])
+        return dx + dy + (math.sqrt(2) - 2) * min(dx, dy)
+
+def solve_eager(solver, start, goal):
+    """The pre-callback behaviour: evaluate the heuristic for every node, then search."""
+    goal_id = solver._lookup(goal)
+    h_array = array('f', (solver.h(solver._node(i), goal) for i in range(solver._num_nodes)))
+    return solver._native_call(solver._native.solve, solver._lookup(start), goal_id, K, 0, 2, h_array)
+
+def solve_lazy(solver, start, goal):
+    return solver.solve(start, goal, k=K)
+
+def run():
+    grid = make_grid(SIZE, OBSTACLE_RATIO, SEED)
+    rng = random.Random(SEED)
+    cells = [(x, y) for y in range(SIZE) for x in range(SIZE) if grid[y][x]]
+    queries = []
+    while len(queries) < NUM_QUERIES:
+        sx, sy = rng.choice(cells)
+        gx, gy = sx + rng.randint(-32, 32), sy + rng.randint(-32, 32)
+        if 0 <= gx < SIZE and 0 <= gy < SIZE and grid[gy][gx]:
+            queries.append(((sx, sy), (gx, gy)))
+
+    print(f"Map: {SIZE}x{SIZE}, {NUM_QUERIES} local queries, k={K}")
+    print(f"{'HEURISTIC':<24} | {'PY CALLS/QUERY':<15} | {'QUERY (ms)'}")
+    print("-" * 56)
+    modes = [("Eager fill (legacy)", solve_eager), ("Lazy callback", solve_lazy)]
+    for name, solve in modes:
+        h = CountingOctile()
+        solver = AStart.from_grid(grid, heuristic_func=h)
+        t0 = time.perf_counter()
+        for start, goal in queries:
+            solve(solver, start, goal)
+        t = time.perf_counter() - t0
+        print(f"{name:<24} | {h.calls / NUM_QUERIES:<15.0f} | {t / NUM_QUERIES * 1000:.3f}")
+
+    try:
+        import numpy as np
+    except ImportError:
+        return
+    calls = []
+    def octile(nodes, goal):
+        calls.append(goal)
+        dx, dy = np.abs(nodes[:, 0] - goal[0]), np.abs(nodes[:, 1] - goal[1])
+        return dx + dy + (math.sqrt(2) - 2) * np.minimum(dx, dy)
+    solver = AStart.from_grid(grid, heuristic_func=vectorized(octile))
+    t0 = time.perf_counter()
+    for start, goal in queries:
+        solver.solve(start, goal, k=K)
+    t = time.perf_counter() - t0
+    print(f"{'Vectorized (NumPy)':<24} | {len(calls) / NUM_QUERIES:<15.0f} | {t / NUM_QUERIES * 1000:.3f}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,49 @@
+import time
+
+from astart import AStart, HierarchicalSolver
+from bench_bidirectional import ROOM, ROOMS_SIZE, SEED, path_cost, rooms_map
+from bench_open_list import movingai_maps, synthetic_map
+
+# Configuration
+CLUSTER_SIZES = (16, 32, 64)
+HUGE_SIZE = 1024     # extra rooms map when running on the synthetic fallback
+
+def run():
+    maps = list(movingai_maps()) or [synthetic_map(), rooms_map(ROOMS_SIZE, ROOM, SEED), rooms_map(HUGE_SIZE, ROOM, SEED)]
+    for name, walkable, scenarios in maps:
+        solver = AStart.from_grid(walkable)
+        optimal, elapsed = {}, 0.0
+        for start, goal in scenarios:
+            t0 = time.perf_counter()
+            path = solver.solve_classic(start, goal, output='ids')
+            elapsed += time.perf_counter() - t0
+            if path is not None: optimal[start, goal] = path_cost(solver, path)
+        print(f"\nMap: {name}, {len(scenarios)} scenarios, classic A* {elapsed / len(scenarios) * 1000:.3f} ms/query")
+        print(f"{'CLUSTER':<8} | {'BUILD (s)':<9} | {'TRANSITIONS':<11} | {'ABSTRACT (ms)':<13} | "
+              f"{'FIRST STEP (ms)':<15} | {'FULL PATH (ms)':<14} | {'SUBOPT MEAN':<11} | {'SUBOPT MAX'}")
+        print("-" * 116)
+        for size in CLUSTER_SIZES:
+            hpa = HierarchicalSolver(solver, cluster_size=size)
+            abstract = first = full = 0.0
+            ratios = []
+            for start, goal in scenarios:
+                t0 = time.perf_counter()
+                path = hpa.solve(start, goal)
+                t1 = time.perf_counter()
+                if path is None: continue
+                next(iter(path))
+                t2 = time.perf_counter()
+                cells = path.cells()
+                t3 = time.perf_counter()
+                abstract += t1 - t0
+                first += t2 - t0
+                full += (t1 - t0) + (t3 - t2)
+                best = optimal.get((start, goal))
+                if best: ratios.append(path.cost / best)
+            n = len(scenarios)
+            print(f"{size:<8} | {hpa.build_time:<9.2f} | {hpa.num_transitions:<11} | {abstract / n * 1000:<13.3f} | "
+                  f"{first / n * 1000:<15.3f} | {full / n * 1000:<14.3f} | {sum(ratios) / len(ratios):<11.4f} | "
+                  f"{max(ratios):.4f}")
+
+if __name__ == "__main__":
+    run()
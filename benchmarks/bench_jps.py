@@ -0,0 +1,39 @@
+import time
+
+from astart import AStart
+from bench_bidirectional import ROOM, ROOMS_SIZE, SEED, rooms_map
+from bench_open_list import movingai_maps, synthetic_map
+
+# Configuration
+K_VALUES = (1, 5, 20, 50, 100)
+
+def run_mode(solver, scenarios, solve):
+    expanded = 0
+    t0 = time.perf_counter()
+    for start, goal in scenarios:
+        solve(start, goal)
+        expanded += solver.stats['nodes_expanded']
+    return (time.perf_counter() - t0) / len(scenarios) * 1000, expanded / len(scenarios)
+
+def run():
+    maps = list(movingai_maps()) or [synthetic_map(), rooms_map(ROOMS_SIZE, ROOM, SEED)]
+    for name, walkable, scenarios in maps:
+        solver = AStart.from_grid(walkable)
+        solver.collect_stats = True
+        modes = [("Classic A*", lambda s, g: solver.solve_classic(s, g, output='ids'))]
+        modes += [(f"Batch A* (k={k})", lambda s, g, k=k: solver.solve(s, g, k=k, output='ids')) for k in K_VALUES[1:]]
+        modes += [
+            ("JPS (cells)", lambda s, g: solver.solve_jps(s, g, output='ids')),
+            ("JPS (waypoints)", lambda s, g: solver.solve_jps(s, g, output='ids', waypoints=True)),
+        ]
+        print(f"\nMap: {name}, {len(scenarios)} scenarios")
+        print(f"{'MODE':<20} | {'QUERY (ms)':<10} | {'EXPANDED':<9} | {'SPEEDUP'}")
+        print("-" * 56)
+        baseline = None
+        for mode, solve in modes:
+            ms, expanded = run_mode(solver, scenarios, solve)
+            if baseline is None: baseline = ms
+            print(f"{mode:<20} | {ms:<10.3f} | {expanded:<9.0f} | {baseline / ms:.1f}x")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,73 @@
+import io
+import os
+import random
+import time
+from array import array
+
+from astart import AStart
+
+# Configuration
+SIZE = 300           # SIZE x SIZE intersections
+DROP_RATIO = 0.1     # fraction of road segments removed
+SEED = 7
+NUM_QUERIES = 200
+LANDMARKS = 16
+
+def road_grid(size, drop, seed):
+    """A city-like road network: a perturbed lattice of one-way and two-way streets."""
+    rng = random.Random(seed)
+    src, dst, wts = array('i'), array('i'), array('f')
+    for y in range(size):
+        for x in range(size):
+            u = y * size + x
+            for nx, ny in ((x + 1, y), (x, y + 1)):
+                if nx >= size or ny >= size or rng.random() < drop: continue
+                v = ny * size + nx
+                w = rng.uniform(1.0, 3.0)
+                # 90% two-way streets, the rest one-way in either direction
+                r = rng.random()
+                if r < 0.95:
+                    src.append(u); dst.append(v); wts.append(w)
+                if r < 0.9 or r >= 0.95:
+                    src.append(v); dst.append(u); wts.append(w)
+    return src, dst, wts
+
+def run_queries(solver, queries):
+    expanded = 0
+    t0 = time.perf_counter()
+    for start, goal in queries:
+        solver.solve_classic(start, goal)
+        expanded += solver.stats['nodes_expanded']
+    return (time.perf_counter() - t0) / len(queries) * 1000, expanded / len(queries)
+
+def run():
+    num_nodes = SIZE * SIZE
+    edges = road_grid(SIZE, DROP_RATIO, SEED)
+    rng = random.Random(SEED)
+    queries = [(rng.randrange(num_nodes), rng.randrange(num_nodes)) for _ in range(NUM_QUERIES)]
+    print(f"Road network: {num_nodes} nodes, {len(edges[0])} edges, {NUM_QUERIES} queries, {os.cpu_count()} cores")
+
+    print(f"{'PRECOMPUTE':<28} | {'TIME (s)'}")
+    print("-" * 40)
+    alt = AStart.from_edges(*edges, num_nodes=num_nodes, heuristic_func='alt')
+    for threads in sorted({1, os.cpu_count() or 1}):
+        t0 = time.perf_counter()
+        alt.build_landmarks(LANDMARKS, threads=threads)
+        print(f"{f'{LANDMARKS} landmarks, {threads} thr':<28} | {time.perf_counter() - t0:.4f}")
+    buf = io.BytesIO()
+    alt.save_landmarks(buf)
+    buf.seek(0)
+    t0 = time.perf_counter()
+    AStart.from_edges(*edges, num_nodes=num_nodes, heuristic_func='alt').load_landmarks(buf)
+    print(f"{'load_landmarks()':<28} | {time.perf_counter() - t0:.4f}")
+
+    dijkstra = AStart.from_edges(*edges, num_nodes=num_nodes)
+    print(f"\n{'HEURISTIC':<28} | {'QUERY (ms)':<10} | {'EXPANDED'}")
+    print("-" * 52)
+    for name, solver in (("None (Dijkstra)", dijkstra), (f"ALT ({LANDMARKS} landmarks)", alt)):
+        solver.collect_stats = True
+        ms, expanded = run_queries(solver, queries)
+        print(f"{name:<28} | {ms:<10.3f} | {expanded:.0f}")
+
+if __name__ == "__main__":
+    run()
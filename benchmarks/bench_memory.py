@@ -0,0 +1,70 @@
+import ctypes
+import ctypes.util
+import gc
+import os
+import random
+
+from astart import AStart
+
+# Configuration
+SIZE = 512
+OBSTACLE_RATIO = 0.2
+SEED = 7
+SQRT2 = 1.41421356
+
+def rss_bytes():
+    """Current resident set size (Linux /proc, falls back to peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def release_free_heap():
+    # Ask glibc to hand freed pages back so RSS reflects live data only.
+    libc_name = ctypes.util.find_library("c")
+    if libc_name:
+        libc = ctypes.CDLL(libc_name)
+        if hasattr(libc, "malloc_trim"): libc.malloc_trim(0)
+
+def grid_edges(size, ratio, seed):
+    rng = random.Random(seed)
+    free = [[rng.random() >= ratio for _ in range(size)] for _ in range(size)]
+    for y in range(size):
+        for x in range(size):
+            if not free[y][x]: continue
+            for dx, dy, cost in ((-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+                                 (-1, -1, SQRT2), (-1, 1, SQRT2), (1, -1, SQRT2), (1, 1, SQRT2)):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size and free[ny][nx]:
+                    if dx and dy and not (free[y][nx] and free[ny][x]): continue
+                    yield y * size + x, ny * size + nx, cost
+
+def run():
+    edges = list(grid_edges(SIZE, OBSTACLE_RATIO, SEED))
+    num_nodes = SIZE * SIZE
+    solver = AStart.from_edges([], [], num_nodes=num_nodes, heuristic_func='octile', width=SIZE)
+
+    gc.collect(); release_free_heap()
+    rss_empty = rss_bytes()
+    # Per-edge insertion keeps one adjacency vector per node until finalize().
+    for u, v, w in edges:
+        solver.add_edge(u, v, w)
+    gc.collect(); release_free_heap()
+    before = solver.memory_usage()
+    rss_before = rss_bytes() - rss_empty
+
+    solver.finalize()
+    release_free_heap()
+    after = solver.memory_usage()
+    rss_after = rss_bytes() - rss_empty
+
+    print(f"Map: {SIZE}x{SIZE}, {after['num_edges']} edges")
+    print(f"{'STORAGE':<24} | {'NATIVE B/NODE':<14} | {'RSS B/NODE'}")
+    print("-" * 56)
+    print(f"{'Adjacency lists':<24} | {before['bytes_per_node']:<14.1f} | {rss_before / num_nodes:.1f}")
+    print(f"{'CSR (finalized)':<24} | {after['bytes_per_node']:<14.1f} | {rss_after / num_nodes:.1f}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,64 @@
+import glob
+import os
+import random
+import time
+
+from astart import AStart
+from astart.movingai import read_map, read_scenarios
+from bench_build import make_grid
+from run_all_movingai import BENCH_DIR, SYNTHETIC_DIR
+
+# Configuration
+K_VALUES = (1, 5, 20, 50, 100)
+OPEN_LISTS = ('binary', 'quaternary', 'radix')
+MAX_SCENARIOS = 200   # per map, evenly spread over the difficulty buckets
+MAX_MAPS = 10
+# Used when no MovingAI maps were downloaded (see download_maps.sh)
+SYNTHETIC_SIZE = 512
+SEED = 7
+
+def movingai_maps():
+    map_files = sorted(glob.glob(os.path.join(BENCH_DIR, "**", "*.map"), recursive=True))
+    map_files = [f for f in map_files if not os.path.abspath(f).startswith(os.path.abspath(SYNTHETIC_DIR))]
+    for map_file in map_files[:MAX_MAPS]:
+        walkable = read_map(map_file)
+        if walkable.shape[0] * walkable.shape[1] < 64 * 64 or not os.path.exists(map_file + ".scen"): continue
+        scenarios = [(scen.start, scen.goal) for scen in read_scenarios(map_file + ".scen")]
+        if not scenarios: continue
+        step = max(1, len(scenarios) // MAX_SCENARIOS)
+        yield os.path.basename(map_file), walkable, scenarios[::step][:MAX_SCENARIOS]
+
+def synthetic_map():
+    grid = make_grid(SYNTHETIC_SIZE, 0.2, SEED)
+    rng = random.Random(SEED)
+    cells = [(x, y) for y in range(SYNTHETIC_SIZE) for x in range(SYNTHETIC_SIZE) if grid[y][x]]
+    return f"random {SYNTHETIC_SIZE}x{SYNTHETIC_SIZE}", grid, [(rng.choice(cells), rng.choice(cells)) for _ in range(MAX_SCENARIOS)]
+
+def time_queries(solver, scenarios, k):
+    t0 = time.perf_counter()
+    for start, goal in scenarios:
+        if k == 1: solver.solve_classic(start, goal, output='ids')
+        else: solver.solve(start, goal, k=k, output='ids')
+    return (time.perf_counter() - t0) / len(scenarios) * 1000
+
+def run():
+    maps = list(movingai_maps()) or [synthetic_map()]
+    wins = {kind: 0 for kind in OPEN_LISTS}
+    for name, walkable, scenarios in maps:
+        solver = AStart.from_grid(walkable)
+        print(f"\nMap: {name}, {len(scenarios)} scenarios (ms/query; k=1 is classic A*)")
+        print(f"{'K':<5} | " + " | ".join(f"{kind:<10}" for kind in OPEN_LISTS) + " | WINNER")
+        print("-" * (8 + 13 * len(OPEN_LISTS) + 10))
+        for k in K_VALUES:
+            times = {}
+            for kind in OPEN_LISTS:
+                solver.open_list = kind
+                time_queries(solver, scenarios[:10], k)  # warm the workspace
+                times[kind] = time_queries(solver, scenarios, k)
+            winner = min(times, key=times.get)
+            wins[winner] += 1
+            print(f"{k:<5} | " + " | ".join(f"{times[kind]:<10.3f}" for kind in OPEN_LISTS) + f" | {winner}")
+    print("\nWins: " + ", ".join(f"{kind} {count}" for kind, count in wins.items()))
+
+if __name__ == "__main__":
+    run()
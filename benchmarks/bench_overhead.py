@@ -0,0 +1,55 @@
+import subprocess
+import sys
+import timeit
+from array import array
+
+import astart.solver as astart_solver
+from astart import AStart
+
+# Configuration
+GRID_SIZE = 8
+CALLS = 100000
+REPEATS = 5
+IMPORT_RUNS = 5
+
+def best_us(fn, calls=CALLS):
+    return min(timeit.repeat(fn, number=calls, repeat=REPEATS)) / calls * 1e6
+
+def import_ms():
+    code = "import time; t = time.perf_counter(); import astart; t1 = time.perf_counter(); " \
+           "astart.AStart.from_edges([0], [1]); print(t1 - t, time.perf_counter() - t1)"
+    runs = [subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+            for _ in range(IMPORT_RUNS)]
+    return min(float(r[0]) for r in runs) * 1000, min(float(r[1]) for r in runs) * 1000
+
+def run():
+    Graph = astart_solver._cpp_lib.Graph
+    tiny = AStart.from_edges([0], [1])
+    grid = AStart.from_grid([[1] * GRID_SIZE for _ in range(GRID_SIZE)])
+    tiny_mode, grid_mode = tiny._native_h_mode(), grid._native_h_mode()
+    far = (GRID_SIZE - 1, GRID_SIZE - 1)
+    src, dst = array('i', [0]), array('i', [1])
+    # (name, the extension type method alone, the same call through AStart)
+    cases = (
+        ("build, 2 nodes", lambda: Graph(2).add_edges(src, dst, None), lambda: AStart.from_edges([0], [1])),
+        ("solve_classic, 2 nodes", lambda: tiny._native.solve_classic(0, 1, tiny_mode, None, None),
+         lambda: tiny.solve_classic(0, 1)),
+        ("solve k=20, 2 nodes", lambda: tiny._native.solve(0, 1, 20, 0, tiny_mode, None, None),
+         lambda: tiny.solve(0, 1, k=20)),
+        ("solve_classic, grid step", lambda: grid._native.solve_classic(0, 1, grid_mode, None, None),
+         lambda: grid.solve_classic((0, 0), (1, 0))),
+        (f"solve, {GRID_SIZE}x{GRID_SIZE} ids",
+         lambda: grid._native.solve(0, GRID_SIZE * GRID_SIZE - 1, 1000, 0, grid_mode, None, None),
+         lambda: grid.solve((0, 0), far, output='ids')),
+    )
+    print(f"{'QUERY':<26} | {'EXTENSION (us)':<14} | {'ASTART (us)':<11} | {'PYTHON SHARE'}")
+    print("-" * 70)
+    for name, native, api in cases:
+        native_us, api_us = best_us(native), best_us(api)
+        print(f"{name:<26} | {native_us:<14.2f} | {api_us:<11.2f} | {1 - native_us / api_us:.0%}")
+
+    imported, first_solver = import_ms()
+    print(f"\nimport astart: {imported:.1f} ms, first solver (loads the backend): {first_solver:.1f} ms")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import time
+
+from astart import AStart
+from bench_build import build_dict_graph, make_grid
+from bench_memory import rss_bytes
+
+# Configuration
+SIZE = 512
+OBSTACLE_RATIO = 0.2
+SEED = 7
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+def cold_start(name, build, tmp):
+    solver, t_build = timed(build)
+    path = os.path.join(tmp, 'map.astart')
+    solver.save(path)
+    del solver
+    print(f"{name} (file {os.path.getsize(path) / 1e6:.1f} MB)")
+    print(f"  {'Build from scratch':<24} | {t_build:<10.4f} |")
+    for label, mmap in (("load(mmap=False)", False), ("load(mmap=True)", True)):
+        rss = rss_bytes()
+        loaded, t_load = timed(AStart.load, path, mmap=mmap)
+        loaded.solve(loaded._node(0), loaded._node(loaded._num_nodes - 1))  # touch the pages a query needs
+        print(f"  {label:<24} | {t_load:<10.4f} | {(rss_bytes() - rss) / 1e6:.1f}")
+        del loaded
+
+def alt_grid(grid):
+    solver = AStart.from_grid(grid, heuristic_func='alt')
+    solver.build_landmarks(16)
+    return solver
+
+def run():
+    grid = make_grid(SIZE, OBSTACLE_RATIO, SEED)
+    grid[0][0] = grid[SIZE - 1][SIZE - 1] = True
+    print(f"Map: {SIZE}x{SIZE}")
+    print(f"  {'COLD START':<24} | {'TIME (s)':<10} | {'RSS DELTA (MB)'}")
+    print("-" * 58)
+    with tempfile.TemporaryDirectory() as tmp:
+        cold_start("Dict-of-dicts graph", lambda: AStart(build_dict_graph(grid), 'octile'), tmp)
+        cold_start("Implicit grid + 16 landmarks", lambda: alt_grid(grid), tmp)
+
+if __name__ == "__main__":
+    run()
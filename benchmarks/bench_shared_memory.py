@@ -0,0 +1,77 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from array import array
+
+from astart import AStart, SolverPool
+from astart import pool as astart_pool
+
+# Configuration
+SIZE = 1000          # SIZE x SIZE weighted lattice (CSR storage)
+SEED = 7
+WORKERS = (1, 2, 4)
+CONTEXT = 'spawn'
+
+def lattice(size, seed):
+    rng = random.Random(seed)
+    src, dst, wts = array('i'), array('i'), array('f')
+    for y in range(size):
+        for x in range(size):
+            u = y * size + x
+            for v in ((u + 1) if x + 1 < size else -1, (u + size) if y + 1 < size else -1):
+                if v < 0: continue
+                w = rng.uniform(1.0, 3.0)
+                src.extend((u, v)); dst.extend((v, u)); wts.extend((w, w))
+    return src, dst, wts
+
+def pss_kib(pid):
+    """Proportional set size of a process: shared pages are split between the processes mapping them."""
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'): return int(line.split()[1])
+    return 0
+
+_private = None
+
+def _load_private(path):
+    global _private
+    _private = AStart.load(path, mmap=False)
+
+def _search(_):
+    # A corner-to-corner Dijkstra search touches the whole graph, so it is all resident
+    solver = _private or astart_pool._worker_solver
+    solver.solve_classic(0, SIZE * SIZE - 1)
+    time.sleep(0.05)
+    return os.getpid()
+
+def private_pool(path, workers):
+    return multiprocessing.get_context(CONTEXT).Pool(workers, initializer=_load_private, initargs=(path,))
+
+def measure(pool, workers):
+    pids = set()
+    while len(pids) < workers:
+        pids.update(pool.map(_search, range(workers * 2), chunksize=1))
+    return sum(pss_kib(pid) for pid in pids) / 1024
+
+def run():
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("This benchmark reads /proc/<pid>/smaps_rollup (Linux only)")
+        return
+    solver = AStart.from_edges(*lattice(SIZE, SEED), num_nodes=SIZE * SIZE)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'grid.bin')
+        solver.save(path)
+        print(f"Lattice: {SIZE}x{SIZE}, graph {os.path.getsize(path) / 2**20:.1f} MiB on disk, '{CONTEXT}' workers")
+        print(f"{'WORKERS':<8} | {'PRIVATE COPIES (MiB)':<21} | {'SOLVERPOOL (MiB)'}")
+        print("-" * 50)
+        for workers in WORKERS:
+            with private_pool(path, workers) as pool:
+                private = measure(pool, workers)
+            with SolverPool(solver, processes=workers, context=CONTEXT) as shared:
+                mib = measure(shared._pool, workers)
+            print(f"{workers:<8} | {private:<21.1f} | {mib:.1f}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,49 @@
+import os
+import random
+import time
+
+from astart import AStart
+from bench_build import make_grid
+
+# Configuration
+SIZE = 512
+OBSTACLE_RATIO = 0.2
+SEED = 7
+NUM_QUERIES = 2000
+K = 20
+MAX_THREADS = os.cpu_count() or 1
+
+def run():
+    grid = make_grid(SIZE, OBSTACLE_RATIO, SEED)
+    solver = AStart.from_grid(grid)
+    rng = random.Random(SEED)
+    cells = [(x, y) for y in range(SIZE) for x in range(SIZE) if grid[y][x]]
+    # Local queries (as in a game tick): goals within 64 cells of the start
+    starts, goals = [], []
+    while len(starts) < NUM_QUERIES:
+        sx, sy = rng.choice(cells)
+        gx, gy = sx + rng.randint(-64, 64), sy + rng.randint(-64, 64)
+        if 0 <= gx < SIZE and 0 <= gy < SIZE and grid[gy][gx]:
+            starts.append((sx, sy))
+            goals.append((gx, gy))
+
+    t0 = time.perf_counter()
+    for s, g in zip(starts, goals):
+        solver.solve(s, g, k=K)
+    t_loop = time.perf_counter() - t0
+    print(f"Map: {SIZE}x{SIZE}, {NUM_QUERIES} queries, k={K}, {MAX_THREADS} cores")
+    print(f"{'MODE':<22} | {'TIME (s)':<10} | {'QUERIES/S':<10} | {'SPEEDUP'}")
+    print("-" * 60)
+    print(f"{'Python loop':<22} | {t_loop:<10.4f} | {NUM_QUERIES / t_loop:<10.0f} | 1.0x")
+
+    threads = 1
+    while True:
+        t0 = time.perf_counter()
+        solver.solve_many(starts, goals, k=K, threads=threads, output='ids')
+        t = time.perf_counter() - t0
+        print(f"{f'solve_many ({threads} thr)':<22} | {t:<10.4f} | {NUM_QUERIES / t:<10.0f} | {t_loop / t:.1f}x")
+        if threads >= MAX_THREADS: break
+        threads = min(threads * 2, MAX_THREADS)
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,70 @@
+import time
+
+from astart import AStart
+from astart.movingai import read_map, read_scenarios
+from run_all_movingai import find_maps, path_cost
+
+# Configuration
+EPSILONS = (0.0, 0.05, 0.1, 0.2, 0.5, 1.0)
+# (name, k, focal); epsilon 0 is the optimal search of each mode
+MODES = (
+    ("weighted k=1", 1, False),
+    ("weighted k=20", 20, False),
+    ("focal k=1", 1, True),
+    ("focal k=20", 20, True),
+)
+SCENARIOS_PER_MAP = 100  # evenly spread over the difficulty buckets
+
+def run_mode(solver, scenarios, width, k, epsilon, focal):
+    """Mean latency (ms), mean expansions and mean / max path overhead over the optimal lengths."""
+    def solve(scen):
+        if epsilon == 0 and not focal and k == 1: return solver.solve_classic(scen.start, scen.goal, output='ids')
+        return solver.solve(scen.start, scen.goal, k=k, epsilon=epsilon, focal=focal, output='ids')
+    solver.collect_stats = False
+    t0 = time.perf_counter()
+    paths = [solve(scen) for scen in scenarios]
+    elapsed = time.perf_counter() - t0
+    solver.collect_stats = True
+    expanded = 0
+    for scen in scenarios:
+        solve(scen)
+        expanded += solver.stats['nodes_expanded']
+    overheads = [path_cost(path, width) / scen.optimal - 1 for path, scen in zip(paths, scenarios) if scen.optimal]
+    return {
+        'query_ms': elapsed / len(scenarios) * 1000,
+        'expanded': expanded / len(scenarios),
+        'overhead_mean': sum(overheads) / len(overheads),
+        'overhead_max': max(overheads),
+    }
+
+def run():
+    maps = find_maps()
+    curves = {(name, eps): [] for name, _, _ in MODES for eps in EPSILONS}
+    for source, path in maps:
+        grid = read_map(path)
+        solver = AStart.from_grid(grid)
+        scenarios = read_scenarios(path + ".scen")
+        step = max(1, len(scenarios) // SCENARIOS_PER_MAP)
+        scenarios = scenarios[::step][:SCENARIOS_PER_MAP]
+        width = grid.shape[1]
+        print(f"\nMap: {path} ({source}), {len(scenarios)} scenarios")
+        print(f"    {'MODE':<14} | {'EPS':<5} | {'MEAN (ms)':<9} | {'EXPANDED':<9} | {'OVERHEAD':<8} | {'WORST':<7}")
+        for name, k, focal in MODES:
+            for eps in EPSILONS:
+                r = run_mode(solver, scenarios, width, k, eps, focal)
+                curves[(name, eps)].append(r)
+                print(f"    {name:<14} | {eps:<5} | {r['query_ms']:<9.3f} | {r['expanded']:<9.0f} | "
+                      f"{r['overhead_mean']:<8.2%} | {r['overhead_max']:<7.2%}")
+
+    # Curves over all maps: latency and expansions against path overhead, per mode
+    print(f"\nAll {len(maps)} maps (means of per-map means)")
+    print(f"    {'MODE':<14} | {'EPS':<5} | {'MEAN (ms)':<9} | {'EXPANDED':<9} | {'OVERHEAD':<8} | {'WORST':<7}")
+    for name, _, _ in MODES:
+        for eps in EPSILONS:
+            rows = curves[(name, eps)]
+            mean = lambda key: sum(r[key] for r in rows) / len(rows)
+            print(f"    {name:<14} | {eps:<5} | {mean('query_ms'):<9.3f} | {mean('expanded'):<9.0f} | "
+                  f"{mean('overhead_mean'):<8.2%} | {max(r['overhead_max'] for r in rows):<7.2%}")
+
+if __name__ == "__main__":
+    run()
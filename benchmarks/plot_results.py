@@ -1,20 +1,74 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import argparse
+import json
 import os
+import sys
 
 # Configuration
-RESULTS_FILE = "benchmarks/movingai_results.csv"
+RESULTS_FILE = "benchmarks/movingai_results.json"
 OUTPUT_DIR = "benchmarks/plots"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+THRESHOLD = 0.10          # relative slowdown flagged as a regression
+MIN_DELTA_MS = 0.05       # ignore slowdowns smaller than this (timer noise on tiny maps)
+# (record key, label) of the timings compared per map and per mode
+MAP_TIMINGS = (('parse_ms', 'parse'), ('build_ms', 'build'))
+MODE_TIMINGS = (('query_ms_mean', 'query mean'), ('query_ms_p95', 'query p95'))
 
-def plot_results():
-    if not os.path.exists(RESULTS_FILE):
-        print(f"Results file {RESULTS_FILE} not found.")
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+def rows(results):
+    """One flat row per (map, mode) of a run_all_movingai.py results file."""
+    for record in results['maps']:
+        for name, mode in record['modes'].items():
+            yield {'Map': record['map'], 'Algorithm': name, 'AvgTime(ms)': mode['query_ms_mean'],
+                   'Optimality(%)': mode['optimal_pct'], **{key: record[key] for key, _ in MAP_TIMINGS}, **mode}
+
+def compare(old, new, threshold=THRESHOLD):
+    """Print timing and optimality changes from `old` to `new`; returns the regressions found."""
+    print(f"Comparing {old.get('commit')} ({old.get('date')}) -> {new.get('commit')} ({new.get('date')})")
+    old_maps = {record['map']: record for record in old['maps']}
+    regressions = []
+
+    def check(label, before, after):
+        change = after / before - 1 if before else 0.0
+        flag = change > threshold and after - before > MIN_DELTA_MS
+        print(f"    {label:<32} | {before:<10.3f} | {after:<10.3f} | {change:+7.1%}{'  REGRESSION' if flag else ''}")
+        if flag: regressions.append((map_name, label, change))
+
+    for record in new['maps']:
+        map_name = record['map']
+        before = old_maps.get(map_name)
+        if before is None:
+            print(f"\nMap: {map_name} (not in the baseline)")
+            continue
+        print(f"\nMap: {map_name}")
+        print(f"    {'TIMING (ms)':<32} | {'BEFORE':<10} | {'AFTER':<10} | CHANGE")
+        for key, label in MAP_TIMINGS:
+            check(label, before[key], record[key])
+        for name, mode in record['modes'].items():
+            base = before['modes'].get(name)
+            if base is None: continue
+            for key, label in MODE_TIMINGS:
+                check(f"{name} {label}", base[key], mode[key])
+            if mode['optimal_pct'] < base['optimal_pct'] or mode['failures'] > base['failures']:
+                print(f"    {name} optimality {base['optimal_pct']:.1f}% -> {mode['optimal_pct']:.1f}%, "
+                      f"failures {base['failures']} -> {mode['failures']}  REGRESSION")
+                regressions.append((map_name, f"{name} optimality", mode['optimal_pct'] - base['optimal_pct']))
+    print(f"\n{len(regressions)} regression(s) above {threshold:.0%}")
+    return regressions
+
+def plot_results(results_file=RESULTS_FILE):
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    if not os.path.exists(results_file):
+        print(f"Results file {results_file} not found.")
         return
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
 
     # Load Data
-    df = pd.read_csv(RESULTS_FILE)
+    df = pd.DataFrame(rows(load_results(results_file)))
     
     # 1. Pivot to get Algorithms as columns
     # We keep full names like "Batch A* (k=20)"
@@ -108,4 +162,11 @@ def plot_results():
         plt.close()
 
 if __name__ == "__main__":
-    plot_results()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Plot run_all_movingai.py results, or compare two runs.")
+    parser.add_argument("results", nargs="?", default=RESULTS_FILE)
+    parser.add_argument("--compare", metavar="BASELINE", help="results file of an earlier commit")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+    if args.compare:
+        sys.exit(1 if compare(load_results(args.compare), load_results(args.results), args.threshold) else 0)
+    plot_results(args.results)
@@ -1,177 +1,143 @@
-import os
+import argparse
 import glob
+import json
+import os
+import platform
+import subprocess
+import sys
 import time
-import csv
+
 from astart import AStart
+from astart.movingai import read_map, read_scenarios
+from synthetic_maps import OUTPUT_DIR as SYNTHETIC_DIR, generate_suite
 
 # Configuration
 BENCH_DIR = "benchmarks/movingai"
-RESULTS_FILE = "benchmarks/movingai_results.csv"
-TIMEOUT_SEC = 60  # Skip map if building graph takes too long
-
-def parse_map(filename):
-    grid = []
-    width = 0
-    height = 0
-    try:
-        with open(filename, 'r') as f:
-            lines = f.readlines()
-            header_done = False
-            for line in lines:
-                line = line.strip()
-                if not header_done:
-                    if line.startswith("height"):
-                        height = int(line.split()[1])
-                    elif line.startswith("width"):
-                        width = int(line.split()[1])
-                    elif line.startswith("map"):
-                        header_done = True
-                    continue
-                if len(line) > 0:
-                    grid.append(list(line))
-    except Exception as e:
-        print(f"Error parsing map {filename}: {e}")
-        return None, 0, 0
-    return grid, width, height
-
-def build_graph(grid, width, height):
-    adj = {}
-    passable_chars = {'.', 'G', 'S', 'T'} # T = Trees, etc.
-    SQRT2 = 1.41421356
-    
-    # Pre-allocate
-    for y in range(height):
-        for x in range(width):
-            adj[(x, y)] = {}
-            
-    for y in range(height):
-        for x in range(width):
-            if y < len(grid) and x < len(grid[y]):
-                if grid[y][x] not in passable_chars: continue
-            else: continue
-            
-            u = (x, y)
-            
-            # 8-Connected Neighbors (Octile)
-            # Order: Cardinals then Diagonals
-            moves = [
-                (-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
-                (-1, -1, SQRT2), (-1, 1, SQRT2), (1, -1, SQRT2), (1, 1, SQRT2)
-            ]
-            
-            for dx, dy, cost in moves:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < width and 0 <= ny < height:
-                    if ny < len(grid) and nx < len(grid[ny]):
-                        if grid[ny][nx] in passable_chars:
-                            # Strict Diagonal Check (No Corner Cutting)
-                            if dx != 0 and dy != 0:
-                                # Check cardinals
-                                # (x+dx, y) and (x, y+dy) must be passable
-                                if grid[y][nx] not in passable_chars or grid[ny][x] not in passable_chars:
-                                    continue
-                            
-                            adj[u][(nx, ny)] = cost
-    return adj
-
-def parse_scenarios(filename):
-    scenarios = []
-    try:
-        with open(filename, 'r') as f:
-            for line in f:
-                if line.startswith("version"): continue
-                parts = line.split()
-                if len(parts) < 9: continue
-                sx, sy = int(parts[4]), int(parts[5])
-                gx, gy = int(parts[6]), int(parts[7])
-                opt = float(parts[8])
-                scenarios.append(((sx, sy), (gx, gy), opt))
-    except:
-        pass
-    return scenarios
-
-def calculate_path_cost(path):
+RESULTS_FILE = "benchmarks/movingai_results.json"
+RESULTS_FORMAT = 1
+MAX_MAPS = 20
+MIN_CELLS = 64 * 64       # smaller maps (e.g. the local_test.map fixture) are skipped
+MAX_SCENARIOS = 500       # per map, evenly spread over the difficulty buckets
+WARMUP = 10               # untimed queries per mode
+OPTIMAL_TOLERANCE = 1e-4  # relative; native weights are float32, .scen lengths have 8 decimals
+SQRT2 = 2 ** 0.5
+
+MODES = (
+    ("Standard A* (k=1)", None, False),
+    ("Batch A* (k=20)", 20, False),
+    ("Batch A* (k=50)", 50, False),
+    ("Batch A* (k=100)", 100, False),
+    ("Adaptive A* (k=50)", 50, True),
+)
+
+def find_maps(synthetic=False):
+    """(source, .map path) pairs: downloaded MovingAI maps, or the synthetic suite when there are none."""
+    if not synthetic:
+        found = []
+        for path in sorted(glob.glob(os.path.join(BENCH_DIR, "**", "*.map"), recursive=True)):
+            if os.path.abspath(path).startswith(os.path.abspath(SYNTHETIC_DIR)): continue
+            if not os.path.exists(path + ".scen"): continue
+            found.append(path)
+        maps = []
+        for path in found:
+            grid = read_map(path)
+            if grid.shape[0] * grid.shape[1] >= MIN_CELLS: maps.append(("movingai", path))
+            if len(maps) == MAX_MAPS: break
+        if maps: return maps
+    return [("synthetic", path) for path in generate_suite()]
+
+def path_cost(ids, width):
     cost = 0.0
-    for i in range(len(path) - 1):
-        u = path[i]
-        v = path[i+1]
-        dx = abs(u[0] - v[0])
-        dy = abs(u[1] - v[1])
-        if dx + dy == 2: # Diagonal
-            cost += 1.41421356
-        else:
-            cost += 1.0
+    for a, b in zip(ids, ids[1:]):
+        cost += SQRT2 if a % width != b % width and a // width != b // width else 1.0
     return cost
 
-def run_suite():
-
-    map_files = glob.glob(os.path.join(BENCH_DIR, "**", "*.map"), recursive=True)
-
-    # Sort to be deterministic
-
-    map_files.sort()
-
-    # Take a subset for a quick stress test of high K
-
-    map_files = map_files[:20]
-
-    print(f"Found {len(map_files)} maps for High-K test.")
-
-    
-
-    with open(RESULTS_FILE, 'w', newline='') as csvfile:
-
-        writer = csv.writer(csvfile)
-
-        writer.writerow(["Map", "Scenarios", "Algorithm", "TotalTime(s)", "AvgTime(ms)", "Optimality(%)"])
-
-        
-
-        for map_file in map_files:
-
-            # ... (loading logic)
-
-            # (I'll skip the repetition and just update the modes)
-
-            
-
-            modes = [
-
-                ("Standard A* (k=1)", 1, False),
-
-                ("Batch A* (k=20)", 20, False),
-
-                ("Batch A* (k=50)", 50, False),
-
-                ("Batch A* (k=100)", 100, False),
-
-                ("Adaptive A* (k=50)", 50, True)
-
-            ]
-            
-            for algo_name, k, adapt in modes:
-                total_time = 0
-                optimal_cnt = 0
-                
-                for start, goal, opt_len in scenarios:
-                    t_start = time.time()
-                    path = solver.solve(start, goal, k=k, adaptive=adapt)
-                    total_time += (time.time() - t_start)
-                    
-                    if path:
-                        cost = calculate_path_cost(path)
-                        # Check optimality with epsilon
-                        if abs(cost - opt_len) < 0.001 * opt_len: # 0.1% tolerance
-                            optimal_cnt += 1
-                        elif abs(cost - opt_len) < 0.5: # Absolute tolerance
-                             optimal_cnt += 1
-                
-                avg_time = (total_time / len(scenarios)) * 1000
-                optimality = (optimal_cnt / len(scenarios)) * 100
-                
-                print(f"    {algo_name:<20}: {avg_time:.3f} ms/path | Opt: {optimality:.1f}%")
-                writer.writerow([map_name, len(scenarios), algo_name, f"{total_time:.4f}", f"{avg_time:.4f}", f"{optimality:.1f}"])
-                csvfile.flush()
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+def run_mode(solver, scenarios, width, k, adaptive):
+    solve = (lambda s, g: solver.solve_classic(s, g, output='ids')) if k is None else \
+        (lambda s, g: solver.solve(s, g, k=k, adaptive=adaptive, output='ids'))
+    for scen in scenarios[:WARMUP]: solve(scen.start, scen.goal)
+    times, optimal, failures, worst = [], 0, 0, 1.0
+    for scen in scenarios:
+        t0 = time.perf_counter()
+        path = solve(scen.start, scen.goal)
+        times.append(time.perf_counter() - t0)
+        if path is None:
+            failures += 1
+            continue
+        cost = path_cost(path, width)
+        if abs(cost - scen.optimal) <= OPTIMAL_TOLERANCE * max(1.0, scen.optimal): optimal += 1
+        elif scen.optimal: worst = max(worst, cost / scen.optimal)
+    times.sort()
+    return {
+        'query_ms_mean': sum(times) / len(times) * 1000,
+        'query_ms_p50': percentile(times, 0.5) * 1000,
+        'query_ms_p95': percentile(times, 0.95) * 1000,
+        'total_s': sum(times),
+        'optimal_pct': optimal / len(scenarios) * 100,
+        'suboptimality_max': worst,
+        'failures': failures,
+    }
+
+def run_map(source, path):
+    t0 = time.perf_counter()
+    grid = read_map(path)
+    scenarios = read_scenarios(path + ".scen")
+    t1 = time.perf_counter()
+    solver = AStart.from_grid(grid)
+    t2 = time.perf_counter()
+    step = max(1, len(scenarios) // MAX_SCENARIOS)
+    scenarios = scenarios[::step][:MAX_SCENARIOS]
+    height, width = grid.shape
+    record = {
+        'map': os.path.basename(path), 'source': source, 'width': width, 'height': height,
+        'scenarios': len(scenarios), 'parse_ms': (t1 - t0) * 1000, 'build_ms': (t2 - t1) * 1000, 'modes': {},
+    }
+    for name, k, adaptive in MODES:
+        record['modes'][name] = run_mode(solver, scenarios, width, k, adaptive)
+    return record
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(output=RESULTS_FILE, synthetic=False):
+    maps = find_maps(synthetic)
+    print(f"Running {len(MODES)} modes on {len(maps)} {maps[0][0] if maps else ''} maps.")
+    results = {
+        'format': RESULTS_FORMAT,
+        'commit': git_commit(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'config': {'max_scenarios': MAX_SCENARIOS, 'warmup': WARMUP, 'modes': [m[0] for m in MODES]},
+        'maps': [],
+    }
+    for source, path in maps:
+        record = run_map(source, path)
+        results['maps'].append(record)
+        print(f"\nMap: {record['map']} ({record['width']}x{record['height']}), {record['scenarios']} scenarios, "
+              f"parse {record['parse_ms']:.2f} ms, build {record['build_ms']:.2f} ms")
+        print(f"    {'MODE':<20} | {'MEAN (ms)':<9} | {'P95 (ms)':<9} | {'OPTIMAL':<8} | {'WORST':<7} | FAILED")
+        for name, mode in record['modes'].items():
+            print(f"    {name:<20} | {mode['query_ms_mean']:<9.3f} | {mode['query_ms_p95']:<9.3f} | "
+                  f"{mode['optimal_pct']:<7.1f}% | {mode['suboptimality_max']:<7.4f} | {mode['failures']}")
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=1)
+    print(f"\nResults written to {output}")
+    return results
 
 if __name__ == "__main__":
-    run_suite()
+    parser = argparse.ArgumentParser(description="Time parse, build and queries on MovingAI maps.")
+    parser.add_argument("--output", default=RESULTS_FILE, help="JSON results file")
+    parser.add_argument("--synthetic", action="store_true", help="use the generated maps even if MovingAI maps exist")
+    args = parser.parse_args()
+    run_suite(args.output, args.synthetic)
@@ -0,0 +1,115 @@
+import os
+import random
+
+from astart import AStart
+
+# Configuration
+KINDS = ('open', 'maze', 'rooms', 'trap')
+SIZE = 512
+NUM_SCENARIOS = 400
+SEED = 7
+OUTPUT_DIR = "benchmarks/movingai/synthetic"
+OBSTACLE_RATIO = 0.1   # open: scattered single-cell obstacles
+CORRIDOR = 3           # maze: corridor width in cells
+ROOM = 32              # rooms: room pitch, one door per wall
+NUM_TRAPS = 120        # trap: U-shaped obstacles that catch greedy expansion
+SQRT2 = 2 ** 0.5
+
+def open_map(size, rng):
+    return [[rng.random() >= OBSTACLE_RATIO for _ in range(size)] for _ in range(size)]
+
+def maze_map(size, rng):
+    """Perfect maze (iterative depth-first carving) of CORRIDOR-wide passages and 1-cell walls."""
+    pitch = CORRIDOR + 1
+    cells = size // pitch
+    walkable = [[False] * size for _ in range(size)]
+    def carve(x0, y0, w, h):
+        for y in range(y0, y0 + h):
+            for x in range(x0, x0 + w): walkable[y][x] = True
+    seen = {(0, 0)}
+    stack = [(0, 0)]
+    carve(0, 0, CORRIDOR, CORRIDOR)
+    while stack:
+        cx, cy = stack[-1]
+        options = [(cx + dx, cy + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                   if 0 <= cx + dx < cells and 0 <= cy + dy < cells and (cx + dx, cy + dy) not in seen]
+        if not options:
+            stack.pop()
+            continue
+        nx, ny = rng.choice(options)
+        seen.add((nx, ny))
+        stack.append((nx, ny))
+        carve(nx * pitch, ny * pitch, CORRIDOR, CORRIDOR)
+        # Open the wall between the two cells
+        carve(min(cx, nx) * pitch, min(cy, ny) * pitch, pitch + CORRIDOR if nx != cx else CORRIDOR,
+              pitch + CORRIDOR if ny != cy else CORRIDOR)
+    return walkable
+
+def rooms_map(size, rng):
+    walkable = [[bool(x % ROOM and y % ROOM) for x in range(size)] for y in range(size)]
+    for ry in range(0, size, ROOM):
+        for rx in range(0, size, ROOM):
+            if rx: walkable[min(size - 1, ry + rng.randrange(1, ROOM))][rx] = True
+            if ry: walkable[ry][min(size - 1, rx + rng.randrange(1, ROOM))] = True
+    return walkable
+
+def trap_map(size, rng):
+    """Open map scattered with U-shaped walls, each opening in a random direction."""
+    walkable = [[True] * size for _ in range(size)]
+    for _ in range(NUM_TRAPS):
+        span = rng.randrange(8, 48)
+        x0, y0 = rng.randrange(size - span), rng.randrange(size - span)
+        side = rng.randrange(4)
+        for i in range(span):
+            walls = [(x0, y0 + i), (x0 + span - 1, y0 + i), (x0 + i, y0), (x0 + i, y0 + span - 1)]
+            del walls[side]
+            for x, y in walls: walkable[y][x] = False
+    return walkable
+
+GENERATORS = {'open': open_map, 'maze': maze_map, 'rooms': rooms_map, 'trap': trap_map}
+
+def generate(kind, size=SIZE, seed=SEED):
+    """Walkability rows of a synthetic map; the same (kind, size, seed) always gives the same map."""
+    return GENERATORS[kind](size, random.Random(seed * len(KINDS) + KINDS.index(kind)))
+
+def path_cost(path):
+    return sum(SQRT2 if a[0] != b[0] and a[1] != b[1] else 1.0 for a, b in zip(path, path[1:]))
+
+def write_map(path, walkable):
+    with open(path, 'w') as f:
+        f.write(f"type octile\nheight {len(walkable)}\nwidth {len(walkable[0])}\nmap\n")
+        for row in walkable: f.write("".join('.' if c else '@' for c in row) + "\n")
+
+def write_scenarios(path, map_name, walkable, num, seed):
+    """Random connected queries with their optimal octile lengths, bucketed by length / 4 as MovingAI does."""
+    rng = random.Random(seed)
+    height, width = len(walkable), len(walkable[0])
+    solver = AStart.from_grid(walkable)
+    cells = [(x, y) for y in range(height) for x in range(width) if walkable[y][x]]
+    scenarios = []
+    while len(scenarios) < num:
+        start, goal = rng.choice(cells), rng.choice(cells)
+        cells_on_path = solver.solve_classic(start, goal)
+        if cells_on_path: scenarios.append((path_cost(cells_on_path), start, goal))
+    scenarios.sort()
+    with open(path, 'w') as f:
+        f.write("version 1\n")
+        for optimal, (sx, sy), (gx, gy) in scenarios:
+            f.write(f"{int(optimal // 4)}\t{map_name}\t{width}\t{height}\t{sx}\t{sy}\t{gx}\t{gy}\t{optimal:.8f}\n")
+
+def generate_suite(directory=OUTPUT_DIR, kinds=KINDS, size=SIZE, seed=SEED, num_scenarios=NUM_SCENARIOS):
+    """Write ``<kind>-<size>-<seed>.map`` and its ``.scen`` for every kind, reusing files already there."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for kind in kinds:
+        name = f"{kind}-{size}-{seed}.map"
+        path = os.path.join(directory, name)
+        if not (os.path.exists(path) and os.path.exists(path + ".scen")):
+            walkable = generate(kind, size, seed)
+            write_map(path, walkable)
+            write_scenarios(path + ".scen", name, walkable, num_scenarios, seed)
+        paths.append(path)
+    return paths
+
+if __name__ == "__main__":
+    for path in generate_suite(): print(path)
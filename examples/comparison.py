@@ -45,7 +45,7 @@ def run_comparison():
 
     # --- Run Standard A* (k=1) ---
     print(f"\nRunning Standard A* (Simulated by k=1)...")
-    solver_std = AStart(adj, h)
+    solver_std = AStart(adj, h, collect_stats=True)
     t0 = time.time()
     path_std = solver_std.solve(start, goal, k=1)
     t1 = time.time()
@@ -58,7 +58,7 @@ def run_comparison():
 
     # --- Run Batch A* (k=10) ---
     print(f"\nRunning Batch A* (Frontier Reduction k=10)...")
-    solver_batch = AStart(adj, h)
+    solver_batch = AStart(adj, h, collect_stats=True)
     t0 = time.time()
     path_batch = solver_batch.solve(start, goal, k=10)
     t1 = time.time()
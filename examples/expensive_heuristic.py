@@ -18,15 +18,15 @@ def expensive_h(u, goal):
     return 0
 
 print(f"Running Standard A* with expensive heuristic...")
-solver = AStart(graph, expensive_h)
+solver = AStart(graph, expensive_h, collect_stats=True)
 t0 = time.time()
 solver.solve(0, N-1, k=1)
 print(f"Standard Time: {time.time() - t0:.4f}s")
-print(f"Heuristic Calls (approx): {solver.stats['heap_pushes']}") 
+print(f"Heuristic Calls: {solver.stats['heuristic_evals']}")
 
 print(f"\nRunning Batch A* (k=10) with expensive heuristic...")
-solver = AStart(graph, expensive_h)
+solver = AStart(graph, expensive_h, collect_stats=True)
 t0 = time.time()
 solver.solve(0, N-1, k=10)
 print(f"Batch Time:    {time.time() - t0:.4f}s")
-print(f"Heuristic Calls (approx): {solver.stats['heap_pushes']}")
+print(f"Heuristic Calls: {solver.stats['heuristic_evals']}")
@@ -3,12 +3,13 @@ import sys
 import os
 
 # Define the C++ Extension
-# We use a standard Extension, but we won't import it as a module.
-# We will find the .so/.dll file and load it with ctypes.
+# The module defines the Graph / Path extension types (and the Search and Replanner
+# handles) that own the native solvers, plus the MovingAI parsers.
 module = Extension(
     'astart._cpp_backend',
     sources=['astart/cpp/solver.cpp'],
-    extra_compile_args=['-O3', '-std=c++17'],
+    extra_compile_args=['-O3', '-std=c++17', '-pthread'],
+    extra_link_args=['-pthread'],
     language='c++'
 )
 
@@ -1,5 +1,22 @@
+import asyncio
+import io
+import math
+import os
+import tempfile
+import random
+import subprocess
+import sys
+import time
 import unittest
-from astart import AStart
+import threading
+from array import array
+from astart import AStart, HierarchicalSolver, SolverPool, vectorized
+from astart import aio, movingai, solver as astart_solver
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class TestAStart(unittest.TestCase):
     def test_simple_path(self):
@@ -27,6 +44,17 @@ class TestAStart(unittest.TestCase):
         path = solver.solve('A', 'D', k=2)
         self.assertEqual(path, ['A', 'C', 'D'])
 
+    def test_goal_reached_in_a_batch_waits_for_its_pop(self):
+        # The first batch step reaches D over the 10 edge; the batch queues D as a pivot
+        # instead of returning it, so the cheaper A -> B -> C -> D found after it wins.
+        graph = {'A': {'D': 10, 'B': 1}, 'B': {'C': 1}, 'C': {'D': 1}, 'D': {}}
+        for use_cpp in (True, False):
+            solver = AStart(graph, use_cpp=use_cpp)
+            self.assertEqual(solver.solve('A', 'D', k=8), ['A', 'B', 'C', 'D'])
+            self.assertEqual(solver.solve('A', 'D', k=8, adaptive=True), ['A', 'B', 'C', 'D'])
+            self.assertEqual(solver.solve_many(['A'], ['D'], k=8), [['A', 'B', 'C', 'D']])
+        self.assertEqual(AStart.from_edges([0, 0, 1, 2], [3, 1, 2, 3], [10, 1, 1, 1]).solve(0, 3, k=8), [0, 1, 2, 3])
+
     def test_no_path(self):
         graph = {
             'A': {'B': 1},
@@ -48,5 +76,1301 @@ class TestAStart(unittest.TestCase):
         path = solver.solve('A', 'C', k=10)
         self.assertEqual(path, ['A', 'B', 'C'])
 
+class TestPythonEngine(unittest.TestCase):
+    def test_matches_cpp_backend(self):
+        walkable = random_walkable(30, 20, seed=8)
+        graph = octile_dict(walkable)
+        cells = [(x, y) for y in range(20) for x in range(30) if walkable[y][x]]
+        heuristics = ['octile', None, lambda a, b: max(abs(a[0] - b[0]), abs(a[1] - b[1]))]
+        if np is not None: heuristics.append(vectorized(lambda nodes, goal: np.abs(nodes - goal).max(axis=1)))
+        rng = random.Random(4)
+        for h in heuristics:
+            py_solver = AStart(graph, h, use_cpp=False)
+            cpp_solver = AStart(graph, h)
+            for _ in range(15):
+                start, goal = rng.choice(cells), rng.choice(cells)
+                for solve in (lambda s: s.solve_classic(start, goal), lambda s: s.solve(start, goal, k=6)):
+                    expected, path = solve(cpp_solver), solve(py_solver)
+                    if expected is None:
+                        self.assertIsNone(path)
+                    else:
+                        self.assertAlmostEqual(path_cost(path), path_cost(expected), places=4)
+                path = py_solver.solve(start, goal, k=6, adaptive=True)
+                self.assertEqual(path is None, expected is None)
+                if path: self.assertTrue(all(b in graph[a] for a, b in zip(path, path[1:])))
+
+    def test_outputs_stats_and_cache(self):
+        solver = AStart(grid_dict(8, 8, blocked=[(4, y) for y in range(7)]), 'manhattan', use_cpp=False,
+                        collect_stats=True)
+        path = solver.solve((0, 0), (7, 0), k=3)
+        self.assertEqual(len(path), 22)
+        self.assertGreater(solver.stats['nodes_expanded'], 0)
+        self.assertGreater(solver.stats['pivots_pushed'], 0)
+        self.assertEqual(list(solver.solve((0, 0), (7, 0), k=3, output='ids')), [solver._node_to_id[n] for n in path])
+        self.assertEqual(solver.solve_many([(0, 0), (0, 0)], [(7, 0), (9, 9)], k=3), [path, None])
+        solver.configure_cache(results=8)
+        self.assertEqual(solver.solve_classic((0, 0), (7, 0)), solver.solve_classic((0, 0), (7, 0)))
+        self.assertEqual(solver.open_list, 'binary')
+        with self.assertRaises(ValueError):
+            solver.open_list = 'radix'
+        with self.assertRaises(RuntimeError):
+            solver.solve((0, 0), (7, 0), bidirectional=True)
+        with self.assertRaises(ValueError):
+            AStart(grid_dict(3, 3), 'alt', use_cpp=False).solve((0, 0), (2, 2))
+
+    def test_native_only_features_raise(self):
+        solver = AStart(grid_dict(3, 3), 'manhattan', use_cpp=False)
+        calls = [
+            lambda: solver.add_edge((0, 0), (2, 2)), lambda: solver.set_edge((0, 0), (1, 0), 2.0),
+            lambda: solver.remove_edge((0, 0), (1, 0)), lambda: solver.set_walkable((1, 1), False),
+            lambda: solver.replanner((0, 0), (2, 2)), lambda: solver.num_components,
+            lambda: solver.component_labels(), lambda: solver.component_of((0, 0)),
+            lambda: solver.distance_field((2, 2)), lambda: solver.build_landmarks(2), lambda: solver.landmarks,
+            lambda: solver.save(os.devnull), lambda: solver.share(),
+        ]
+        for call in calls:
+            with self.assertRaisesRegex(RuntimeError, "needs the C\\+\\+ backend"):
+                call()
+        self.assertIsNone(solver.memory_usage())
+        self.assertEqual(solver.solve((0, 0), (2, 0)), [(0, 0), (1, 0), (2, 0)])
+
+    def test_used_when_backend_missing(self):
+        graph = {'A': {'B': 1, 'C': 2}, 'B': {'D': 5}, 'C': {'D': 1}, 'D': {}}
+        cpp_lib = astart_solver._cpp_lib
+        astart_solver._cpp_lib = None
+        try:
+            solver = AStart(graph)
+            self.assertFalse(solver.use_cpp)
+            self.assertEqual(solver.solve('A', 'D', k=2), ['A', 'C', 'D'])
+            self.assertEqual(solver.solve_classic('A', 'D'), ['A', 'C', 'D'])
+            with self.assertRaises(RuntimeError):
+                AStart(graph, use_cpp=True)
+        finally:
+            astart_solver._cpp_lib = cpp_lib
+
+class TestBulkIngestion(unittest.TestCase):
+    def test_from_edges_matches_dict_graph(self):
+        # Same branching graph as above with A=0, B=1, C=2, D=3
+        src = array('i', [0, 0, 1, 2])
+        dst = array('i', [1, 2, 3, 3])
+        weight = array('f', [1, 2, 5, 1])
+        solver = AStart.from_edges(src, dst, weight)
+        self.assertEqual(solver.solve_classic(0, 3), [0, 2, 3])
+        self.assertEqual(solver.solve(0, 3, k=1), [0, 2, 3])
+
+    def test_from_edges_accepts_sequences(self):
+        solver = AStart.from_edges([0, 1], [1, 2], num_nodes=4)
+        self.assertEqual(solver.solve(0, 2, k=10), [0, 1, 2])
+        self.assertIsNone(solver.solve(0, 3, k=10))
+        self.assertIsNone(solver.solve(0, 4, k=10))
+
+    def test_from_csr(self):
+        indptr = [0, 2, 3, 4, 4]
+        indices = [1, 2, 3, 3]
+        weights = [1.0, 2.0, 5.0, 1.0]
+        solver = AStart.from_csr(indptr, indices, weights)
+        self.assertEqual(solver.solve_classic(0, 3), [0, 2, 3])
+
+    def test_from_csr_rejects_malformed_arrays(self):
+        for indptr, indices in (
+            ([], []),                       # no indptr
+            ([50000000, 2, 2], [1, 0]),     # does not start at 0
+            ([0, -100000000, 2], [1, 0]),   # decreasing
+            ([0, 2, 1, 2], [1, 0]),         # decreasing
+            ([0, 1, 3], [1, 0]),            # past the end of indices
+            ([0, 1, 1], [1, 0]),            # short of the end of indices
+            ([0, 1, 2], [1, 2]),            # index past the last node
+            ([0, 1, 2], [-1, 0]),           # negative index
+        ):
+            with self.assertRaises(ValueError, msg=(indptr, indices)):
+                AStart.from_csr(indptr, indices)
+        with self.assertRaises(ValueError):
+            astart_solver._cpp_lib.Graph(2).set_csr(array('i', [0, -5, 2]), array('i', [1, 0]), None)
+
+    def test_finalize_packs_pending_edges(self):
+        solver = AStart({'A': {'B': 1}, 'B': {}})
+        usage = solver.memory_usage()
+        self.assertTrue(usage['finalized'])
+        self.assertEqual(usage['num_edges'], 1)
+        self.assertGreater(usage['bytes_per_node'], 0)
+
+    def test_mismatched_lengths(self):
+        with self.assertRaises(ValueError):
+            AStart.from_edges([0, 1], [1])
+
+def grid_dict(width, height, blocked=()):
+    blocked = set(blocked)
+    adj = {}
+    for y in range(height):
+        for x in range(width):
+            adj[(x, y)] = {}
+            if (x, y) in blocked: continue
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if 0 <= nx < width and 0 <= ny < height and (nx, ny) not in blocked:
+                    adj[(x, y)][(nx, ny)] = 1
+    return adj
+
+class TestWorkspaces(unittest.TestCase):
+    def test_workspace_reused_between_queries(self):
+        solver = AStart(grid_dict(6, 6, blocked=[(2, y) for y in range(5)]), 'manhattan')
+        first = solver.solve((0, 0), (5, 0), k=3)
+        self.assertEqual(len(first), 16)
+        self.assertEqual(solver.solve_classic((0, 0), (1, 0)), [(0, 0), (1, 0)])
+        self.assertEqual(solver.solve((0, 0), (5, 0), k=3), first)
+        self.assertEqual(solver.memory_usage()['workspaces'], 1)
+        solver.release_workspaces()
+        self.assertEqual(solver.memory_usage()['workspaces'], 0)
+        self.assertEqual(solver.solve((0, 0), (5, 0), k=3), first)
+
+    def test_concurrent_solves(self):
+        solver = AStart(grid_dict(30, 30, blocked=[(15, y) for y in range(28)]), 'manhattan')
+        queries = [((x, 0), (29 - x, 29)) for x in range(30) if x != 15]
+        expected = [len(solver.solve_classic(s, g)) for s, g in queries]
+        results = {}
+
+        def worker(idx):
+            for i in range(idx, len(queries), 4):
+                s, g = queries[i]
+                results[i] = len(solver.solve(s, g, k=5))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual([results[i] for i in range(len(queries))], expected)
+
+class TestPathOutput(unittest.TestCase):
+    def test_ids_output(self):
+        solver = AStart({'A': {'B': 1}, 'B': {'C': 2}, 'C': {}})
+        ids = solver.solve('A', 'C', k=2, output='ids')
+        self.assertEqual([solver._id_to_node[i] for i in ids], ['A', 'B', 'C'])
+        self.assertEqual(ids.typecode, 'i')
+
+    def test_long_path_grows_buffer(self):
+        n = 5000
+        solver = AStart.from_edges(range(n - 1), range(1, n))
+        self.assertEqual(solver.solve(0, n - 1, k=50), list(range(n)))
+        self.assertEqual(solver.solve_classic(0, n - 1, output='ids'), array('i', range(n)))
+
+    def test_invalid_output(self):
+        solver = AStart({'A': {'B': 1}, 'B': {}})
+        with self.assertRaises(ValueError):
+            solver.solve('A', 'B', output='tuples')
+
+    @unittest.skipIf(np is None, "NumPy not installed")
+    def test_numpy_and_coords_output(self):
+        solver = AStart(grid_dict(4, 4), 'manhattan')
+        path = solver.solve((0, 0), (3, 3), k=4)
+        coords = solver.solve((0, 0), (3, 3), k=4, output='coords')
+        self.assertEqual(coords.shape, (len(path), 2))
+        self.assertEqual([tuple(c) for c in coords.tolist()], path)
+        ids = solver.solve((0, 0), (3, 3), k=4, output='numpy')
+        self.assertEqual(ids.dtype, np.intc)
+
+def random_walkable(width, height, seed, ratio=0.25):
+    rng = random.Random(seed)
+    return [[rng.random() >= ratio for _ in range(width)] for _ in range(height)]
+
+def octile_dict(walkable):
+    # Same adjacency as build_graph in benchmarks/run_all_movingai.py
+    height, width = len(walkable), len(walkable[0])
+    adj = {}
+    for y in range(height):
+        for x in range(width):
+            adj[(x, y)] = {}
+            if not walkable[y][x]: continue
+            for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)):
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < width and 0 <= ny < height and walkable[ny][nx]): continue
+                if dx and dy and not (walkable[y][nx] and walkable[ny][x]): continue
+                adj[(x, y)][(nx, ny)] = math.sqrt(2) if dx and dy else 1.0
+    return adj
+
+def path_cost(path):
+    return sum(math.hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(path, path[1:]))
+
+class TestGridMode(unittest.TestCase):
+    def test_matches_dict_graph(self):
+        walkable = random_walkable(24, 18, seed=3)
+        grid_solver = AStart.from_grid(walkable)
+        dict_solver = AStart(octile_dict(walkable), 'octile')
+        rng = random.Random(5)
+        cells = [(x, y) for y in range(18) for x in range(24) if walkable[y][x]]
+        for _ in range(30):
+            start, goal = rng.choice(cells), rng.choice(cells)
+            expected = dict_solver.solve_classic(start, goal)
+            for path in (grid_solver.solve_classic(start, goal), grid_solver.solve(start, goal, k=8)):
+                if expected is None:
+                    self.assertIsNone(path)
+                else:
+                    self.assertEqual(path[0], start)
+                    self.assertEqual(path[-1], goal)
+                    self.assertAlmostEqual(path_cost(path), path_cost(expected), places=4)
+
+    def test_connectivity_and_corner_cutting(self):
+        walkable = [[1, 0],
+                    [1, 1]]
+        self.assertEqual(len(AStart.from_grid(walkable).solve((0, 0), (1, 1))), 3)
+        self.assertEqual(AStart.from_grid(walkable, corner_cutting=True).solve((0, 0), (1, 1)), [(0, 0), (1, 1)])
+        self.assertEqual(len(AStart.from_grid(walkable, connectivity=4).solve((0, 0), (1, 1))), 3)
+        diagonal_gap = [[1, 0],
+                        [0, 1]]
+        self.assertIsNone(AStart.from_grid(diagonal_gap, corner_cutting=True).solve((0, 0), (1, 1)))
+
+    def test_blocked_and_out_of_bounds_endpoints(self):
+        solver = AStart.from_grid([[1, 0, 1]])
+        self.assertIsNone(solver.solve((0, 0), (1, 0)))
+        self.assertIsNone(solver.solve((0, 0), (5, 0)))
+        self.assertIsNone(solver.solve((0, 0), (2, 0)))
+        self.assertEqual(solver.solve((0, 0), (0, 0)), [(0, 0)])
+
+    def test_memory_is_bitmap_sized(self):
+        walkable = random_walkable(64, 64, seed=1)
+        grid_usage = AStart.from_grid(walkable).memory_usage()
+        dict_usage = AStart(octile_dict(walkable), 'octile').memory_usage()
+        self.assertLess(grid_usage['bytes_per_node'] * 8, dict_usage['bytes_per_node'])
+        self.assertEqual(grid_usage['num_edges'], dict_usage['num_edges'])
+
+class TestSolveMany(unittest.TestCase):
+    def setUp(self):
+        self.walkable = random_walkable(32, 32, seed=11)
+        self.solver = AStart.from_grid(self.walkable)
+        rng = random.Random(2)
+        cells = [(x, y) for y in range(32) for x in range(32) if self.walkable[y][x]]
+        self.starts = [rng.choice(cells) for _ in range(40)] + [(0, 99)]
+        self.goals = [rng.choice(cells) for _ in range(40)] + [(0, 0)]
+
+    def test_matches_single_queries(self):
+        expected = [self.solver.solve(s, g, k=6) for s, g in zip(self.starts, self.goals)]
+        for threads in (1, 4):
+            self.assertEqual(self.solver.solve_many(self.starts, self.goals, k=6, threads=threads), expected)
+        classic = [self.solver.solve_classic(s, g) for s, g in zip(self.starts, self.goals)]
+        self.assertEqual(self.solver.solve_many(self.starts, self.goals, classic=True), classic)
+        self.assertIsNone(expected[-1])
+
+    def test_packed_output(self):
+        paths, offsets = self.solver.solve_many(self.starts, self.goals, k=6, output='ids')
+        self.assertEqual(len(offsets), len(self.starts) + 1)
+        self.assertEqual(offsets[-1], len(paths))
+        width = len(self.walkable[0])
+        first = self.solver.solve(self.starts[0], self.goals[0], k=6)
+        self.assertEqual([(i % width, i // width) for i in paths[offsets[0]:offsets[1]]], first)
+        self.assertEqual(offsets[-2], offsets[-1])
+
+    def test_callable_heuristic(self):
+        solver = AStart({'A': {'B': 1}, 'B': {}}, heuristic_func=lambda u, g: 0)
+        self.assertEqual(solver.solve_many(['A', 'B', 'X'], ['B', 'A', 'A']), [['A', 'B'], None, None])
+
+    def test_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            self.solver.solve_many([(0, 0)], [])
+
+class TestComponents(unittest.TestCase):
+    def test_disconnected_goal_rejected(self):
+        solver = AStart({'A': {'B': 1}, 'C': {}})
+        self.assertNotEqual(solver.component_of('A'), solver.component_of('C'))
+        self.assertEqual(solver.component_of('A'), solver.component_of('B'))
+        self.assertEqual(solver.num_components, 2)
+        self.assertIsNone(solver.solve('A', 'C', k=2))
+        self.assertIsNone(solver.solve_classic('A', 'C'))
+
+    def test_directed_labels(self):
+        # 0 <-> 1 -> 2, 3 isolated
+        solver = AStart.from_edges([0, 1, 1], [1, 0, 2], num_nodes=4)
+        self.assertEqual(list(solver.component_labels()), [0, 0, 0, 1])
+        strong = solver.component_labels(strong=True)
+        self.assertEqual(strong[0], strong[1])
+        self.assertEqual(len({strong[0], strong[2], strong[3]}), 3)
+        self.assertIsNone(solver.solve(2, 0))
+        self.assertEqual(solver.solve(0, 2), [0, 1, 2])
+
+    def test_grid_flood_fill(self):
+        walkable = [[1, 1, 0, 1],
+                    [1, 1, 0, 1],
+                    [0, 0, 0, 1]]
+        solver = AStart.from_grid(walkable)
+        labels = solver.component_labels()
+        self.assertEqual(solver.num_components, 2)
+        self.assertEqual(labels[2], -1)
+        self.assertEqual(solver.component_of((0, 0)), solver.component_of((1, 1)))
+        self.assertNotEqual(solver.component_of((0, 0)), solver.component_of((3, 2)))
+        self.assertIsNone(solver.solve((0, 0), (3, 2)))
+
+class TestStats(unittest.TestCase):
+    def test_disabled_by_default(self):
+        solver = AStart(grid_dict(5, 5), 'manhattan')
+        solver.solve((0, 0), (4, 4), k=2)
+        self.assertEqual(solver.stats, {})
+
+    def test_counters(self):
+        solver = AStart.from_grid(random_walkable(20, 20, seed=4, ratio=0.1))
+        solver.collect_stats = True
+        solver.solve_classic((0, 0), (19, 19))
+        classic = solver.stats
+        self.assertEqual(classic['batch_steps'], 0)
+        self.assertEqual(classic['heap_pops'] - classic['stale_pops'], classic['nodes_expanded'] + 1)
+        self.assertGreaterEqual(classic['heuristic_calls'], classic['heap_pushes'])
+        self.assertGreaterEqual(classic['time_us'], 0)
+
+        solver.solve((0, 0), (19, 19), k=10)
+        batch = solver.stats
+        self.assertGreater(batch['batch_steps'], 0)
+        self.assertEqual(batch['heap_pushes'], batch['pivots_pushed'] + 1)
+        self.assertLess(batch['heap_pushes'], classic['heap_pushes'])
+
+    def test_solve_many_sums_queries(self):
+        solver = AStart(grid_dict(6, 6), 'manhattan', collect_stats=True)
+        solver.solve((0, 0), (5, 5), k=3)
+        single = solver.stats
+        solver.solve_many([(0, 0)] * 3, [(5, 5)] * 3, k=3, threads=2)
+        self.assertEqual(solver.stats['nodes_expanded'], 3 * single['nodes_expanded'])
+        self.assertEqual(solver.stats['heap_pushes'], 3 * single['heap_pushes'])
+
+class TestHeuristicCallbacks(unittest.TestCase):
+    def setUp(self):
+        self.calls = 0
+
+    def manhattan(self, u, goal):
+        self.calls += 1
+        return abs(u[0] - goal[0]) + abs(u[1] - goal[1])
+
+    def test_lazy_and_memoized_per_goal(self):
+        graph = grid_dict(40, 40)
+        solver = AStart(graph, self.manhattan, collect_stats=True)
+        path = solver.solve((0, 0), (5, 3), k=4)
+        self.assertEqual(path, AStart(graph, 'manhattan').solve((0, 0), (5, 3), k=4))
+        self.assertEqual(self.calls, solver.stats['heuristic_evals'])
+        self.assertLess(self.calls, 100)
+
+        calls = self.calls
+        self.assertEqual(solver.solve((0, 0), (5, 3), k=4), path)
+        self.assertEqual(self.calls, calls)
+        self.assertEqual(solver.stats['heuristic_evals'], 0)
+        self.assertGreater(solver.stats['heuristic_calls'], 0)
+        solver.solve((0, 0), (3, 5), k=4)
+        self.assertGreater(self.calls, calls)
+
+    def test_classic_and_solve_many_use_callback(self):
+        solver = AStart.from_grid(random_walkable(24, 24, seed=5), heuristic_func=lambda u, g: 0)
+        reference = AStart.from_grid(random_walkable(24, 24, seed=5))
+        self.assertEqual(path_cost(solver.solve_classic((0, 0), (23, 23))),
+                         path_cost(reference.solve_classic((0, 0), (23, 23))))
+        starts, goals = [(0, 0), (23, 23), (0, 23)], [(23, 23), (0, 0), (23, 0)]
+        expected = [solver.solve(s, g, k=5) for s, g in zip(starts, goals)]
+        self.assertEqual(solver.solve_many(starts, goals, k=5, threads=2), expected)
+
+    def test_reassigned_heuristic_is_rebound(self):
+        solver = AStart(grid_dict(10, 10), lambda u, g: 0)
+        solver.solve((0, 0), (9, 9))
+        solver.h = self.manhattan
+        solver.solve((0, 0), (9, 9))
+        self.assertGreater(self.calls, 0)
+
+    def test_exception_propagates(self):
+        def broken(u, goal):
+            raise KeyError(u)
+        solver = AStart(grid_dict(5, 5), broken)
+        with self.assertRaises(KeyError):
+            solver.solve((0, 0), (4, 4))
+        with self.assertRaises(KeyError):
+            solver.solve_many([(0, 0)], [(4, 4)])
+        solver.h = self.manhattan
+        self.assertEqual(len(solver.solve((0, 0), (4, 4))), 9)
+
+    @unittest.skipIf(np is None, "NumPy not installed")
+    def test_vectorized(self):
+        goals = []
+        def octile(cells, goal):
+            goals.append(goal)
+            dx, dy = np.abs(cells[:, 0] - goal[0]), np.abs(cells[:, 1] - goal[1])
+            return dx + dy + (math.sqrt(2) - 2) * np.minimum(dx, dy)
+        walkable = random_walkable(30, 30, seed=9)
+        solver = AStart.from_grid(walkable, heuristic_func=vectorized(octile))
+        native = AStart.from_grid(walkable)
+        for _ in range(2):
+            self.assertEqual(solver.solve((0, 0), (29, 29), k=5), native.solve((0, 0), (29, 29), k=5))
+        self.assertEqual(goals, [(29, 29)])
+        self.assertEqual(solver.solve_many([(0, 0)], [(29, 29)], k=5), [native.solve((0, 0), (29, 29), k=5)])
+
+        ids = AStart.from_edges([0, 1], [1, 2], heuristic_func=vectorized(lambda nodes, goal: np.abs(nodes - goal)))
+        self.assertEqual(ids.solve(0, 2), [0, 1, 2])
+
+class TestCaches(unittest.TestCase):
+    def test_result_cache(self):
+        solver = AStart.from_edges([0, 1, 0], [1, 2, 3], [1, 1, 5], num_nodes=5)
+        self.assertEqual(solver.cache_info()['results']['capacity'], 0)
+        solver.configure_cache(results=8)
+        path = solver.solve(0, 2, k=2)
+        self.assertEqual(solver.solve(0, 2, k=2), path)
+        self.assertEqual(list(solver.solve(0, 2, k=2, output='ids')), path)
+        self.assertEqual(solver.solve_classic(0, 2), path)
+        self.assertIsNone(solver.solve(0, 4))
+        self.assertIsNone(solver.solve(0, 4))
+        info = solver.cache_info()['results']
+        self.assertEqual((info['hits'], info['misses'], info['entries']), (3, 3, 3))
+
+        solver.add_edge(0, 2, 1.0)
+        self.assertEqual(solver.solve(0, 2, k=2), [0, 2])
+        self.assertEqual(solver.cache_info()['results']['entries'], 1)
+
+    def test_result_cache_eviction(self):
+        solver = AStart(grid_dict(6, 6), 'manhattan')
+        solver.configure_cache(results=2)
+        for goal in ((5, 5), (0, 5), (5, 0), (5, 5)):
+            solver.solve((0, 0), goal)
+        info = solver.cache_info()['results']
+        self.assertEqual((info['hits'], info['entries']), (0, 2))
+        solver.h = lambda u, g: 0
+        solver.solve((0, 0), (5, 5))
+        self.assertEqual(solver.cache_info()['results']['entries'], 1)
+
+    @unittest.skipIf(np is None, "NumPy not installed")
+    def test_heuristic_arrays_bounded_by_bytes(self):
+        calls = []
+        def zero(nodes, goal):
+            calls.append(goal)
+            return np.zeros(len(nodes))
+        solver = AStart.from_grid(np.ones((10, 10), dtype=bool), heuristic_func=vectorized(zero))
+        solver.configure_cache(heuristic_bytes=2 * 100 * 4)
+        for goal in ((9, 9), (0, 9), (9, 9), (9, 0), (0, 9)):
+            solver.solve((0, 0), goal)
+        self.assertEqual(calls, [(9, 9), (0, 9), (9, 0), (0, 9)])
+        info = solver.cache_info()['heuristic']
+        self.assertEqual((info['hits'], info['misses'], info['entries'], info['size']), (1, 4, 2, 800))
+        solver.cache_clear()
+        self.assertEqual(solver.cache_info()['heuristic']['entries'], 0)
+
+class TestDistanceField(unittest.TestCase):
+    def test_grid_field_matches_searches(self):
+        walkable = random_walkable(30, 30, seed=3)
+        solver = AStart.from_grid(walkable)
+        goal = (29, 29)
+        field = solver.distance_field(goal)
+        self.assertEqual(field.goal, goal)
+        self.assertEqual(field.path_from(goal), [goal])
+        rng = random.Random(8)
+        cells = [(x, y) for y in range(30) for x in range(30) if walkable[y][x]]
+        for start in rng.sample(cells, 20):
+            expected = solver.solve_classic(start, goal)
+            path = field.path_from(start)
+            if expected is None:
+                self.assertIsNone(path)
+                self.assertEqual(field.distance(start), math.inf)
+                continue
+            self.assertEqual((path[0], path[-1]), (start, goal))
+            self.assertAlmostEqual(path_cost(path), path_cost(expected), places=3)
+            self.assertAlmostEqual(field.distance(start), path_cost(expected), places=3)
+        self.assertIsNone(field.path_from((0, 99)))
+
+    def test_directed_edges_and_cache(self):
+        solver = AStart.from_edges([0, 1, 0, 2], [1, 2, 2, 3], [1, 1, 5, 1], num_nodes=5)
+        field = solver.distance_field(3)
+        self.assertEqual(list(field.dist[:4]), [3, 2, 1, 0])
+        self.assertEqual(list(field.next_hop), [1, 2, 3, -1, -1])
+        self.assertEqual(field.path_from(0), [0, 1, 2, 3])
+        self.assertIsNone(field.path_from(4))
+        self.assertIsNone(solver.distance_field(2).path_from(3))
+        self.assertIs(solver.distance_field(3).dist, field.dist)
+        self.assertEqual(solver.cache_info()['fields']['hits'], 1)
+
+        solver.add_edge(0, 3, 1.0)
+        self.assertEqual(solver.distance_field(3).path_from(0), [0, 3])
+        self.assertEqual(list(field.dist[:4]), [3, 2, 1, 0])
+
+    def test_dict_graph_nodes(self):
+        graph = {'A': {'B': 1, 'C': 3}, 'B': {'D': 2}, 'C': {'D': 1}, 'D': {}}
+        field = AStart(graph).distance_field('D')
+        self.assertEqual(field.path_from('A'), ['A', 'B', 'D'])
+        self.assertEqual(field.distance('C'), 1)
+        self.assertIsNone(field.distance('Z'))
+
+    @unittest.skipIf(np is None, "NumPy not installed")
+    def test_numpy_views_share_memory(self):
+        solver = AStart.from_grid(np.ones((8, 8), dtype=bool))
+        field = solver.distance_field((0, 0))
+        dist, next_hop = field.as_numpy()
+        self.assertTrue(np.shares_memory(dist, np.frombuffer(field.dist, dtype=np.float32)))
+        self.assertEqual(dist.shape, (64,))
+        self.assertEqual(dist[0], 0)
+        self.assertAlmostEqual(float(dist[63]), 7 * math.sqrt(2), places=4)
+        self.assertEqual(next_hop[63], 54)
+        self.assertEqual(field.path_from((3, 0), output='coords').tolist(), [[3, 0], [2, 0], [1, 0], [0, 0]])
+
+def road_network(num_nodes, seed):
+    """Random planar-ish directed graph: each node links to its nearest neighbours by distance."""
+    rng = random.Random(seed)
+    points = [(rng.random(), rng.random()) for _ in range(num_nodes)]
+    src, dst, weight = [], [], []
+    for u, (x, y) in enumerate(points):
+        nearest = sorted(range(num_nodes), key=lambda v: (points[v][0] - x) ** 2 + (points[v][1] - y) ** 2)[1:5]
+        for v in nearest:
+            src.append(u)
+            dst.append(v)
+            weight.append(math.dist(points[u], points[v]) * rng.uniform(1.0, 1.5))
+    return src, dst, weight
+
+class TestLandmarks(unittest.TestCase):
+    def setUp(self):
+        self.edges = road_network(400, seed=6)
+
+    def test_alt_is_optimal_and_expands_less(self):
+        alt = AStart.from_edges(*self.edges, heuristic_func='alt')
+        alt.collect_stats = True
+        dijkstra = AStart.from_edges(*self.edges)
+        dijkstra.collect_stats = True
+        weights = {}
+        for u, v, w in zip(*self.edges):
+            weights[(u, v)] = min(w, weights.get((u, v), math.inf))
+        cost = lambda path: sum(weights[(u, v)] for u, v in zip(path, path[1:]))
+        rng = random.Random(1)
+        expanded = [0, 0]
+        for _ in range(30):
+            start, goal = rng.randrange(400), rng.randrange(400)
+            expected = dijkstra.solve_classic(start, goal)
+            expanded[0] += dijkstra.stats['nodes_expanded']
+            path = alt.solve_classic(start, goal)
+            expanded[1] += alt.stats['nodes_expanded']
+            if expected is None:
+                self.assertIsNone(path)
+                continue
+            self.assertAlmostEqual(cost(path), cost(expected), places=3)
+            batch = alt.solve(start, goal, k=8)
+            self.assertAlmostEqual(cost(batch), cost(expected), places=3)
+        self.assertEqual(len(alt.landmarks), 16)
+        self.assertLess(expanded[1], expanded[0] / 2)
+
+    def test_explicit_landmarks_and_small_graphs(self):
+        solver = AStart.from_edges(*self.edges, heuristic_func='alt')
+        self.assertEqual(solver.build_landmarks(landmarks=[3, 7, 999], threads=2), [3, 7])
+        tiny = AStart({'A': {'B': 1}, 'B': {'C': 1}, 'C': {}}, 'alt')
+        self.assertEqual(tiny.solve('A', 'C'), ['A', 'B', 'C'])
+        self.assertEqual(sorted(tiny.landmarks), ['A', 'B', 'C'])
+
+    def test_save_and_load(self):
+        solver = AStart.from_edges(*self.edges, heuristic_func='alt')
+        landmarks = solver.build_landmarks(count=4)
+        buf = io.BytesIO()
+        solver.save_landmarks(buf)
+        self.assertEqual(len(buf.getvalue()), 20 + 4 * 4 + 2 * 4 * 400 * 4)
+
+        restored = AStart.from_edges(*self.edges, heuristic_func='alt')
+        buf.seek(0)
+        self.assertEqual(restored.load_landmarks(buf), landmarks)
+        restored.collect_stats = solver.collect_stats = True
+        self.assertEqual(restored.solve_classic(0, 399), solver.solve_classic(0, 399))
+        self.assertEqual(restored.stats['nodes_expanded'], solver.stats['nodes_expanded'])
+
+        buf.seek(0)
+        with self.assertRaises(ValueError):
+            AStart.from_edges(*road_network(300, seed=6)).load_landmarks(buf)
+        with self.assertRaises(ValueError):
+            restored.load_landmarks(io.BytesIO(b'junk'))
+
+    def test_dropped_when_edges_change(self):
+        solver = AStart.from_edges(*self.edges, heuristic_func='alt')
+        solver.build_landmarks(count=2)
+        solver.add_edge(0, 399, 0.01)
+        solver.finalize()
+        self.assertEqual(solver.landmarks, [])
+        self.assertEqual(solver.solve(0, 399), [0, 399])
+        self.assertEqual(len(solver.landmarks), 16)
+
+class TestSaveLoad(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'solver.bin')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def roundtrip(self, solver, queries, **kwargs):
+        solver.save(self.path)
+        for mmap in (True, False):
+            loaded = AStart.load(self.path, mmap=mmap, **kwargs)
+            for start, goal in queries:
+                self.assertEqual(loaded.solve(start, goal, k=4), solver.solve(start, goal, k=4))
+                self.assertEqual(loaded.solve_classic(start, goal), solver.solve_classic(start, goal))
+            self.assertEqual(loaded.num_components, solver.num_components)
+            self.assertEqual(list(loaded.component_labels()), list(solver.component_labels()))
+            self.assertEqual(loaded.memory_usage()['mapped_bytes'] > 0, mmap)
+        return loaded
+
+    def test_dict_graph(self):
+        graph = {'A': {'B': 1, 'C': 3}, 'B': {'D': 2}, 'C': {'D': 1}, 'D': {}, 'E': {}}
+        self.roundtrip(AStart(graph), [('A', 'D'), ('A', 'E'), ('D', 'A')])
+        tuples = AStart(grid_dict(8, 8, blocked=[(3, y) for y in range(7)]), 'manhattan')
+        loaded = self.roundtrip(tuples, [((0, 0), (7, 7)), ((0, 0), (7, 0))])
+        self.assertEqual(loaded.h, 'manhattan')
+
+    def test_grid_and_landmarks(self):
+        walkable = random_walkable(20, 20, seed=2)
+        grid = AStart.from_grid(walkable, connectivity=4)
+        self.roundtrip(grid, [((0, 0), (19, 19)), ((0, 19), (19, 0))])
+
+        edges = road_network(200, seed=4)
+        alt = AStart.from_edges(*edges, heuristic_func='alt')
+        landmarks = alt.build_landmarks(count=4)
+        loaded = self.roundtrip(alt, [(0, 199), (17, 3)])
+        self.assertEqual(loaded.landmarks, landmarks)
+
+    def test_mapped_solver_can_be_modified(self):
+        solver = AStart.from_edges([0, 1], [1, 2], [1, 1], num_nodes=4)
+        solver.save(self.path)
+        loaded = AStart.load(self.path)
+        self.assertEqual(loaded.memory_usage()['num_edges'], 2)
+        loaded.add_edge(2, 3, 1.0)
+        self.assertEqual(loaded.solve(0, 3), [0, 1, 2, 3])
+        self.assertIsNone(AStart.load(self.path).solve(0, 3))
+
+    def test_callable_heuristic_and_bad_files(self):
+        AStart(grid_dict(4, 4), lambda u, g: 0).save(self.path)
+        loaded = AStart.load(self.path, heuristic_func=lambda u, g: abs(u[0] - g[0]) + abs(u[1] - g[1]))
+        self.assertEqual(len(loaded.solve((0, 0), (3, 3))), 7)
+        with open(self.path, 'wb') as f:
+            f.write(b'not a solver' * 4)
+        with self.assertRaises(ValueError):
+            AStart.load(self.path)
+
+class TestOpenLists(unittest.TestCase):
+    def test_same_costs_for_every_kind(self):
+        walkable = random_walkable(24, 24, seed=9)
+        rng = random.Random(3)
+        cells = [(x, y) for y in range(24) for x in range(24) if walkable[y][x]]
+        queries = [(rng.choice(cells), rng.choice(cells)) for _ in range(20)]
+        binary = AStart.from_grid(walkable)
+        for kind in ('quaternary', 'radix'):
+            solver = AStart.from_grid(walkable)
+            solver.open_list = kind
+            self.assertEqual(solver.open_list, kind)
+            for start, goal in queries:
+                expected = binary.solve_classic(start, goal)
+                for path in (solver.solve_classic(start, goal), solver.solve(start, goal, k=1)):
+                    self.assertEqual(path is None, expected is None)
+                    if path is not None: self.assertAlmostEqual(path_cost(path), path_cost(expected), places=3)
+                for k in (4, 20):
+                    path, expected = solver.solve(start, goal, k=k), binary.solve(start, goal, k=k)
+                    if path is not None: self.assertAlmostEqual(path_cost(path), path_cost(expected), places=3)
+            starts, goals = zip(*queries)
+            many = solver.solve_many(starts, goals, k=4, classic=True)
+            for path, (start, goal) in zip(many, queries):
+                self.assertEqual(path, solver.solve_classic(start, goal))
+
+    def test_decrease_key_has_no_stale_pops(self):
+        # B is queued at 5, improved to 2 via C, and D (at 6) is only popped after the stale entry
+        graph = {'A': {'B': 5, 'C': 1}, 'B': {'D': 4}, 'C': {'B': 1}, 'D': {}}
+        for kind, stale in (('binary', 1), ('quaternary', 0)):
+            solver = AStart(graph, open_list=kind, collect_stats=True)
+            self.assertEqual(solver.solve_classic('A', 'D'), ['A', 'C', 'B', 'D'])
+            self.assertEqual(solver.stats['stale_pops'], stale)
+        with self.assertRaises(ValueError):
+            solver.open_list = 'fibonacci'
+
+class TestBidirectional(unittest.TestCase):
+    def test_grid_matches_classic(self):
+        walkable = random_walkable(30, 30, seed=6)
+        cells = [(x, y) for y in range(30) for x in range(30) if walkable[y][x]]
+        rng = random.Random(2)
+        for heuristic in (None, 'octile'):
+            solver = AStart.from_grid(walkable, heuristic_func=heuristic)
+            for _ in range(40):
+                start, goal = rng.choice(cells), rng.choice(cells)
+                expected = solver.solve_classic(start, goal)
+                path = solver.solve(start, goal, k=1, bidirectional=True)
+                self.assertEqual(path is None, expected is None)
+                if path is None: continue
+                self.assertEqual((path[0], path[-1]), (start, goal))
+                self.assertAlmostEqual(path_cost(path), path_cost(expected), places=3)
+                batched = solver.solve(start, goal, k=8, bidirectional=True)
+                self.assertEqual((batched[0], batched[-1]), (start, goal))
+
+    def test_directed_graph_and_heuristics(self):
+        src, dst, wts = road_network(300, seed=8)
+        weight = {}
+        for u, v, w in zip(src, dst, wts): weight[u, v] = min(w, weight.get((u, v), math.inf))
+        cost = lambda path: sum(weight[u, v] for u, v in zip(path, path[1:]))
+        plain = AStart.from_edges(src, dst, wts)
+        alt = AStart.from_edges(src, dst, wts, heuristic_func='alt')
+        callback = AStart.from_edges(src, dst, wts, heuristic_func=lambda u, g: 0.0)
+        rng = random.Random(5)
+        for _ in range(30):
+            start, goal = rng.randrange(300), rng.randrange(300)
+            expected = plain.solve_classic(start, goal)
+            for solver in (plain, alt, callback):
+                path = solver.solve(start, goal, k=1, bidirectional=True)
+                self.assertEqual(path is None, expected is None)
+                if path is not None: self.assertAlmostEqual(cost(path), cost(expected), places=3)
+
+    def test_edge_cases(self):
+        graph = {'A': {'B': 1}, 'B': {}, 'C': {}}
+        solver = AStart(graph)
+        self.assertEqual(solver.solve('A', 'A', bidirectional=True), ['A'])
+        self.assertEqual(solver.solve('A', 'B', bidirectional=True), ['A', 'B'])
+        self.assertIsNone(solver.solve('B', 'A', bidirectional=True))
+        self.assertIsNone(solver.solve('A', 'C', bidirectional=True))
+        with self.assertRaises(ValueError):
+            solver.solve('A', 'B', adaptive=True, bidirectional=True)
+
+class TestJumpPointSearch(unittest.TestCase):
+    def test_matches_classic(self):
+        walkable = random_walkable(40, 40, seed=11)
+        solver = AStart.from_grid(walkable)
+        cells = [(x, y) for y in range(40) for x in range(40) if walkable[y][x]]
+        rng = random.Random(4)
+        for _ in range(60):
+            start, goal = rng.choice(cells), rng.choice(cells)
+            expected = solver.solve_classic(start, goal)
+            path = solver.solve_jps(start, goal)
+            self.assertEqual(path is None, expected is None)
+            if path is None: continue
+            self.assertAlmostEqual(path_cost(path), path_cost(expected), places=3)
+            for (x, y), (nx, ny) in zip(path, path[1:]):
+                self.assertEqual(max(abs(nx - x), abs(ny - y)), 1)
+                self.assertTrue(walkable[ny][nx] and walkable[y][nx] and walkable[ny][x])
+            waypoints = solver.solve_jps(start, goal, waypoints=True)
+            self.assertEqual((waypoints[0], waypoints[-1]), (start, goal))
+            self.assertLessEqual(set(waypoints), set(path))
+
+    def test_open_grid_expands_few_nodes(self):
+        solver = AStart.from_grid([[1] * 64 for _ in range(64)])
+        solver.collect_stats = True
+        self.assertEqual(solver.solve_jps((0, 0), (63, 40), waypoints=True), [(0, 0), (40, 40), (63, 40)])
+        self.assertLess(solver.stats['nodes_expanded'], 5)
+
+    def test_unsupported_graphs(self):
+        for solver in (AStart.from_grid([[1, 1], [1, 1]], connectivity=4),
+                       AStart.from_grid([[1, 1], [1, 1]], corner_cutting=True),
+                       AStart(grid_dict(2, 2))):
+            with self.assertRaises(ValueError):
+                solver.solve_jps((0, 0), (1, 1))
+
+class TestHierarchical(unittest.TestCase):
+    def test_paths_near_optimal(self):
+        walkable = random_walkable(48, 48, seed=3)
+        solver = AStart.from_grid(walkable)
+        hpa = HierarchicalSolver(solver, cluster_size=8)
+        cells = [(x, y) for y in range(48) for x in range(48) if walkable[y][x]]
+        rng = random.Random(9)
+        for _ in range(60):
+            start, goal = rng.choice(cells), rng.choice(cells)
+            expected = solver.solve_classic(start, goal)
+            path = hpa.solve(start, goal)
+            self.assertEqual(path is None, expected is None)
+            if path is None: continue
+            route = path.cells()
+            self.assertEqual((route[0], route[-1]), (start, goal))
+            for (x, y), (nx, ny) in zip(route, route[1:]):
+                self.assertEqual(max(abs(nx - x), abs(ny - y)), 1)
+                self.assertTrue(walkable[ny][nx])
+            self.assertAlmostEqual(path_cost(route), path.cost, places=3)
+            self.assertGreaterEqual(path.cost, path_cost(expected) - 1e-3)
+            self.assertLessEqual(path.cost, path_cost(expected) * 1.25)
+
+    def test_refines_lazily(self):
+        solver = AStart.from_grid([[1] * 64 for _ in range(64)])
+        hpa = HierarchicalSolver(solver, cluster_size=16)
+        path = hpa.solve((0, 0), (63, 63))
+        self.assertEqual(path.refined, 0)
+        self.assertGreater(len(path.waypoints), 4)
+        steps = iter(path)
+        self.assertEqual(next(steps), (0, 0))
+        self.assertEqual(path.refined, 1)
+        self.assertEqual(path.cells()[-1], (63, 63))
+        self.assertEqual(path.refined, len(path.waypoints) - 1)
+
+    def test_same_cluster_and_unreachable(self):
+        walkable = [[1] * 16 for _ in range(16)]
+        for y in range(16): walkable[y][10] = 0
+        hpa = HierarchicalSolver(AStart.from_grid(walkable), cluster_size=8)
+        self.assertEqual(hpa.solve((1, 1), (3, 1)).cells(), [(1, 1), (2, 1), (3, 1)])
+        self.assertEqual(hpa.solve((2, 2), (2, 2)).cells(), [(2, 2)])
+        self.assertIsNone(hpa.solve((0, 0), (15, 15)))
+        self.assertIsNone(hpa.solve((10, 0), (0, 0)))
+        with self.assertRaises(ValueError):
+            HierarchicalSolver(AStart(grid_dict(4, 4)))
+        with self.assertRaises(RuntimeError):
+            HierarchicalSolver(AStart(grid_dict(4, 4), use_cpp=False))
+
+    def test_rebuilds_after_grid_changes(self):
+        solver = AStart.from_grid([[1] * 16 for _ in range(16)])
+        hpa = HierarchicalSolver(solver, cluster_size=8)
+        stale = hpa.solve((0, 0), (15, 0))
+        for y in range(15): solver.set_walkable((4, y), False)
+        with self.assertRaises(RuntimeError):
+            stale.cells()
+        path = hpa.solve((0, 0), (15, 0))
+        route = path.cells()
+        self.assertEqual((route[0], route[-1]), ((0, 0), (15, 0)))
+        self.assertIn((4, 15), route)
+        for (x, y), (nx, ny) in zip(route, route[1:]):
+            self.assertEqual(max(abs(nx - x), abs(ny - y)), 1)
+        self.assertAlmostEqual(path_cost(route), path.cost, places=3)
+
+class TestDynamicUpdates(unittest.TestCase):
+    def test_edge_updates(self):
+        solver = AStart.from_edges([0, 1, 0, 2, 3], [1, 3, 2, 3, 4], [1, 1, 5, 5, 1])
+        solver.configure_cache(results=10)
+        self.assertEqual(solver.solve(0, 4), [0, 1, 3, 4])
+        solver.set_edge(0, 2, 0.5)
+        solver.set_edge(2, 3, 0.5)
+        self.assertEqual(solver.solve(0, 4), [0, 2, 3, 4])
+        self.assertTrue(solver.remove_edge(2, 3))
+        self.assertFalse(solver.remove_edge(2, 3) and solver.remove_edge(4, 0))
+        self.assertEqual(solver.solve(0, 4), [0, 1, 3, 4])
+        self.assertTrue(solver.remove_edge(3, 4))
+        self.assertIsNone(solver.solve(0, 4))
+        self.assertEqual(solver.num_components, 2)
+        solver.set_edge(1, 4, 2.0)
+        self.assertEqual(solver.num_components, 1)
+        self.assertEqual(solver.solve(0, 4), [0, 1, 4])
+        self.assertEqual(solver.distance_field(4).distance(0), 3.0)
+        with self.assertRaises(ValueError):
+            solver.set_edge(0, 99, 1.0)
+
+    def test_grid_cells(self):
+        walkable = [[1] * 10 for _ in range(10)]
+        for y in range(9): walkable[y][5] = 0
+        solver = AStart.from_grid(walkable)
+        self.assertEqual(solver.component_of((0, 0)), solver.component_of((9, 0)))
+        solver.set_walkable((5, 9), False)
+        self.assertIsNone(solver.solve((0, 0), (9, 0)))
+        self.assertEqual(solver.num_components, 2)
+        solver.set_walkable((5, 4))
+        self.assertEqual(solver.component_of((0, 0)), solver.component_of((9, 0)))
+        self.assertIn((5, 4), solver.solve((0, 0), (9, 0)))
+        self.assertIn((5, 4), solver.solve_jps((0, 0), (9, 0)))
+        self.assertEqual(solver.component_of((5, 9)), -1)
+        with self.assertRaises(ValueError):
+            AStart(grid_dict(3, 3)).set_walkable((1, 1), False)
+
+    def test_landmarks_kept_or_rebuilt(self):
+        edges = road_network(400, seed=6)
+        solver = AStart.from_edges(*edges, heuristic_func='alt')
+        landmarks = solver.build_landmarks(count=4)
+        u, v = edges[0][0], edges[1][0]
+        solver.set_edge(u, v, 1000.0)
+        self.assertEqual(solver.landmarks, landmarks)
+        solver.set_edge(u, v, 0.001)
+        self.assertEqual(solver.landmarks, [])
+        self.assertEqual(solver.solve(u, v), [u, v])
+        self.assertEqual(solver.landmarks, landmarks)
+
+    def test_updates_wait_for_searches_in_flight(self):
+        searching, updated, seen = threading.Event(), [], []
+        def h(u, goal):
+            if not searching.is_set():
+                searching.set()
+                time.sleep(0.05)
+            seen.append(bool(updated))
+            return 0.0
+        solver = AStart.from_grid([[1] * 30 for _ in range(30)], heuristic_func=h)
+        def update():
+            searching.wait()
+            solver.set_walkable((15, 15), False)
+            updated.append(True)
+        updater = threading.Thread(target=update)
+        updater.start()
+        paths = solver.solve_many([(0, 0), (29, 0)], [(29, 29), (0, 29)], k=5, threads=2)
+        updater.join()
+        # The update started during the batch and only went through once it was done.
+        self.assertTrue(seen and not any(seen))
+        self.assertEqual(updated, [True])
+        self.assertEqual([p[0] for p in paths], [(0, 0), (29, 0)])
+        self.assertIsNone(solver.solve((0, 0), (15, 15)))
+
+    def test_relabelling_during_searches(self):
+        # num_components relabels after a removal while other threads search the same labels.
+        n = 2000
+        line = list(range(n - 1)) + list(range(1, n))
+        solver = AStart.from_edges(line, list(range(1, n)) + list(range(n - 1)), heuristic_func=None)
+        paths, counts, done = [], [], threading.Event()
+        def search():
+            while not done.is_set(): paths.append(solver.solve_classic(0, n - 1, output='ids'))
+        workers = [threading.Thread(target=search) for _ in range(2)]
+        for worker in workers: worker.start()
+        for u in range(0, n - 1, 50):
+            solver.remove_edge(u, u + 1)
+            solver.remove_edge(u + 1, u)
+            counts.append(solver.num_components)
+            solver.set_edge(u, u + 1, 1.0)
+            solver.set_edge(u + 1, u, 1.0)
+            counts.append(solver.num_components)
+        done.set()
+        for worker in workers: worker.join()
+        self.assertEqual(counts, [2, 1] * len(range(0, n - 1, 50)))
+        self.assertTrue(paths)
+        for path in paths:
+            self.assertTrue(path is None or len(path) == n)
+
+    def test_updates_during_solve_many(self):
+        walkable = random_walkable(48, 48, seed=21, ratio=0.1)
+        solver = AStart.from_grid(walkable)
+        cells = [(x, y) for y in range(48) for x in range(48) if walkable[y][x]]
+        rng = random.Random(4)
+        starts, goals = [rng.choice(cells) for _ in range(40)], [rng.choice(cells) for _ in range(40)]
+        batches, done = [], threading.Event()
+        def search():
+            for _ in range(15): batches.append(solver.solve_many(starts, goals, k=10, threads=2))
+            done.set()
+        worker = threading.Thread(target=search)
+        worker.start()
+        toggled = set()
+        while not done.is_set():
+            cell = rng.choice(cells)
+            if cell not in starts and cell not in goals:
+                solver.set_walkable(cell, cell in toggled)
+                toggled ^= {cell}
+        worker.join()
+        for paths in batches:
+            for path, start, goal in zip(paths, starts, goals):
+                if path is None: continue
+                self.assertEqual((path[0], path[-1]), (start, goal))
+                for (x0, y0), (x1, y1) in zip(path, path[1:]):
+                    self.assertLessEqual(max(abs(x1 - x0), abs(y1 - y0)), 1)
+        self.assertEqual(solver.solve_many(starts, goals, k=10, threads=2),
+                         [solver.solve(s, g, k=10) for s, g in zip(starts, goals)])
+
+    def test_replanner_repairs_cheaply(self):
+        walkable = random_walkable(64, 64, seed=12, ratio=0.15)
+        walkable[0][0] = walkable[63][63] = 1
+        solver = AStart.from_grid(walkable)
+        solver.collect_stats = True
+        replanner = solver.replanner((0, 0), (63, 63))
+        path = replanner.path()
+        initial = solver.stats['nodes_expanded']
+        self.assertAlmostEqual(path_cost(path), path_cost(solver.solve_classic((0, 0), (63, 63))), places=3)
+        for step in range(20):
+            replanner.move(path[1])
+            solver.set_walkable(path[len(path) // 2], False)
+            path = replanner.path()
+            self.assertLess(solver.stats['nodes_expanded'], initial)
+            expected = solver.solve_classic(replanner.start, (63, 63))
+            if expected is None:
+                self.assertIsNone(path)
+                break
+            self.assertEqual(path[0], replanner.start)
+            self.assertAlmostEqual(path_cost(path), path_cost(expected), places=3)
+
+class TestBudgets(unittest.TestCase):
+    def test_resumed_search_matches_unbounded(self):
+        walkable = random_walkable(64, 64, seed=21, ratio=0.15)
+        walkable[0][0] = walkable[63][63] = 1
+        for kind in ('binary', 'radix'):
+            solver = AStart.from_grid(walkable)
+            solver.open_list = kind
+            solver.collect_stats = True
+            for solve, bounded in (
+                (lambda: solver.solve_classic((0, 0), (63, 63)),
+                 lambda: solver.solve_classic((0, 0), (63, 63), max_expansions=40)),
+                (lambda: solver.solve((0, 0), (63, 63), k=10),
+                 lambda: solver.solve((0, 0), (63, 63), k=10, max_expansions=40)),
+            ):
+                expected = solve()
+                search = bounded()
+                ticks = 0
+                while not search.done:
+                    self.assertEqual(search.status, 'max_expansions')
+                    self.assertLessEqual(solver.stats['nodes_expanded'], 80)
+                    self.assertEqual(search.path[0], (0, 0))
+                    search.resume()
+                    ticks += 1
+                self.assertGreater(ticks, 5)
+                self.assertEqual(search.status, 'found')
+                self.assertAlmostEqual(path_cost(search.path), path_cost(expected), places=3)
+
+    def test_partial_path_heads_for_goal(self):
+        solver = AStart.from_grid([[1] * 50 for _ in range(50)])
+        search = solver.solve((0, 0), (49, 49), k=5, max_expansions=20)
+        self.assertEqual(search.status, 'max_expansions')
+        end = search.path[-1]
+        self.assertGreater(end[0] + end[1], 4)
+        self.assertEqual(search.resume(max_expansions=10 ** 6).status, 'found')
+        self.assertEqual(search.path[-1], (49, 49))
+
+    def test_deadline_and_edge_cases(self):
+        solver = AStart.from_grid([[1] * 200 for _ in range(200)], heuristic_func=None)
+        search = solver.solve_classic((0, 0), (199, 199), deadline_us=0)
+        self.assertEqual(search.status, 'deadline')
+        self.assertEqual(search.path, [(0, 0)])
+        solver.set_walkable((1, 1), False)
+        self.assertEqual(search.resume(deadline_us=10 ** 7).status, 'found')
+        self.assertNotIn((1, 1), search.path)
+        self.assertEqual(solver.solve_classic((0, 0), (5, 5), max_expansions=0).status, 'max_expansions')
+        self.assertEqual(solver.solve_classic((1, 1), (5, 5), max_expansions=10).status, 'no_path')
+        self.assertEqual(solver.solve_classic((0, 0), (999, 5), max_expansions=10).path, None)
+        with self.assertRaises(ValueError):
+            solver.solve((0, 0), (5, 5), bidirectional=True, max_expansions=10)
+
+class TestBoundedSuboptimal(unittest.TestCase):
+    def test_grid_paths_within_bound(self):
+        walkable = random_walkable(48, 48, seed=12, ratio=0.3)
+        solver = AStart.from_grid(walkable)
+        cells = [(x, y) for y in range(48) for x in range(48) if walkable[y][x]]
+        rng = random.Random(4)
+        queries = [(rng.choice(cells), rng.choice(cells)) for _ in range(15)]
+        for kind in ('binary', 'quaternary', 'radix'):
+            solver.open_list = kind
+            for start, goal in queries:
+                expected = solver.solve_classic(start, goal)
+                for epsilon, k, adaptive, focal in ((0.1, 1, False, False), (0.5, 20, False, False),
+                                                    (0.1, 20, False, True), (1.0, 1000, False, True)):
+                    path = solver.solve(start, goal, k=k, adaptive=adaptive, epsilon=epsilon, focal=focal)
+                    if expected is None:
+                        self.assertIsNone(path)
+                        continue
+                    self.assertEqual((path[0], path[-1]), (start, goal))
+                    self.assertLessEqual(path_cost(path), (1 + epsilon) * path_cost(expected) + 1e-3)
+
+    def test_bound_holds_for_inconsistent_heuristics(self):
+        # An admissible but inconsistent heuristic only keeps the bound because
+        # closed nodes reached more cheaply are reopened.
+        edges = road_network(150, seed=9)
+        weights = {}
+        for u, v, w in zip(*edges):
+            weights[(u, v)] = min(w, weights.get((u, v), math.inf))
+        cost = lambda path: sum(weights[(u, v)] for u, v in zip(path, path[1:]))
+        goal = 7
+        field = AStart.from_edges(*edges).distance_field(goal)
+        rng = random.Random(2)
+        scale = [rng.random() for _ in range(150)]
+        solver = AStart.from_edges(*edges, heuristic_func=lambda u, g: scale[u] * field.distance(u) if g == goal else 0)
+        for start in range(150):
+            optimal = field.distance(start)
+            for k, focal in ((1, False), (5, False), (5, True), (50, True)):
+                path = solver.solve(start, goal, k=k, epsilon=0.2, focal=focal)
+                if optimal == math.inf:
+                    self.assertIsNone(path)
+                    continue
+                self.assertLessEqual(cost(path), 1.2 * optimal + 1e-4)
+
+    def test_expands_less_than_optimal_search(self):
+        walkable = random_walkable(200, 200, seed=5, ratio=0.3)
+        walkable[0][0] = walkable[199][199] = 1
+        solver = AStart.from_grid(walkable)
+        solver.collect_stats = True
+        solver.solve_classic((0, 0), (199, 199))
+        optimal = solver.stats['nodes_expanded']
+        for k, focal in ((1, False), (20, True)):
+            solver.solve((0, 0), (199, 199), k=k, epsilon=0.5, focal=focal)
+            self.assertLess(solver.stats['nodes_expanded'], optimal / 2)
+
+    def test_invalid_combinations(self):
+        solver = AStart.from_grid([[1] * 8 for _ in range(8)])
+        with self.assertRaises(ValueError):
+            solver.solve((0, 0), (7, 7), epsilon=-0.1)
+        with self.assertRaises(ValueError):
+            solver.solve((0, 0), (7, 7), epsilon=0.5, bidirectional=True)
+        with self.assertRaises(ValueError):
+            solver.solve((0, 0), (7, 7), epsilon=0.5, max_expansions=10)
+        with self.assertRaises(ValueError):
+            solver.solve((0, 0), (7, 7), epsilon=0.5, focal=True, adaptive=True)
+        python = AStart(grid_dict(8, 8), use_cpp=False)
+        with self.assertRaises(RuntimeError):
+            python.solve((0, 0), (7, 7), epsilon=0.5)
+
+class TestNativeExtension(unittest.TestCase):
+    def test_paths_are_read_only_buffers(self):
+        solver = AStart.from_grid([[1] * 10 for _ in range(10)])
+        solver.collect_stats = True
+        view = memoryview(solver._native.solve_classic(0, 99, 3, None, solver._stats_buffer.stats))
+        self.assertTrue(view.readonly)
+        self.assertEqual(view.format, 'i')
+        self.assertEqual(view.tolist(), solver.solve_classic((0, 0), (9, 9), output='ids').tolist())
+        self.assertGreater(solver.stats['nodes_expanded'], 0)
+        with self.assertRaises(TypeError):
+            view[0] = 1
+        solver.set_walkable((9, 9), False)
+        self.assertEqual(len(solver._native.solve_classic(0, 99, 3, None, None)), 0)
+        with self.assertRaises(ValueError):
+            solver._native.solve_classic(0, 1, 3, None, bytearray(8))
+        if np is not None:
+            ids = solver.solve((0, 0), (8, 8), output='numpy')
+            self.assertFalse(ids.flags.writeable)
+            self.assertEqual(ids.tolist(), solver.solve((0, 0), (8, 8), output='ids').tolist())
+
+    def test_graph_owns_its_solver(self):
+        # The extension allocates the solver itself: an integer is a node count, never an address.
+        graph = astart_solver._cpp_lib.Graph(12345)
+        self.assertEqual(graph.num_edges, 0)
+        self.assertEqual(len(graph.solve_classic(0, 12344, 0, None, None)), 0)
+        graph.add_edge(0, 12344, 1.0)
+        self.assertEqual(list(memoryview(graph.solve_classic(0, 12344, 0, None, None))), [0, 12344])
+        with self.assertRaises(ValueError):
+            astart_solver._cpp_lib.Graph(-1)
+        with self.assertRaises(TypeError):
+            astart_solver._cpp_lib.Graph(AStart.from_edges([0], [1])._native)
+
+    def test_oversized_graphs_raise(self):
+        # Node counts whose offsets would not fit int are refused before anything is allocated.
+        with self.assertRaises(ValueError):
+            AStart.from_edges([0], [2 ** 31 - 2])
+        with self.assertRaises(ValueError):
+            astart_solver._cpp_lib.Graph(2 ** 31 - 1)
+        with self.assertRaises(ValueError):
+            astart_solver._cpp_lib.Graph.grid(b'', 50000, 50000, 4, False)
+        self.assertEqual(AStart.from_edges([0], [1]).solve(0, 1), [0, 1])
+
+    def test_searches_release_the_gil(self):
+        solver = AStart.from_grid([[1] * 1000 for _ in range(1000)], heuristic_func=None)
+        elapsed = []
+        def search():
+            t0 = time.perf_counter()
+            solver.solve_classic((0, 0), (999, 999), output='ids')
+            elapsed.append(time.perf_counter() - t0)
+        worker = threading.Thread(target=search)
+        worker.start()
+        # This thread keeps running while the search holds no GIL: no long gap between ticks.
+        ticks = [time.perf_counter()]
+        while worker.is_alive(): ticks.append(time.perf_counter())
+        worker.join()
+        gap = max(b - a for a, b in zip(ticks, ticks[1:]))
+        self.assertLess(gap, elapsed[0] / 2)
+
+    def test_import_does_not_load_backend(self):
+        code = ("import sys, astart; print('astart._cpp_backend' in sys.modules); "
+                "astart.AStart.from_edges([0], [1]); print('astart._cpp_backend' in sys.modules)")
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True).stdout
+        self.assertEqual(out.split(), ['False', 'True'])
+
+class TestAsync(unittest.TestCase):
+    def test_coalesces_and_deduplicates(self):
+        walkable = random_walkable(40, 40, seed=8)
+        solver = AStart.from_grid(walkable)
+        cells = [(x, y) for y in range(40) for x in range(40) if walkable[y][x]]
+        rng = random.Random(3)
+        queries = [(rng.choice(cells), rng.choice(cells)) for _ in range(30)]
+
+        async def serve():
+            paths = await asyncio.gather(*(solver.solve_async(s, g, k=20) for s, g in queries + queries[:5]))
+            classic = await asyncio.gather(*(solver.solve_async(s, g, output='ids', classic=True) for s, g in queries))
+            self.assertIsNone(await solver.solve_async((0, 0), (99, 99)))
+            return paths, classic
+
+        paths, classic = asyncio.run(serve())
+        self.assertEqual(paths, [solver.solve(s, g, k=20) for s, g in queries + queries[:5]])
+        self.assertEqual([p.tolist() if p else None for p in classic],
+                         [p.tolist() if p else None for p in (solver.solve_classic(s, g, output='ids') for s, g in queries)])
+        stats = solver.async_stats()
+        self.assertEqual((stats['requests'], stats['deduplicated'], stats['searches']), (66, 5, 60))
+        self.assertEqual(stats['batches'], 2)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertLessEqual(stats['latency_ms_p50'], stats['latency_ms_p99'])
+
+    def test_does_not_block_the_loop(self):
+        solver = AStart.from_grid([[1] * 1000 for _ in range(1000)], heuristic_func=None)
+        front_end = aio.AsyncSolver(solver, workers=1, threads=1, max_batch=1)
+
+        async def serve():
+            ticks = []
+            async def tick():
+                while True:
+                    ticks.append(time.perf_counter())
+                    await asyncio.sleep(0)
+            ticker = asyncio.ensure_future(tick())
+            t0 = time.perf_counter()
+            searches = [front_end.solve((0, 0), (999, i), classic=True) for i in range(3)]
+            self.assertEqual(front_end.queue_depth, 0)
+            task = asyncio.gather(*searches)
+            await asyncio.sleep(0)
+            self.assertEqual(front_end.queue_depth, 3)
+            paths = await task
+            elapsed = time.perf_counter() - t0
+            ticker.cancel()
+            return paths, ticks, elapsed
+
+        paths, ticks, elapsed = asyncio.run(serve())
+        front_end.close()
+        self.assertEqual([p[-1] for p in paths], [(999, 0), (999, 1), (999, 2)])
+        self.assertEqual(front_end.stats()['batches'], 3)
+        self.assertLess(max(b - a for a, b in zip(ticks, ticks[1:])), elapsed / 4)
+        with self.assertRaises(RuntimeError):
+            asyncio.run(front_end.solve((0, 0), (1, 1)))
+
+    def test_updates_are_ordered_with_searches(self):
+        solver = AStart.from_grid([[1] * 20 for _ in range(20)])
+        front_end = aio.AsyncSolver(solver, workers=2, threads=1)
+
+        async def serve():
+            before = asyncio.ensure_future(front_end.solve((0, 0), (19, 0)))
+            update = asyncio.ensure_future(front_end.set_walkable((10, 0), False))
+            after = asyncio.ensure_future(front_end.solve((0, 0), (19, 0), k=5))
+            await asyncio.sleep(0)
+            # The batch of `before` is running: direct updates are refused, `after` waits for the update.
+            with self.assertRaises(RuntimeError):
+                solver.set_walkable((5, 5), False)
+            self.assertEqual(front_end.queue_depth, 2)
+            await update
+            return await before, await after
+
+        before, after = asyncio.run(serve())
+        front_end.close()
+        self.assertIn((10, 0), before)
+        self.assertNotIn((10, 0), after)
+        self.assertEqual(after[-1], (19, 0))
+        self.assertEqual(front_end.stats()['batches'], 2)
+        solver.set_walkable((10, 0))
+        self.assertIn((10, 0), solver.solve((0, 0), (19, 0)))
+
+class TestMovingAI(unittest.TestCase):
+    MAP = "type octile\r\nheight 4\r\nwidth 5\r\nmap\r\n.....\r\n.@T@.\r\n.GSW.\r\n.....extra\r\n"
+    SCEN = "version 1\n0\tm.map\t5\t4\t0\t0\t4\t0\t4.00000000\n\n1\tm.map\t5\t4\t0\t0\t4\t3\t6.41421356\n"
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', newline='') as f: f.write(text)
+        return path
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_map_and_scenarios(self):
+        grid = movingai.read_map(self.write('m.map', self.MAP))
+        self.assertEqual(grid.shape, (4, 5))
+        self.assertEqual(grid.tolist()[1:3], [[1, 0, 0, 0, 1], [1, 1, 1, 0, 1]])
+        scenarios = movingai.read_scenarios(self.write('m.map.scen', self.SCEN))
+        self.assertEqual(scenarios[1], movingai.Scenario(1, (0, 0), (4, 3), 6.41421356))
+        solver = movingai.load_map(os.path.join(self.tmp.name, 'm.map'))
+        for scen in scenarios:
+            self.assertAlmostEqual(path_cost(solver.solve_classic(scen.start, scen.goal)), scen.optimal, places=5)
+        with open(os.path.join(self.tmp.name, 'm.map'), 'rb') as f:
+            self.assertEqual(movingai.read_map(f).tolist(), grid.tolist())
+
+    def test_malformed_files(self):
+        with self.assertRaises(ValueError):
+            movingai.read_map(self.write('a.map', "type octile\nheight 4\nwidth 5\n"))
+        with self.assertRaises(ValueError):
+            movingai.read_map(self.write('b.map', self.MAP.replace(".....extra", "...")))
+        with self.assertRaisesRegex(ValueError, "line 3"):
+            movingai.read_scenarios(self.write('c.scen', "version 1\n0 m.map 5 4 0 0 4 0 4\n0 m.map 5 4 x\n"))
+        self.assertEqual(movingai.read_scenarios(self.write('d.scen', "version 1\n")), [])
+
+class TestSharedMemory(unittest.TestCase):
+    def test_attach_in_process(self):
+        solver = AStart(grid_dict(10, 10, blocked=[(4, y) for y in range(9)]), 'manhattan')
+        block = solver.share()
+        try:
+            attached = AStart.attach(block.name)
+            self.assertEqual(attached.solve((0, 0), (9, 9)), solver.solve((0, 0), (9, 9)))
+            self.assertGreater(attached.memory_usage()['mapped_bytes'], 0)
+            self.assertEqual(attached.h, 'manhattan')
+            del attached
+        finally:
+            block.close()
+            block.unlink()
+
+    def test_pool_matches_solve_many(self):
+        solver = AStart.from_grid(random_walkable(16, 16, seed=5))
+        starts = [(0, 0), (15, 15), (0, 15)] * 10
+        goals = [(15, 15), (0, 0), (15, 0)] * 10
+        with SolverPool(solver, processes=2) as pool:
+            self.assertEqual(len(set(pool.pids)), 2)
+            self.assertNotIn(os.getpid(), pool.pids)
+            self.assertEqual(pool.solve_many(starts, goals, k=4, chunksize=7), solver.solve_many(starts, goals, k=4))
+            self.assertEqual(pool.solve((0, 0), (15, 15)), solver.solve((0, 0), (15, 15)))
+            with self.assertRaises(ValueError):
+                pool.solve_many(starts, goals[:1])
+
 if __name__ == '__main__':
     unittest.main()